@@ -1,18 +1,16 @@
 import sys
 from PyQt5 import QtWidgets, uic
-from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import QMessageBox, QTableWidgetItem
-from PyQt5.QtGui import QBrush, QColor
-from lib.EMARK import EMARKPrinter
-from lib.IND231 import WeightReader
-from lib.PLC import PLCReader
-from lib.table import setup_table_functionality, add_to_history, open_file, export_to_excel, load_last_csv
-import os
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtWidgets import QMessageBox
+from lib.edges import RISING, FALLING
+from lib.engine import LineEngine, FONT_SIZES, DEFAULT_FONT
+from lib.models import InputTableModel, HomeTableModel, HistoryTableModel, SearchTableModel, set_uniform_rows
+from lib.pipeline import NORMAL
+from lib.signals import PLCSignals, DeviceSignals, PrintSignals, EngineSignals, LogWriterSignals
+from lib.supervisor import ONLINE, CONNECTING, OFFLINE, STOPPED
+from lib.table import setup_table_functionality, open_file, export_to_excel, load_last_csv, search_history
+import os
 import json
-import time
-from collections import deque
-from PyQt5.QtWidgets import QTableWidgetItem
 from PyQt5.QtWebEngineWidgets import QWebEngineView
 from PyQt5.QtCore import QUrl
 from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout
@@ -36,35 +34,13 @@ class PrintingSystem(QtWidgets.QMainWindow):
         uic.loadUi('lib/home.ui', self)
         
         # Initialize variables
-        self.weight_unit = "kg"
-        self.length_unit = "mm"
-        self.pipe_type = "5CT"
-        self.weight_factor = 0
-        self.length_factor = 0
-        self.weight = 0
-        self.length = 0
         self.length_converted = False
         self.weight_converted = False
         self.OD = 0
         self.WT = 0
-        self.length_counter = 0
-        self.weight_counter = 0
-        self.printer_counter = 0
-        self.status = "NORMAL"
-
-        self.length_timer = 0
-        self.weight_timer = 0
-        self.printer_timer = 0
-        self.printer_processed = False
-        self.length_processed = False
-        self.weight_processed = False
-        self.ip_address = None
 
-        self.pipe_queue = deque()
-
-        self.EMARK = EMARKPrinter()
-        self.WEIGHT = WeightReader()
-        self.PLC = PLCReader()
+        self.station_active = {"length": False, "weight": False, "printer": False}
+        self.ip_address = None
 
         # --- Add PDF viewer to the Help tab ---
         # Enable PDF plugins
@@ -87,17 +63,40 @@ class PrintingSystem(QtWidgets.QMainWindow):
 
         self.config = self.load_config()
 
-        # Create logs directory if it doesn't exist
-        if not os.path.exists("logs"):
-            os.makedirs("logs")
-        
+        # Grading, sequencing, printing and logging run in the engine on worker threads;
+        # this window only observes it (lib/engine.py runs the same line headless)
+        self.engine = LineEngine(self.config)
+        self.EMARK = self.engine.EMARK
+        self.WEIGHT = self.engine.WEIGHT
+        self.PLC = self.engine.PLC
+        self.tracker = self.engine.tracker  # Pipeline state; tableWidget_home only displays it
+        self.print_queue = self.engine.print_queue
+        self.engine_signals = EngineSignals().attach(self.engine)
+        self.engine_signals.pipe_event.connect(self.on_pipe_event)
+        # The History tab re-reads the log once the writer has flushed new rows to it
+        self.follow_log = False
+        self.log_signals = LogWriterSignals().attach(self.engine.log_writer)
+        self.log_signals.flushed.connect(self.on_log_flushed)
+        self.print_signals = PrintSignals().attach(self.print_queue)
+        self.print_signals.job_done.connect(self.on_print_done)
+        self.highlighted = None  # Pipe whose printing text is highlighted (last measured)
+
+        # Connects and reconnects run on supervisor threads, never on the GUI thread
+        self.manual_connect = set()
+        self.supervisor = self.engine.supervisor
+        self.device_signals = DeviceSignals().attach(self.supervisor)
+        self.device_signals.state_changed.connect(self.on_device_state)
+
         # Connect signals
         self.connect_signals()
         self.auto_connect()
 
+        self.comboBox_font.currentTextChanged.connect(self.update_font)
         self.comboBox_font.setCurrentIndex(3)
+        self.update_font(self.comboBox_font.currentText())
 
-        self.tableWidget_input.cellChanged.connect(self.on_cell_changed)
+        self.input_model.cell_changed.connect(self.on_cell_changed)
+        self.input_model.modelReset.connect(self.reload_pipes)
         data = [
             "",
             "1ST API SPEC 5CT-2221",
@@ -108,23 +107,33 @@ class PrintingSystem(QtWidgets.QMainWindow):
         ]
 
         for i in range(0):
-            for col, text in enumerate(data):
-                item = QTableWidgetItem(text)
-                item.setTextAlignment(Qt.AlignCenter)
-                self.tableWidget_input.setItem(i, col, item)
+            self.input_model.set_block(i, 0, [data])
         # Apply copy-paste functionality
         setup_table_functionality(self, self.tableWidget_input)
 
-        # Start polling
+        # PLC inputs are sampled off the GUI thread; the engine handles station events there
+        self.acquisition = self.engine.acquisition
+        self.plc_signals = PLCSignals().attach(self.acquisition)
+        self.plc_signals.tag_changed.connect(self.on_tag_changed)
+        self.plc_signals.station_event.connect(self.on_station_event)
+        self.engine.start()
+
+        # Weight readout, status labels and reconnects
         self.sensor_timer = QTimer()
         self.sensor_timer.timeout.connect(self.poll_sensors)
         self.sensor_timer.start(1000)
 
+    def closeEvent(self, event):
+        self.engine.stop()
+        self.history_model.stop()
+        super().closeEvent(event)
+
     def setup_table(self):
-        self.tableWidget.setColumnCount(7)
-        self.tableWidget.setHorizontalHeaderLabels([
-            "No", "Date", "Time", "Length", "Weight", "Printed Text", "Status"
-        ])
+        # History rows are paged in from the log file on demand
+        self.history_model = HistoryTableModel(parent=self)
+        self.tableWidget.setModel(self.history_model)
+        # Search results come from the history database instead (see search_history)
+        self.search_model = SearchTableModel(self)
         self.tableWidget.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
         
         # Set different resize modes for different columns
@@ -141,10 +150,11 @@ class PrintingSystem(QtWidgets.QMainWindow):
        
         # Set minimum sizes if needed
         header.setMinimumSectionSize(120)  # Minimum width for all columns
+        set_uniform_rows(self.tableWidget, lines=1)
 
-        self.tableWidget_home.setColumnCount(4)
-        self.tableWidget_home.setHorizontalHeaderLabels(["Printing Text", "Length", "Weight", "Status Print"])
-        self.tableWidget_home.setRowCount(5000)
+        # Both grids are views: rows exist only for loaded pipes
+        self.home_model = HomeTableModel(self.tracker, self)
+        self.tableWidget_home.setModel(self.home_model)
         # self.tableWidget_home.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
         header = self.tableWidget_home.horizontalHeader()
         header.setSectionResizeMode(QtWidgets.QHeaderView.Stretch)  # Stretch all columns equally
@@ -152,10 +162,11 @@ class PrintingSystem(QtWidgets.QMainWindow):
         header.setDefaultAlignment(Qt.AlignCenter)
         vheader = self.tableWidget_home.verticalHeader()
         vheader.setDefaultAlignment(Qt.AlignCenter)
+        # Length/weight cells are "value\n(STATUS)": two lines, sized once
+        set_uniform_rows(self.tableWidget_home, lines=2)
 
-        self.tableWidget_input.setColumnCount(6)
-        self.tableWidget_input.setHorizontalHeaderLabels(["NO", "TEXT 1", "TEXT 2", "HEAT NUMBER", "WORK ORDER", "PIPE NUMBER"])
-        self.tableWidget_input.setRowCount(5000)
+        self.input_model = InputTableModel(parent=self)
+        self.tableWidget_input.setModel(self.input_model)
         header = self.tableWidget_input.horizontalHeader()
         header.setSectionResizeMode(QtWidgets.QHeaderView.Stretch)  # Stretch all columns equally
         header.setDefaultAlignment(Qt.AlignCenter)
@@ -230,218 +241,86 @@ class PrintingSystem(QtWidgets.QMainWindow):
             self.comboBox_com_1.addItem(str(port))
             self.comboBox_com_2.addItem(str(port)) 
 
-    def poll_sensors(self):
-        try:
-            length_data = self.PLC.read_real(db_number=2, start_byte=0)
-            if length_data:
-                self.length = round(length_data, 2)
-            weight_data = self.WEIGHT.read_weight()
-            if weight_data:
-                self.weight = round(weight_data,2)
-            else:
-                self.weight = 0
-            self.length_factor = 1
-            self.weight_factor = 1
+    # Readings, units and pipe state live in the engine
+    length = property(lambda self: self.engine.length)
+    weight = property(lambda self: self.engine.weight)
+    length_unit = property(lambda self: self.engine.length_unit)
+    weight_unit = property(lambda self: self.engine.weight_unit)
+    pipe_type = property(lambda self: self.engine.pipe_type)
 
-            if self.length_unit == "ft":
-                self.length = round(self.length / 304.8, 2)
-                self.length_factor = 1 / 304.8
+    def on_tag_changed(self, name, value, timestamp):
+        if name == "length":
+            self.update_length()
 
-            if self.length_unit == "m":
-                self.length = round(self.length / 1000, 2)
-                self.length_factor = 1 / 1000
+    def on_station_event(self, event):
+        self.station_active[event.station] = event.edge == RISING
+        if event.edge == FALLING:
+            self.update_status()
 
-            if self.weight_unit == "lbs":
-                self.weight = round(self.weight * 2.20462262, 2)
-                self.weight_factor = 1 * 2.20462262
+    def update_length(self):
+        self.lineEdit_length.setText(f"{self.length} {self.length_unit}")
 
-            self.lineEdit_weight.setText(f"{self.weight} {self.weight_unit}")
-            self.lineEdit_length.setText(f"{self.length} {self.length_unit}")
+    def update_weight(self):
+        self.engine.update_weight()
+        self.lineEdit_weight.setText(f"{self.weight} {self.weight_unit}")
 
-            now = time.time()
-
-            rowCount = self.tableWidget_home.rowCount()
-            for row in range(rowCount):
-                length_item = self.tableWidget_home.item(row, 1)
-                if not length_item:
-                    self.length_counter = row
-                    break
-            for row in range(rowCount):
-                weight_item = self.tableWidget_home.item(row, 2)
-                if not weight_item:
-                    self.weight_counter = row
-                    break
-            # print(f"Total Row: {rowCount} | Length Counter: {self.length_counter} | Weight Counter: {self.weight_counter}")
-
-            # LENGTH sensor
-            length_on = self.PLC.read_bit_I(byte=6, bit=5)
-            length_on_2 = self.PLC.read_bit_I(byte=10, bit=1)
-            # length_on_2 = True
-            if length_on and length_on_2:
-                if self.PLC.connected and not self.length_processed:
-                    self.length_status.setText("LENGTH : MEASURING")
-
-                if now - self.length_timer >= 0.5 and not self.length_processed:
-                    if self.length<=0:
-                        self.length_status.setText("LENGTH : INVALID")
-                    else:
-                        current_text = self.tableWidget_home.item(self.length_counter, 0)
-                        if current_text:
-                            status_length = self.check_length(self.length)
-                            length_text = f"{self.length}\n({status_length})"
-
-                            length_item = QTableWidgetItem(length_text)
-                            length_item.setTextAlignment(Qt.AlignCenter)
-                            if "UNDERLENGTH" in status_length or "OVERLENGTH" in status_length:
-                                length_item.setBackground(QBrush(QColor(color_red)))
-                                self.status = "REJECT"
-                            elif "NORMAL" in status_length:
-                                length_item.setBackground(QBrush(QColor(color_green)))
-                                self.status = "NORMAL"
-
-                            self.tableWidget_home.setItem(self.length_counter, 1, length_item)
-                            self.tableWidget_home.setWordWrap(True)
-                            self.tableWidget_home.resizeRowsToContents()
-
-                            current_text = current_text.text().replace("[L]", str(self.length), 1)
-                            self.tableWidget_home.setItem(self.length_counter, 0, QTableWidgetItem(current_text))
-
-                            # self.length_counter +=1
-                            self.highlight_row_by_counter()
-
-                            self.length_processed = True
-                            self.length_timer = now
-                            self.length_status.setText("LENGTH : MEASURE DONE")
-                        
-                        else:
-                            self.length_status.setText("LENGTH : ROW EMPTY")
-            else:
-                if self.PLC.connected:
-                    self.length_status.setText("LENGTH : ONLINE")
-                    self.length_status.setStyleSheet("""
-                        background-color: rgb(0, 170, 0);
-                        border-radius: 5px;
-                        border: none;
-                    """)
-                else:
-                    self.length_status.setText("LENGTH : DISCONNECTED")
-                    self.length_status.setStyleSheet("""
-                        background-color: rgb(255, 170, 0);
-                        border-radius: 5px;
-                        border: none;
-                    """)
-                    msg = self.PLC.connect(ip= self.ip_address)
-                    print(msg)
-                self.length_timer = now
-                self.length_processed = False
-
-            # WEIGHT sensor
-            weight_on = self.PLC.read_bit_I(byte=6, bit=6)
-            weight_on_2 = self.PLC.read_bit_I(byte=10, bit=4)
-            if weight_on and weight_on_2:
-                if self.WEIGHT.connected and not self.weight_processed:
-                    self.weight_status.setText("WEIGHT : MEASURING")
-
-                if now - self.weight_timer >= 0.5  and not self.weight_processed and self.weight_counter<self.length_counter:
-                    if self.weight <= 0:
-                        self.weight_status.setText("LENGTH : INVALID")
-                    else:
-                        current_length = self.tableWidget_home.item(self.weight_counter, 1)
-                        if current_length:
-                            current_length = float(current_length.text().split()[0])
-                        else:
-                            print("Current Length Empty!")
-                        print(f"Using Length = {current_length} for calculate weight min max")
-                        status_weight = self.check_weight(self.weight, current_length)
-                        weight_text = f"{self.weight}\n({status_weight})"
-
-                        weight_item = QTableWidgetItem(weight_text)
-                        weight_item.setTextAlignment(Qt.AlignCenter)
-                        if "UNDERWEIGHT" in status_weight or "OVERWEIGHT" in status_weight or "REJECT" in self.status:
-                            weight_item.setBackground(QBrush(QColor(color_red)))
-
-                            printed_item = QTableWidgetItem("WAITING (REJECT)")
-                            printed_item.setTextAlignment(Qt.AlignCenter)
-                            self.tableWidget_home.setItem(self.weight_counter, 3, printed_item)
-
-                        elif "NORMAL" in status_weight and "NORMAL" in self.status:
-                            weight_item.setBackground(QBrush(QColor(color_green)))
-
-                            printed_item = QTableWidgetItem("WAITING (NORMAL)")
-                            printed_item.setTextAlignment(Qt.AlignCenter)
-                            self.tableWidget_home.setItem(self.weight_counter, 3, printed_item)
-
-                        self.tableWidget_home.setItem(self.weight_counter, 2, weight_item)
-                        self.tableWidget_home.setWordWrap(True)
-                        self.tableWidget_home.resizeRowsToContents()
-
-                        current_text = self.tableWidget_home.item(self.weight_counter, 0)
-                        current_text = current_text.text().replace("[W]", str(self.weight), 1)
-                        self.tableWidget_home.setItem(self.weight_counter, 0, QTableWidgetItem(current_text))
-
-                        # self.weight_counter +=1
-
-                        self.weight_processed = True
-                        self.weight_timer = now
-                        self.weight_status.setText("WEIGHT : MEASURE DONE")
-
-                elif not self.weight_processed and self.weight_counter>=self.length_counter:
-                    self.weight_status.setText("WEIGHT : ROW EMPTY")
+    def poll_sensors(self):
+        try:
+            self.update_length()
+            self.update_weight()
+            self.update_status()
+        except Exception as e:
+            print(f"Sensor read error: {e}")
+
+    def update_status(self):
+        if not self.station_active["length"]:
+            if self.PLC.connected:
+                self.length_status.setText("LENGTH : ONLINE")
+                self.length_status.setStyleSheet("""
+                    background-color: rgb(0, 170, 0);
+                    border-radius: 5px;
+                    border: none;
+                """)
             else:
-                if self.WEIGHT.connected:
-                    self.weight_status.setText("WEIGHT : ONLINE")
-                    self.weight_status.setStyleSheet("""
-                        background-color: rgb(0, 170, 0);
-                        border-radius: 5px;
-                        border: none;
-                    """)
-                else:
-                    self.weight_status.setText("WEIGHT : DISCONNECTED")
-                    self.weight_status.setStyleSheet("""
-                        background-color: rgb(255, 170, 0);
-                        border-radius: 5px;
-                        border: none;
-                    """)
-                    port = self.comboBox_com_2.currentText().split()[0]
-                    msg = self.WEIGHT.connect(port= port)
-                    print(msg)
-                self.weight_timer = now
-                self.weight_processed = False
-            
-            # WEIGHT sensor
-            printer_on = self.PLC.read_bit_I(byte=6, bit=4)
-            printer_on_2 = self.PLC.read_bit_I(byte=8, bit=2)
-            if printer_on or printer_on_2:
-                length_text = self.tableWidget_home.item(self.printer_counter, 1)
-                weight_text = self.tableWidget_home.item(self.printer_counter, 2)
-
-                if now - self.printer_timer >= 2 and not self.printer_processed and length_text and weight_text:
-                    status_print = self.tableWidget_home.item(self.printer_counter, 3)
-                    if status_print:
-                        status_print = status_print.text()
-                        result = status_print.split('(')[1].strip(')')
-                        self.printer(result)
-
-                        if "REJECT" == result:
-                            printed_item = QTableWidgetItem("REJECT")
-                            printed_item.setTextAlignment(Qt.AlignCenter)
-                            printed_item.setBackground(QBrush(QColor(color_red)))
-                            self.tableWidget_home.setItem(self.printer_counter, 3, printed_item)
-                        elif "NORMAL" == result:
-                            printed_item = QTableWidgetItem("NORMAL")
-                            printed_item.setTextAlignment(Qt.AlignCenter)
-                            printed_item.setBackground(QBrush(QColor(color_green)))
-                            self.tableWidget_home.setItem(self.printer_counter, 3, printed_item)
-
-                    self.printer_counter+=1
-                    self.printer_processed = True
-                    self.printer_timer = now
+                self.length_status.setText("LENGTH : DISCONNECTED")
+                self.length_status.setStyleSheet("""
+                    background-color: rgb(255, 170, 0);
+                    border-radius: 5px;
+                    border: none;
+                """)
+
+        if not self.station_active["weight"]:
+            if self.WEIGHT.connected:
+                self.weight_status.setText("WEIGHT : ONLINE")
+                self.weight_status.setStyleSheet("""
+                    background-color: rgb(0, 170, 0);
+                    border-radius: 5px;
+                    border: none;
+                """)
             else:
-                self.printer_timer = now
-                self.printer_processed = False
+                self.weight_status.setText("WEIGHT : DISCONNECTED")
+                self.weight_status.setStyleSheet("""
+                    background-color: rgb(255, 170, 0);
+                    border-radius: 5px;
+                    border: none;
+                """)
 
-        except Exception as e:
-            print(f"Sensor read error: {e}")
+    def on_pipe_event(self, station, state, pipe):
+        if station == "length":
+            self.length_status.setText(f"LENGTH : {state}")
+            if pipe is not None:
+                # Move the highlight to the pipe just measured
+                previous, self.highlighted = self.highlighted, pipe
+                self.home_model.refresh(previous, HomeTableModel.TEXT, HomeTableModel.TEXT)
+                self.home_model.refresh(pipe)
+        elif station == "weight":
+            self.weight_status.setText(f"WEIGHT : {state}")
+            self.lineEdit_weight.setText(f"{self.weight} {self.weight_unit}")
+            self.home_model.refresh(pipe)
+        elif station == "printer":
+            self.home_model.refresh(pipe, HomeTableModel.STATUS, HomeTableModel.STATUS)
+            if state == "ERROR":
+                QMessageBox.critical(self, "Error", f"An error occurred while printing pipe {pipe.no}")
 
     def connect_signals(self):
         # Home tab signals
@@ -452,6 +331,8 @@ class PrintingSystem(QtWidgets.QMainWindow):
         # History tab signals
         self.pushButton_open.clicked.connect(lambda: open_file(self))
         self.pushButton_export.clicked.connect(lambda: export_to_excel(self))
+        self.lineEdit_search.returnPressed.connect(lambda: search_history(self))
+        self.lineEdit_search.textChanged.connect(lambda text: text or search_history(self))
         
         # Combo box changes
         self.comboBox_weight.currentTextChanged.connect(self.update_weight_unit)
@@ -471,6 +352,7 @@ class PrintingSystem(QtWidgets.QMainWindow):
 
         self.comboBox_length.setCurrentText(self.config["length_unit"])
         self.comboBox_weight.setCurrentText(self.config["weight_unit"])
+        self.comboBox_type.setCurrentText(self.config.get("pipe_type", "5CT"))
 
         self.lineEdit_weight.setText(f"{self.weight} {self.weight_unit}")
         self.lineEdit_length.setText(f"{self.length} {self.length_unit}")
@@ -491,38 +373,20 @@ class PrintingSystem(QtWidgets.QMainWindow):
     def update_WT(self):
         self.settings_changed()
     
-    def highlight_row_by_counter(self):    
-        row = self.length_counter
-
-        item = self.tableWidget_home.item(row-1, 0)
-        if item:
-            item.setTextAlignment(Qt.AlignCenter)
-            item.setBackground(QBrush(QColor("white")))
-
-        # Now apply highlight and bold to the desired row
-        item = self.tableWidget_home.item(row, 0)
-        if item:
-            item.setTextAlignment(Qt.AlignCenter)
-            item.setBackground(QBrush(QColor(color_green)))  # gold color
-
     def on_cell_changed(self, row, column):
         # new_value = self.tableWidget_input.item(row, column).text()
         # print(f"Cell ({row}, {column}) changed to: {new_value}")
 
-        values = []
-        for col in range(self.tableWidget_input.columnCount()):
-            item = self.tableWidget_input.item(row, col)
-            text = item.text() if item else ""
-            values.append(text)
-
-        #Mengubah Space / Spasi
-        combined_text = f"{values[1]}      {values[2]}  [L]{self.length_unit}  [W]{self.weight_unit}  {values[3]}  {values[4]}  {values[5]}"
+        values = self.input_model.row_values(row)
 
         # Update the first column (Printing Text) of tableWidget_home
-        self.tableWidget_home.setItem(row, 0, QtWidgets.QTableWidgetItem(combined_text))
-        item = self.tableWidget_home.item(row, 0)
-        if item:
-            item.setTextAlignment(Qt.AlignCenter)
+        with self.engine.lock:
+            self.home_model.set_template(row, *self.engine.pipe_entry(values))
+
+    def reload_pipes(self):
+        """Whole work order replaced (InputTableModel.load): rebuild the pipeline from it"""
+        with self.engine.lock:
+            self.home_model.load([self.engine.pipe_entry(values) for values in self.input_model.iter_rows()])
     
     def settings_changed(self):
         self.pushButton_savesettings.setText("Save Changes")
@@ -549,20 +413,20 @@ class PrintingSystem(QtWidgets.QMainWindow):
         )
         if reply == QMessageBox.Yes:
             # Update weight unit
-            self.weight_unit = self.comboBox_weight.currentText().split("(")[1].strip(")")
-            self.lineEdit_weight.setText(f"{self.weight} {self.weight_unit}")
             self.config["weight_unit"] = self.comboBox_weight.currentText()
+            self.engine.apply_config()
+            self.lineEdit_weight.setText(f"{self.weight} {self.weight_unit}")
             print(f"Updating Weight Unit to {self.weight_unit}")
             self.save_config()
             #Update length unit
-            self.length_unit = self.comboBox_length.currentText().split("(")[1].strip(")")
-            self.lineEdit_length.setText(f"{self.length} {self.length_unit}")
             self.config["length_unit"] = self.comboBox_length.currentText()
+            self.engine.apply_config()
+            self.lineEdit_length.setText(f"{self.length} {self.length_unit}")
             print(f"Updating Length Unit to {self.length_unit}")
             self.save_config()
             #Update Pipe Type
-            self.pipe_type = self.comboBox_type.currentText()
             self.config["pipe_type"] = self.comboBox_type.currentText()
+            self.engine.apply_config()
             print(f"Updating Pipe Type Unit to {self.pipe_type}")
             #Update Length Limit
             try:
@@ -603,15 +467,15 @@ class PrintingSystem(QtWidgets.QMainWindow):
     
     def load_settings(self):
         # Update weight unit
-        self.weight_unit = self.comboBox_weight.currentText().split("(")[1].strip(")")
-        self.lineEdit_weight.setText(f"{self.weight} {self.weight_unit}")
         self.config["weight_unit"] = self.comboBox_weight.currentText()
+        self.engine.apply_config()
+        self.lineEdit_weight.setText(f"{self.weight} {self.weight_unit}")
         print(f"Updating Weight Unit to {self.weight_unit}")
         self.save_config()
         #Update length unit
-        self.length_unit = self.comboBox_length.currentText().split("(")[1].strip(")")
-        self.lineEdit_length.setText(f"{self.length} {self.length_unit}")
         self.config["length_unit"] = self.comboBox_length.currentText()
+        self.engine.apply_config()
+        self.lineEdit_length.setText(f"{self.length} {self.length_unit}")
         print(f"Updating Length Unit to {self.length_unit}")
         self.save_config()
         #Update Length Limit
@@ -663,135 +527,78 @@ class PrintingSystem(QtWidgets.QMainWindow):
         """Update the pipe type based on combo box selection"""
         self.settings_changed()
             
+    def set_connect_button(self, button, text, online):
+        r, g = (0, 170) if online else (255, 170)
+        button.setText(text)
+        button.setStyleSheet(f"""
+            QPushButton{{
+                background-color: rgb({r}, {g}, 0);
+                border-radius: 10px;
+            }}
+            QPushButton:hover{{
+                background-color: rgb({r}, {g + 20}, 0);
+            }}
+            QPushButton:pressed{{
+                background-color: rgb({r}, {g + 40}, 0);
+            }}
+        """)
+
+    def on_device_state(self, name, state, message):
+        button = {
+            "printer": self.pushButton_connect_1,
+            "weight": self.pushButton_connect_2,
+            "plc": self.pushButton_connect_3,
+        }[name]
+        print(f"{name.upper()} : {state} {message}")
+
+        if state == ONLINE:
+            self.set_connect_button(button, "Connected", online=True)
+            self.manual_connect.discard(name)
+            params = self.supervisor.watches[name].params if self.supervisor.is_watched(name) else {}
+            if name == "printer" and "port" in params:
+                self.config["printer_port"] = params["port"]
+            elif name == "weight" and "port" in params:
+                self.config["weight_port"] = params["port"]
+            elif name == "plc" and "ip" in params:
+                self.config["plc_ip"] = params["ip"]
+            self.save_config()
+        elif state == CONNECTING:
+            self.set_connect_button(button, "Connecting...", online=False)
+        elif state == OFFLINE:
+            self.set_connect_button(button, "Reconnecting...", online=False)
+            # Only a connect the user asked for gets a dialog; retries stay quiet
+            if name in self.manual_connect:
+                self.manual_connect.discard(name)
+                QMessageBox.critical(self, "Connection Failed", message)
+        elif state == STOPPED:
+            self.set_connect_button(button, "Connect", online=False)
+
+        self.update_status()
+
     def connect_printer(self):
-        if self.EMARK.connected:
-            self.EMARK.close()
+        if self.supervisor.is_watched("printer"):
+            self.supervisor.release("printer")
             self.printer_connected = False
-            self.pushButton_connect_1.setText("Connect")
-            self.pushButton_connect_1.setStyleSheet("""
-                QPushButton{
-                    background-color: rgb(255, 170, 0);
-                    border-radius: 10px;
-                }
-                QPushButton:hover{
-                    background-color: rgb(255, 190, 0);
-                }
-                QPushButton:pressed{
-                    background-color: rgb(255, 210, 0);
-                }
-            """)
         else:
             port = self.comboBox_com_1.currentText().split()[0]
-            msg = self.EMARK.connect(port= port)
-            if self.EMARK.connected:
-                self.pushButton_connect_1.setText("Connected")
-                self.pushButton_connect_1.setStyleSheet("""
-                    QPushButton{
-                        background-color: rgb(0, 170, 0);
-                        border-radius: 10px;
-                    }
-                    QPushButton:hover{
-                        background-color: rgb(0, 190, 0);
-                    }
-                    QPushButton:pressed{
-                        background-color: rgb(0, 210, 0);
-                    }
-                """)
+            self.manual_connect.add("printer")
+            self.engine.watch_printer(port)
 
-                self.config["printer_port"] = port
-                self.save_config()
-                self.EMARK.clear_text()
-            else:
-                QMessageBox.critical(self, "Connection Failed", msg)
-    
     def connect_weight(self):
-        if self.WEIGHT.connected:
-            self.WEIGHT.close()
-            self.pushButton_connect_2.setText("Connect")
-            self.pushButton_connect_2.setStyleSheet("""
-                QPushButton{
-                    background-color: rgb(255, 170, 0);
-                    border-radius: 10px;
-                }
-                QPushButton:hover{
-                    background-color: rgb(255, 190, 0);
-                }
-                QPushButton:pressed{
-                    background-color: rgb(255, 210, 0);
-                }
-            """)
+        if self.supervisor.is_watched("weight"):
+            self.supervisor.release("weight")
         else:
             port = self.comboBox_com_2.currentText().split()[0]
-            msg = self.WEIGHT.connect(port= port)
-            if self.WEIGHT.connected:
-                self.pushButton_connect_2.setText("Connected")
-                self.pushButton_connect_2.setStyleSheet("""
-                    QPushButton{
-                        background-color: rgb(0, 170, 0);
-                        border-radius: 10px;
-                    }
-                    QPushButton:hover{
-                        background-color: rgb(0, 190, 0);
-                    }
-                    QPushButton:pressed{
-                        background-color: rgb(0, 210, 0);
-                    }
-                """)
-                self.weight_status.setText("STATUS : ONLINE")
-                self.weight_status.setStyleSheet("""
-                    background-color: rgb(0, 170, 0);
-                    border-radius: 5px;
-                    border: none;
-                """)
-                self.config["weight_port"] = port
-                self.save_config()
-            else:
-                QMessageBox.critical(self, "Connection Failed", msg)
+            self.manual_connect.add("weight")
+            self.engine.watch_weight(port)
 
     def connect_PLC(self):
-        if self.PLC.connected:
-            self.PLC.close()
-            self.pushButton_connect_3.setText("Connect")
-            self.pushButton_connect_3.setStyleSheet("""
-                QPushButton{
-                    background-color: rgb(255, 170, 0);
-                    border-radius: 10px;
-                }
-                QPushButton:hover{
-                    background-color: rgb(255, 190, 0);
-                }
-                QPushButton:pressed{
-                    background-color: rgb(255, 210, 0);
-                }
-            """)
+        if self.supervisor.is_watched("plc"):
+            self.supervisor.release("plc")
         else:
             self.ip_address = self.lineEdit_IP.text()
-            msg = self.PLC.connect(ip= self.ip_address)
-            if self.PLC.connected:
-                self.pushButton_connect_3.setText("Connected")
-                self.pushButton_connect_3.setStyleSheet("""
-                    QPushButton{
-                        background-color: rgb(0, 170, 0);
-                        border-radius: 10px;
-                    }
-                    QPushButton:hover{
-                        background-color: rgb(0, 190, 0);
-                    }
-                    QPushButton:pressed{
-                        background-color: rgb(0, 210, 0);
-                    }
-                """)
-                self.length_status.setText("STATUS : ONLINE")
-                self.length_status.setStyleSheet("""
-                    background-color: rgb(0, 170, 0);
-                    border-radius: 5px;
-                    border: none;
-                """)
-
-                self.config["plc_ip"] = self.ip_address
-                self.save_config()
-            else:
-                QMessageBox.critical(self, "Connection Failed", msg)
+            self.manual_connect.add("plc")
+            self.engine.watch_plc(self.ip_address)
 
     def check_setup(self):
         if not self.EMARK.connected:
@@ -804,84 +611,25 @@ class PrintingSystem(QtWidgets.QMainWindow):
             QMessageBox.warning(self, "PLC Not Connected", "Please connect to the PLC first")
             return
     
-    def check_length(self, length):
-        # Determine status
-        print(f"Minimum Length: {self.config['min_length']}")
-        status_length = "NORMAL"
-        if length/1000 < self.config["min_length"] * self.length_factor:
-            status_length = "UNDERLENGTH"
-        
-        return status_length
-    
-    def check_weight(self, weight, length):
-        print(f"OD: {self.config['OD']} WT: {self.config['WT']}")
-        thr_weight = (self.config["OD"] - self.config["WT"]) * self.config["WT"] * length/1000 / self.length_factor * 0.02466
-        if self.pipe_type == "5CT":
-            self.config["min_weight"] = thr_weight - (thr_weight * 0.035)
-            self.config["max_weight"] = thr_weight + (thr_weight * 0.06)
-        elif self.pipe_type == "5L":
-            self.config["min_weight"] = thr_weight - (thr_weight * 0.035)
-            self.config["max_weight"] = thr_weight + (thr_weight * 0.1)
-        else:
-            print("Failed to choose pipe type!")
-
-        print(f"WEIGHT = {weight} | THR = {thr_weight * self.weight_factor} | MIN = {self.config['min_weight'] * self.weight_factor} | MAX = {self.config['max_weight'] * self.weight_factor}")
-
-        # Determine status
-        status_weight = "NORMAL"
-        if weight < self.config["min_weight"] * self.weight_factor:
-            status_weight = "UNDERWEIGHT"
-        elif weight > self.config["max_weight"] * self.weight_factor:
-            status_weight = "OVERWEIGHT"
-
-        return status_weight
-
-    def printer(self, status):
-        try:
-            output_text = self.tableWidget_home.item(self.printer_counter, 0)
-            length_text = self.tableWidget_home.item(self.printer_counter, 1)
-            weight_text = self.tableWidget_home.item(self.printer_counter, 2)
-            no = self.tableWidget_input.item(self.printer_counter, 0)
-            if output_text:
-                if status == "NORMAL":
-                    response = None
-                    font_size_list = {"5x5": 0x05, "7x5": 0x08, "9x6": 0x09, "12x8": 0x0C, "16x10": 0x10}
-    
-                    # Get the selected text from comboBox and look it up in the dict
-                    selected_font = self.comboBox_font.currentText()
-                    font_size = font_size_list.get(selected_font, 0x0C)  # default to "12x8" if not found
-                    print("font", font_size)
-
-                    for i in range(6):
-                        response = self.EMARK.send_text(output_text.text(), 
-                                                template_num=1, 
-                                                font_height=font_size,  # 16 dot matrix
-                                                x_pos=0, 
-                                                y_pos=0)
-                        if response:
-                            print(f"Response: {response}")
-                            break
-                        else:
-                            print(f"Retrying {i} : EMark Printer Not Connected or Error!")
-
-                    if response:
-                        print(f"Response: {response}")
-                    else:
-                        QMessageBox.warning(self, "Hardware Error", f"EMark Printer Not Connected or Error!")
-                elif status == "REJECT":
-                    self.EMARK.clear_text()
-
-                # Add to history (whether printed or rejected)
-                add_to_history(self, no.text(), length_text.text().replace("\n", " "), weight_text.text().replace("\n", " "), output_text.text(), status)
-            
-        except Exception as e:
-            print(e)
-            QMessageBox.critical(self, "Error", f"An error occurred: {str(e)}")
+    def update_font(self, text):
+        self.engine.font = FONT_SIZES.get(text, DEFAULT_FONT)  # default to "12x8" if not found
+
+    def on_log_flushed(self, path):
+        if self.history_model.is_showing(path):
+            self.history_model.refresh()
+        elif self.follow_log and os.path.basename(path) > os.path.basename(self.history_model.path):
+            # Midnight: the engine started the next daily log
+            self.lineEdit_path.setText(path)
+            self.history_model.load(path)
+
+    def on_print_done(self, job):
+        # The engine logs every job; only a marking that never reached the pipe needs the operator
+        if not job.ok and job.status == NORMAL:
+            QMessageBox.warning(self, "Hardware Error", f"EMark Printer Not Connected or Error!\nPipe {job.pipe_id} was not printed.")
 
 if __name__ == "__main__":
     from PyQt5.QtGui import QPixmap
     from PyQt5.QtWidgets import QSplashScreen
-    from PyQt5.QtCore import QTimer
 
     app = QtWidgets.QApplication(sys.argv)
 
@@ -0,0 +1,95 @@
+"""
+Per-pipe cost of the CSV log on the thread that records the pipe: save_to_csv
+(the app's writer before CsvLogWriter: stat + open + append + close every record)
+against CsvLogWriter.add (queue only; the writer thread keeps the day's file
+open) under each flush policy.
+
+Run from the GUI folder:  python -m bench.bench_csv_log --records 2000
+"""
+import argparse
+import csv
+import datetime
+import os
+import statistics
+import tempfile
+import time
+from lib.history import HISTORY_HEADERS, CsvLogWriter, FLUSH_RECORD, FLUSH_INTERVAL, FLUSH_SHUTDOWN
+
+ROW = ["17", "", "", "40.12 (NORMAL)", "1043.5 (NORMAL)",
+       "1ST API SPEC 5CT-2221      05-25 PE 7 26.00 K S P 4600 PSI D  40.12ft  1043.5lbs  HN 241B11000-1  WO 04-0475  17",
+       "NORMAL"]
+
+
+def save_to_csv(no, date, time, length_text, weight_text, output_text, status):
+    """The baseline: the per-row writer lib.history had before CsvLogWriter"""
+    current_time = datetime.datetime.now()
+    date_str = current_time.strftime("%Y-%m-%d")
+    csv_file = f"logs/{date_str}.csv"
+
+    file_exists = os.path.isfile(csv_file)
+
+    try:
+        with open(csv_file, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+
+            if not file_exists:
+                writer.writerow(HISTORY_HEADERS)
+
+            writer.writerow([
+                no,
+                date,
+                time,
+                length_text,
+                weight_text,
+                output_text,
+                status
+            ])
+    except Exception as e:
+        print(f"Error saving to CSV: {e}")
+
+
+def report(label, times, extra=""):
+    times.sort()
+    p99 = times[min(len(times) - 1, int(len(times) * 0.99))]
+    print(f"{label:<22} {statistics.mean(times) * 1e6:>9.1f} {p99 * 1e6:>9.1f}  {extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=2000)
+    args = parser.parse_args()
+    date = time.strftime("%Y-%m-%d")
+    row = ROW[:1] + [date, time.strftime("%H:%M:%S")] + ROW[3:]
+
+    print(f"{'writer':<22} {'mean us':>9} {'p99 us':>9}")
+    with tempfile.TemporaryDirectory() as folder:
+        cwd = os.getcwd()
+        os.chdir(folder)  # save_to_csv writes to logs/ under the working directory
+        try:
+            os.makedirs("logs")
+            times = []
+            for _ in range(args.records):
+                start = time.perf_counter()
+                save_to_csv(*row)
+                times.append(time.perf_counter() - start)
+            report("save_to_csv", times)
+        finally:
+            os.chdir(cwd)
+
+        for policy in (FLUSH_RECORD, FLUSH_INTERVAL, FLUSH_SHUTDOWN):
+            writer = CsvLogWriter(os.path.join(folder, policy), flush=policy, interval=0.5)
+            writer.start()
+            times = []
+            for _ in range(args.records):
+                start = time.perf_counter()
+                writer.add(row)
+                times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            writer.stop()
+            drained = time.perf_counter() - start
+            report(f"CsvLogWriter {policy}", times,
+                   f"max depth {writer.max_pending}, {writer.flushes} flushes, drained in {drained * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Micro-benchmark of EMARK frame encoding: the original per-call bytes
+concatenation / per-character remap / reduce(lambda) path against
+lib.emark_codec. Both must produce identical frames.
+
+Run from the GUI folder:  python -m bench.bench_emark_codec --number 20000
+"""
+import argparse
+import timeit
+from functools import reduce
+from lib.emark_codec import CHAR_REMAP, FrameEncoder, checksum, decode_frame, decode_text
+
+TEXT = "1ST API 5CT-2221 LOGO 05-25 PE 7 26.00 K S P 4600 PSI D   402.1 FT 1037 LBS HN  241B11000-1  WO 04-0475"
+
+
+def legacy_frame(text, template_num=1, font_height=0x10, x_pos=0, y_pos=0, char_spacing=5, dest=0x01, src=0x00):
+    """EMARKPrinter.send_text + send_command frame building before the codec"""
+    data_bytes = ''.join(CHAR_REMAP.get(c, c) for c in text).encode('ascii')
+    font_attrs = bytes([font_height, len(text), (x_pos >> 8) & 0xFF, x_pos & 0xFF, y_pos, char_spacing])
+    frame_data = bytes([template_num]) + font_attrs + data_bytes
+    frame_length = len(frame_data) + 1
+    frame = bytes([dest, src, 0xD3, (frame_length >> 8) & 0xFF, frame_length & 0xFF]) + frame_data
+    return frame + bytes([reduce(lambda x, y: x ^ y, frame)])
+
+
+def legacy_decode(raw):
+    checksum_ok = reduce(lambda x, y: x ^ y, raw[:-1]) == raw[-1]
+    data = raw[5:-1]
+    return checksum_ok, data[0], data[2], data[7:7 + data[2]]
+
+
+def run(label, func, number):
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    print(f"{label:<28} {seconds / number * 1e6:8.2f} us")
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    encoder = FrameEncoder()
+    for text in (TEXT, " " * 255, "A"):
+        assert bytes(encoder.text(text, 1, 0x10, 0, 0, 5)) == legacy_frame(text), "frames differ"
+    frame = legacy_frame(TEXT)
+    assert decode_text(decode_frame(frame).data).text == legacy_decode(frame)[3]
+
+    print(f"Frame: {len(frame)} bytes, {args.number} iterations, best of 5")
+    old = run("encode  legacy", lambda: legacy_frame(TEXT), args.number)
+    new = run("encode  codec", lambda: encoder.text(TEXT, 1, 0x10, 0, 0, 5), args.number)
+    print(f"{'':<28} {old / new:8.2f}x")
+    old = run("checksum reduce(lambda)", lambda: reduce(lambda x, y: x ^ y, frame), args.number)
+    new = run("checksum codec", lambda: checksum(frame), args.number)
+    print(f"{'':<28} {old / new:8.2f}x")
+    old = run("decode  legacy", lambda: legacy_decode(frame), args.number)
+    new = run("decode  codec", lambda: decode_text(decode_frame(frame).data), args.number)
+    print(f"{'':<28} {old / new:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
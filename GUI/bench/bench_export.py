@@ -0,0 +1,65 @@
+"""
+Excel export of a month of production: the original in-memory Workbook with a
+PatternFill built per cell, against lib.export.ExcelExport (write-only workbook,
+rows streamed from the logs, shared fills). Peak Python memory is traced with
+tracemalloc, so absolute times are slower than a real export.
+
+Run from the GUI folder:  python -m bench.bench_export --days 30 --per-day 800
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import openpyxl
+from openpyxl.styles import Font, PatternFill
+from bench.bench_history import write_logs
+from lib.export import ExcelExport, read_rows, STATUS
+from lib.history import HISTORY_HEADERS
+
+
+def legacy_export(sources, path):
+    """export_to_excel before lib.export, fed from the logs instead of the widget"""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Printing History"
+    sheet.append(HISTORY_HEADERS)
+    for cell in sheet[1]:
+        cell.font = Font(bold=True)
+    for row, row_data in enumerate(read_rows(sources)):
+        sheet.append(row_data)
+        status = row_data[STATUS]
+        if status != "OK":
+            fill_color = "FFFF00" if "WEIGHT" in status else "FFA500"
+            for cell in sheet[row + 2]:
+                cell.fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type="solid")
+    workbook.save(path)
+
+
+def measure(label, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<10} {elapsed:>8.1f} s {peak / 1e6:>10.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--per-day", type=int, default=800)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        write_logs(folder, args.days, args.per_day)
+        sources = sorted(os.path.join(folder, name) for name in os.listdir(folder))
+        print(f"{args.days * args.per_day} rows from {len(sources)} logs")
+        print(f"{'export':<10} {'time':>10} {'peak':>13}")
+        measure("legacy", lambda: legacy_export(sources, os.path.join(folder, "legacy.xlsx")))
+        measure("streaming", lambda: ExcelExport(sources, os.path.join(folder, "stream.xlsx")).export())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Per-pipe grading: LineEngine.check_length/check_weight before lib.grading
+(bounds recomputed and written into the config on every pipe; the three prints
+are left out here) against a cached Grade. Also checks that both grade every
+sample the same way.
+
+Run from the GUI folder:  python -m bench.bench_grading --pipes 200000
+"""
+import argparse
+import random
+import time
+from lib.grading import grade_for, WEIGHT_TOLERANCES
+from lib.history import LENGTH_FACTORS, WEIGHT_FACTORS
+
+
+def legacy_grade(config, pipe_type, length_unit, weight_unit, length, weight):
+    length_factor = LENGTH_FACTORS[length_unit]
+    weight_factor = WEIGHT_FACTORS[weight_unit]
+    status_length = "NORMAL"
+    if length/1000 < config["min_length"] * length_factor:
+        status_length = "UNDERLENGTH"
+    thr_weight = (config["OD"] - config["WT"]) * config["WT"] * length/1000 / length_factor * 0.02466
+    under, over = WEIGHT_TOLERANCES[pipe_type]
+    config["min_weight"] = thr_weight - (thr_weight * under)
+    config["max_weight"] = thr_weight + (thr_weight * over)
+    status_weight = "NORMAL"
+    if weight < config["min_weight"] * weight_factor:
+        status_weight = "UNDERWEIGHT"
+    elif weight > config["max_weight"] * weight_factor:
+        status_weight = "OVERWEIGHT"
+    return status_length, status_weight
+
+
+def cached_grade(config, pipe_type, length_unit, weight_unit, length, weight):
+    grade = grade_for(pipe_type, config["OD"], config["WT"], config["min_length"], length_unit, weight_unit)
+    return grade.grade_length(length), grade.grade_weight(weight, length)
+
+
+def samples(count):
+    rng = random.Random(1)
+    for _ in range(count):
+        length_unit = rng.choice(list(LENGTH_FACTORS))
+        weight_unit = rng.choice(list(WEIGHT_FACTORS))
+        od, wt = rng.choice([(177.8, 10.36), (139.7, 7.72), (244.5, 11.99)])
+        length_m = rng.uniform(10, 13)
+        weight_kg = (od - wt) * wt * 0.02466 * length_m * rng.uniform(0.93, 1.13)
+        yield ({"OD": od, "WT": wt, "min_length": 11.51}, rng.choice(list(WEIGHT_TOLERANCES)), length_unit, weight_unit,
+               round(length_m * 1000 * LENGTH_FACTORS[length_unit], 2), round(weight_kg * WEIGHT_FACTORS[weight_unit], 2))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pipes", type=int, default=200000)
+    args = parser.parse_args()
+    pipes = list(samples(args.pipes))
+
+    results = {}
+    for label, grade in (("legacy", legacy_grade), ("cached", cached_grade)):
+        start = time.perf_counter()
+        results[label] = [grade(*pipe) for pipe in pipes]
+        print(f"{label:<8} {(time.perf_counter() - start) / len(pipes) * 1e6:>6.2f} us / pipe")
+    differ = sum(a != b for a, b in zip(results["legacy"], results["cached"]))
+    graded = {status: sum(weight == status for _, weight in results["cached"]) for status in ("NORMAL", "UNDERWEIGHT", "OVERWEIGHT")}
+    print(f"{differ} of {len(pipes)} pipes graded differently; {graded}")
+
+
+if __name__ == "__main__":
+    main()
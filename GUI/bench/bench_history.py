@@ -0,0 +1,101 @@
+"""
+History lookups over a year of production: scanning every daily CSV log (what
+a search by heat number, work order or pipe number needed before) against the
+indexed SQLite store, after importing the same logs with HistoryStore.import_logs.
+Searches (HistoryStore.search) return at most 500 entries; the scan counts every match.
+
+Run from the GUI folder:  python -m bench.bench_history --days 365 --per-day 800
+"""
+import argparse
+import csv
+import datetime
+import glob
+import os
+import random
+import tempfile
+import time
+from lib.history import HISTORY_HEADERS, HistoryStore
+
+TEMPLATE = "1ST API SPEC 5CT-2221      05-25 PE 7 26.00 K S P 4600 PSI D  {length}ft  {weight}lbs  HN {hn}  WO {wo}  {pipe}"
+
+
+def write_logs(folder, days, per_day):
+    rng = random.Random(1)
+    start = datetime.date(2025, 1, 1)
+    for day in range(days):
+        date = start + datetime.timedelta(days=day)
+        hn = f"24{day // 7:03d}B{rng.randint(1000, 9999)}"  # A heat lasts about a week
+        wo = f"{date.month:02d}-{day // 3:04d}"
+        with open(os.path.join(folder, f"{date}.csv"), "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(HISTORY_HEADERS)
+            for i in range(per_day):
+                length = round(rng.uniform(38, 42), 2)
+                weight = round(rng.uniform(1000, 1100), 2)
+                status = "NORMAL" if rng.random() > 0.05 else "REJECT"
+                seconds = 6 * 3600 + i * 60
+                writer.writerow([str(i + 1), str(date), f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}",
+                                 f"{length} (NORMAL)", f"{weight} ({'NORMAL' if status == 'NORMAL' else 'OVERWEIGHT'})",
+                                 TEMPLATE.format(length=length, weight=weight, hn=hn, wo=wo, pipe=f"{day}-{i + 1}"), status])
+
+
+def scan_csv(folder, needle):
+    """Every log opened and scanned, as a manual search over the CSV files does"""
+    found = []
+    for path in sorted(glob.glob(os.path.join(folder, "*.csv"))):
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader)
+            found.extend(row for row in reader if needle in row[5])
+    return found
+
+
+def timed(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--per-day", type=int, default=800)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        write_logs(folder, args.days, args.per_day)
+        store = HistoryStore(os.path.join(folder, "history.db"))
+        start = time.perf_counter()
+        imported = store.import_logs(folder)
+        print(f"Imported {sum(imported.values())} entries from {len(imported)} logs in {time.perf_counter() - start:.1f} s")
+
+        sample = store.query(limit=1, offset=store.count() // 2)[0]
+        lookups = [
+            ("heat number", "HN " + sample.heat_number, {"heat_number": sample.heat_number}),
+            ("work order", "WO " + sample.work_order, {"work_order": sample.work_order}),
+            ("pipe number", sample.pipe_number, {"pipe_number": sample.pipe_number}),
+        ]
+        print(f"{'lookup':<20} {'rows':>6} {'csv scan ms':>12} {'sqlite ms':>10}")
+        for label, needle, filters in lookups:
+            scan, rows = timed(lambda: scan_csv(folder, needle), repeat=1)
+            indexed, entries = timed(lambda: store.query(**filters))
+            print(f"{label:<20} {len(entries):>6} {scan * 1000:>12.1f} {indexed * 1000:>10.2f}")
+
+        # The History tab's search box: any part of the three numbers, newest first
+        for needle in (sample.heat_number, sample.heat_number[:5], sample.heat_number[3:8], sample.heat_number[:2],
+                       sample.work_order, sample.pipe_number):
+            scan, rows = timed(lambda: scan_csv(folder, needle), repeat=1)
+            indexed, entries = timed(lambda: store.search(needle))
+            print(f"{'search ' + needle:<20} {len(entries):>6} {scan * 1000:>12.1f} {indexed * 1000:>10.2f}")
+
+        day = datetime.datetime.strptime(sample.date, "%Y-%m-%d").timestamp()
+        indexed, counts = timed(lambda: store.summary(since=day, until=day + 86400))
+        print(f"{'day summary':<20} {sum(counts.values()):>6} {'':>12} {indexed * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+End-to-end acquisition benchmark against the local PLC simulator.
+Drives pipes through the length, weight and printer sensors and measures how
+long PLCAcquisition + EdgeDetector take to report each station edge.
+
+Run from the GUI folder:  python -m bench.bench_pipeline --count 50 --rate 4
+"""
+import argparse
+import statistics
+import threading
+import time
+from lib.PLC import PLCReader
+from lib.acquisition import PLCAcquisition
+from lib.edges import EdgeDetector, RISING
+from lib.simulator import PLCSimulator
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=1102)
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=4.0, help="Pipes per second")
+    parser.add_argument("--on-time", type=float, default=0.1)
+    parser.add_argument("--travel", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.05, help="Random arrival delay (s)")
+    parser.add_argument("--interval", type=float, default=0.02, help="PLC poll period (s)")
+    args = parser.parse_args()
+
+    sim = PLCSimulator(port=args.port).start()
+    plc = PLCReader()
+    plc.connect(ip="127.0.0.1", port=args.port)
+
+    # Short pulses: no minimum-on time, just debounce
+    detectors = [EdgeDetector(name, spec["tags"], spec.get("mode", "and"), debounce=0.0)
+                 for name, spec in sim.stations.items()]
+    acquisition = PLCAcquisition(plc, interval=args.interval, detectors=detectors)
+
+    received = {}
+    lock = threading.Lock()
+
+    def on_event(event):
+        if event.edge == RISING:
+            with lock:
+                received.setdefault(event.station, []).append((event.timestamp, time.monotonic()))
+
+    acquisition.add_event_listener(on_event)
+
+    read_times = []
+    original_read = plc.read_snapshot
+
+    def timed_read():
+        start = time.perf_counter()
+        snapshot = original_read()
+        read_times.append(time.perf_counter() - start)
+        return snapshot
+
+    plc.read_snapshot = timed_read
+    acquisition.start()
+
+    applied = sim.run_pipes(args.count, args.rate, on_time=args.on_time, travel=args.travel, jitter=args.jitter)
+    time.sleep(args.on_time + 0.2)
+    acquisition.stop()
+    sim.stop()
+
+    started = applied[0][3]
+    finished = applied[-1][3]
+    print(f"Pipes: {args.count} at {args.rate}/s, poll {args.interval * 1000:.0f} ms")
+    print(f"read_snapshot: {len(read_times)} reads, "
+          f"mean {statistics.mean(read_times) * 1000:.2f} ms, p99 {percentile(read_times, 99) * 1000:.2f} ms, "
+          f"{len(plc.read_plan)} request(s) per read")
+    for station in sim.stations:
+        rises = [t for i, s, edge, t in applied if s == station and edge == "rising"]
+        events = received.get(station, [])
+        latencies = [delivered - real for (_, delivered), real in zip(events, rises)]
+        print(f"{station:<8} detected {len(events)}/{len(rises)} pipes, "
+              f"latency mean {statistics.mean(latencies) * 1000 if latencies else 0:.1f} ms, "
+              f"p99 {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"Throughput: {args.count / (finished - started):.2f} pipes/s")
+
+
+if __name__ == "__main__":
+    main()
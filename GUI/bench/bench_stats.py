@@ -0,0 +1,63 @@
+"""
+Production statistics of one work order: recomputed from every daily CSV log
+(what building the numbers by hand amounts to) against ProductionStats, which
+pays a constant cost per recorded pipe and answers reads from its arrays.
+
+Run from the GUI folder:  python -m bench.bench_stats --days 90 --per-day 800
+"""
+import argparse
+import csv
+import glob
+import os
+import statistics
+import tempfile
+import time
+from bench.bench_history import write_logs, timed
+from lib.history import HistoryStore, entry_from_row
+from lib.stats import ProductionStats
+
+
+def rescan(folder, work_order):
+    """Parse every log and compute the work order's numbers from scratch"""
+    entries = []
+    for path in sorted(glob.glob(os.path.join(folder, "*.csv"))):
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader)
+            entries.extend(entry for entry in map(entry_from_row, reader) if entry and entry.work_order == work_order)
+    lengths = [entry.length for entry in entries]
+    return len(entries), statistics.mean(lengths), statistics.stdev(lengths)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--per-day", type=int, default=800)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        write_logs(folder, args.days, args.per_day)
+        store = HistoryStore(os.path.join(folder, "history.db"))
+        store.import_logs(folder)
+        entries = store.query()
+
+        stats = ProductionStats()
+        start = time.perf_counter()
+        stats.add_many(entries)
+        update = (time.perf_counter() - start) / len(entries)
+        work_order = entries[len(entries) // 2].work_order
+
+        scan, (count, mean, std) = timed(lambda: rescan(folder, work_order), repeat=1)
+        read, summary = timed(lambda: stats.get("work_order", work_order, "ft", "lbs"))
+        shifts, _ = timed(lambda: stats.snapshot("shift", "ft", "lbs"))
+        print(f"{len(entries)} pipes, work order {work_order}: {count} pipes, length {mean:.3f} ± {std:.3f} ft"
+              f" (running: {summary['length']['mean']:.3f} ± {summary['length']['std']:.3f})")
+        print(f"rescan of the logs     {scan * 1000:>9.1f} ms")
+        print(f"running update / pipe  {update * 1e6:>9.1f} us")
+        print(f"running read           {read * 1000:>9.3f} ms")
+        label = f"all {len(stats.keys('shift'))} shifts"
+        print(f"{label:<22} {shifts * 1000:>9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
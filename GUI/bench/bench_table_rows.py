@@ -0,0 +1,77 @@
+"""
+Per-capture UI cost of the home table against the number of loaded rows.
+Each capture records a length for the next pipe and repaints, as
+PrintingSystem.measure_length does, with either the old full
+resizeRowsToContents() or the uniform fixed row height (set_uniform_rows).
+
+Run from the GUI folder:  python -m bench.bench_table_rows --rows 100 1000 5000 20000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication, QHeaderView, QTableView
+from lib.models import HomeTableModel, set_uniform_rows
+from lib.pipeline import PipeTracker
+
+TEMPLATE = "1ST API SPEC 5CT-2221      05-25 PE 7 26.00 K S P 4600 PSI D  [L]ft  [W]lbs  HN 241B11000-1  WO 04-0475"
+
+
+def make_view(rows, mode):
+    tracker = PipeTracker()
+    tracker.load([(str(i + 1), TEMPLATE) for i in range(rows)])
+    model = HomeTableModel(tracker)
+    view = QTableView()
+    view.setModel(model)
+    header = view.horizontalHeader()
+    header.setSectionResizeMode(QHeaderView.Stretch)
+    header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
+    if mode == "uniform":
+        set_uniform_rows(view, lines=2)
+    view.resize(1280, 600)
+    view.show()
+    return tracker, model, view
+
+
+def capture(app, tracker, model, view, mode):
+    previous = tracker.last_measured
+    pipe = tracker.record_length(12000.0, "NORMAL")
+    model.refresh(previous, HomeTableModel.TEXT, HomeTableModel.TEXT)
+    model.refresh(pipe)
+    if mode == "legacy":
+        view.setWordWrap(True)
+        view.resizeRowsToContents()
+    view.scrollTo(model.index(pipe.row, 0))
+    app.processEvents()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 5000, 20000])
+    parser.add_argument("--captures", type=int, default=30)
+    parser.add_argument("--modes", nargs="+", default=["legacy", "uniform"])
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    print(f"{'rows':>7} {'mode':<8} {'mean ms':>9} {'p95 ms':>9}")
+    for rows in args.rows:
+        for mode in args.modes:
+            tracker, model, view = make_view(rows, mode)
+            app.processEvents()
+            times = []
+            for _ in range(min(args.captures, rows)):
+                start = time.perf_counter()
+                capture(app, tracker, model, view, mode)
+                times.append(time.perf_counter() - start)
+            times.sort()
+            p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+            print(f"{rows:>7} {mode:<8} {statistics.mean(times) * 1000:>9.2f} {p95 * 1000:>9.2f}")
+            view.close()
+
+
+if __name__ == "__main__":
+    main()
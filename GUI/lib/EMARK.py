@@ -1,40 +1,54 @@
 import serial
+import threading
 import time
-from functools import reduce
+from collections import namedtuple
 import random
+from lib.emark_codec import (ACK_OK, ACK_STATUS_TEXT, CMD_TEXT, HEADER_SIZE, FrameEncoder, checksum,
+                             decode_status, remap)
+
+RESPONSE_TIMEOUT = 0.2  # 200ms reply window as per protocol
+
+class EMARKResponse(namedtuple("EMARKResponse", ["command", "status", "data", "checksum_ok", "elapsed", "raw"])):
+    """
+    Decoded reply frame [dest, src, cmd, len_hi, len_lo, data..., xor].
+    :param status: First data byte (ACK_*), or None for an empty reply
+    :param elapsed: Seconds from sending the command to the complete reply
+    Truthy only for a well-formed reply that reports success.
+    """
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.checksum_ok and self.status in (None, ACK_OK)
+
+    @property
+    def status_text(self):
+        return ACK_STATUS_TEXT.get(self.status, f"STATUS {self.status:#04x}" if self.status is not None else "EMPTY")
+
+    def __bool__(self):
+        return self.ok
+
+    def hex(self, *args):
+        return self.raw.hex(*args)
+
+    def __str__(self):
+        return f"{self.command:02X} {self.status_text} in {self.elapsed * 1000:.1f} ms"
 
-CHAR_REMAP = {
-    '~': "|",
-    '`': '_',
-    '@': '"',
-    '^': '&',
-    '&': "'",
-    '*': '(',
-    '(': ')',
-    '_': '}',
-    '-': '+',
-    '+': ',',
-    '{': '.',
-    '[': ';',
-    ']': '<',
-    '}': '/',
-    '\\': '>',
-    ';': '@',
-    ':': '?',
-    "'": '&',
-    ',': '\\',
-    '.': '`',
-    '<': ']',
-    '>': '^',
-    '/': '*',
-    '?': '{'
-}
 
 class EMARKPrinter:
     def __init__(self):
         self.dest_addr = 0x01  # Default destination address
         self.src_addr = 0x00   # Default source address (PC)
         self.connected = False
+        self.serial = None
+        self.lock = threading.RLock()  # Port is shared with DeviceSupervisor
+        self.clear_mode = "empty"  # See clear_text
+        # Command byte that makes a stored template the printed one. The D3/A1/A5
+        # subset used here has none, so it is site configuration; None disables
+        # double-buffered templates (everything prints from template 1)
+        self.select_command = None
+        self.active_template = 1
+        self.encoder = FrameEncoder(self.dest_addr, self.src_addr)  # Used under self.lock
     
     def connect(self, port, baudrate = 57600):
         """
@@ -42,6 +56,12 @@ class EMARKPrinter:
         :param port: Serial port name (e.g., 'COM3' or '/dev/ttyUSB0')
         :param baudrate: Baud rate (default 57600)
         """
+        with self.lock:
+            return self._connect(port, baudrate)
+
+    def _connect(self, port, baudrate):
+        # A dropped port must be released before it can be opened again
+        self.close()
         try:
             self.serial = serial.Serial(
                 port=port,
@@ -62,61 +82,166 @@ class EMARKPrinter:
         # if self.connected:
         #     self.clear_text()
 
-    def clear_text(self):
-        print("Clearing Printer Text...")
-        spaces = " " * 255
-        for i in range(10):
-            response = self.send_text(spaces, 
-                                    template_num=1, 
-                                    font_height=0x10,  # 16 dot matrix
-                                    x_pos=i, 
-                                    y_pos=0,
-                                    char_spacing=i)
+    def clear_text(self, mode=None):
+        """
+        Blank the printed text
+        :param mode: "empty" sends one empty-template frame and falls back to spaces if the
+                     coder does not ack it; "spaces" overwrites with ten 255-space frames
+                     written back to back. Default: self.clear_mode
+        :return: True once the coder acked the clear
+        """
+        mode = mode or self.clear_mode
+        print(f"Clearing Printer Text ({mode})...")
+        if mode == "empty":
+            response = self.reset_current_template()
             if response:
-                print(f"Response: {response.hex()}")
+                return True
+            if response is False:
+                return False
+            print("Empty template not acknowledged, overwriting with spaces")
+
+        spaces = b" " * 255
+        frames = [(CMD_TEXT, bytes([self.active_template, 0x10, len(spaces), 0x00, i, 0x00, i]) + spaces) for i in range(10)]
+        responses = self.send_batch(frames)
+        return bool(responses) and all(responses)
+
+    def clear_text_async(self):
+        """Run clear_text on a background thread so the caller (GUI) never waits on the port"""
+        thread = threading.Thread(target=self.clear_text, name="EMARKClear", daemon=True)
+        thread.start()
+        return thread
         
     def calculate_checksum(self, data):
         """Calculate XOR checksum for the data"""
-        return reduce(lambda x, y: x ^ y, data)
+        return checksum(data)
     
-    def send_command(self, command_word, frame_data):
+    def _read_exact(self, size, deadline):
+        """Read exactly size bytes before deadline (time.monotonic()); None on timeout"""
+        data = bytearray()
+        while len(data) < size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            self.serial.timeout = remaining
+            data += self.serial.read(size - len(data))
+        return bytes(data)
+
+    def read_response(self, deadline):
+        """
+        Read one reply frame, returning as soon as it is complete
+        :param deadline: time.monotonic() after which the reply counts as lost
+        :return: EMARKResponse (elapsed relative to the call), or None on timeout
+        """
+        start = time.monotonic()
+        header = self._read_exact(HEADER_SIZE, deadline)
+        if header is None:
+            return None
+        length = (header[3] << 8) | header[4]
+        body = self._read_exact(length, deadline) if length else b""
+        if body is None:
+            print(f"EMARK reply truncated: expected {length} bytes after header {header.hex()}")
+            return None
+        raw = header + body
+        data = body[:-1]
+        checksum_ok = bool(body) and self.calculate_checksum(raw[:-1]) == raw[-1]
+        return EMARKResponse(
+            command=header[2],
+            status=decode_status(data),
+            data=data,
+            checksum_ok=checksum_ok,
+            elapsed=time.monotonic() - start,
+            raw=raw,
+        )
+
+    def _encoder(self):
+        """The shared FrameEncoder with the current addresses (call under self.lock)"""
+        self.encoder.dest = self.dest_addr
+        self.encoder.src = self.src_addr
+        return self.encoder
+
+    def build_frame(self, command_word, frame_data):
+        """[dest, src, cmd, len_hi, len_lo] + frame_data + XOR checksum, as a standalone copy"""
+        with self.lock:
+            return bytes(self._encoder().frame(command_word, frame_data))
+
+    def send_batch(self, commands, timeout=RESPONSE_TIMEOUT):
+        """
+        Write several frames back to back, then collect one reply per frame
+        :param commands: Iterable of (command_word, frame_data)
+        :param timeout: Seconds allowed per reply
+        :return: List of EMARKResponse/None in command order, or False if not connected
+        """
+        if not self.serial:
+            return False
+        frames = [self.build_frame(command_word, frame_data) for command_word, frame_data in commands]
+        responses = []
+        with self.lock:
+            try:
+                self.serial.reset_input_buffer()
+                start = time.monotonic()
+                self.serial.write(b"".join(frames))
+                for n in range(len(frames)):
+                    response = self.read_response(start + timeout * (n + 1))
+                    responses.append(response)
+                    if response is None:
+                        break
+            except serial.SerialException as e:
+                print(f"Serial Printer error: {e}")
+                self.connected = False
+                return False
+        responses += [None] * (len(frames) - len(responses))
+        failed = sum(1 for response in responses if not response)
+        if failed:
+            print(f"{failed}/{len(frames)} frames not acknowledged")
+        return responses
+
+    def send_command(self, command_word, frame_data, timeout=RESPONSE_TIMEOUT):
         """
-        Send a command to the printer
+        Send a command to the printer and wait for its reply frame
         :param command_word: Command byte
         :param frame_data: Data bytes (after frame length)
-        :return: Response from printer
+        :param timeout: Seconds to wait for the complete reply
+        :return: EMARKResponse, None if no reply arrived in time, False if not connected
         """
+        with self.lock:
+            return self.send_frame(self._encoder().frame(command_word, frame_data), timeout)
 
-        if not hasattr(self, 'serial'):
+    def send_frame(self, frame, timeout=RESPONSE_TIMEOUT):
+        """
+        Write one encoded frame and wait for its reply (see send_command)
+        :param frame: Complete frame, e.g. from self.encoder
+        """
+        if not self.serial:
             # print("Serial port not available.")
             return False
-        
-        # Build the frame
-        frame_length = len(frame_data) + 1
-        frame = bytes([
-            self.dest_addr,
-            self.src_addr,
-            command_word,
-            (frame_length >> 8) & 0xFF,  # High byte of frame length
-            frame_length & 0xFF          # Low byte of frame length
-        ]) + frame_data
-        
-        # Add checksum
-        checksum = self.calculate_checksum(frame)
-        frame += bytes([checksum])
-        
-        # Send the frame
-        self.serial.write(frame)
-        
-        # Wait for response (200ms timeout as per protocol)
-        time.sleep(0.2)
-        response = self.serial.read_all()
-        
+
+        command_word = frame[2]
+        with self.lock:
+            try:
+                stale = self.serial.in_waiting
+                if stale:
+                    print(f"Discarding {stale} late byte(s) from the printer")
+                    self.serial.reset_input_buffer()
+
+                # Send the frame
+                start = time.monotonic()
+                self.serial.write(frame)
+
+                response = self.read_response(start + timeout)
+            except serial.SerialException as e:
+                print(f"Serial Printer error: {e}")
+                self.connected = False
+                return False
+
+        if response is None:
+            print(f"No reply to command {command_word:02X} within {timeout * 1000:.0f} ms")
+        elif not response.ok:
+            print(f"Printer reply: {response}")
         return response
     
     
     def remap_special_chars(self, text):
-        return ''.join(CHAR_REMAP.get(c, c) for c in text)
+        return remap(text)
     
     def send_text(self, text, template_num=1, font_height=0x10, x_pos=0, y_pos=0, char_spacing=5):
         """
@@ -128,69 +253,52 @@ class EMARKPrinter:
         :param y_pos: Y position (0=top)
         :param char_spacing: Spacing between characters
         """
-        # Convert text to ASCII/GB2312 bytes
-        try:
-            # First try ASCII encoding
-            # text = "1ST API 5CT+2221 LOGO 05+25 PE 7 26`00 K S P 4600 PSI D   40`30 FT 1037 LBS HN  241B11000+1  WO 04+0475"
-            # print("Before:",text)
-            text = self.remap_special_chars(text)
-            # print("After :",text)
-            data_bytes = text.encode('ascii')
-            # print(data_bytes.hex(' '))
-        except UnicodeEncodeError:
-            print("ERROR")
-            try:
-                # If ASCII fails, try GB2312 for Chinese characters
-                data_bytes = text.encode('gb2312')
-            except:
-                # Fallback to ASCII with replacement for unsupported chars
-                data_bytes = text.encode('ascii', errors='replace')
-        
-        # Build font attributes (6 bytes)
-        font_attrs = bytes([
-            font_height,                # Font height
-            len(text),                  # Font length (number of characters)
-            (x_pos >> 8) & 0xFF,       # X position high byte
-            x_pos & 0xFF,               # X position low byte
-            y_pos,                      # Y position
-            char_spacing                # Character spacing
-        ])
-        
-        # Build the information structure
-        info = bytes([template_num]) + font_attrs + data_bytes
-        
-        # Send the command
-        response = self.send_command(0xD3, info)
-        
-        return response
+        # Remapped ASCII (GB2312 for Chinese) text, validated and framed by the codec
+        with self.lock:
+            frame = self._encoder().text(text, template_num, font_height, x_pos, y_pos, char_spacing)
+            return self.send_frame(frame)
     
-    def reset_current_template(self):
-        """Reset template to empty state"""
+    def reset_current_template(self, template_num=None):
+        """Reset template (default: the active one) to empty state"""
         empty_template = bytes([
-            0x01,       # Template number
+            template_num or self.active_template,  # Template number
             0x10,       # Font height (16-dot)
             0x00,       # Character count
             0x00, 0x00, # X position
             0x00,       # Y position
             0x00        # Spacing
         ]) + b''        # Empty data
-        self.send_command(0xD3, empty_template)
+        return self.send_command(CMD_TEXT, empty_template)
     
+    def select_template(self, template_num):
+        """
+        Make a stored template the one that is printed (self.select_command)
+        :return: EMARKResponse, or False if no select command is configured
+        """
+        if self.select_command is None:
+            return False
+        response = self.send_command(self.select_command, bytes([template_num]))
+        if response:
+            self.active_template = template_num
+        return response
+
     def turn_on_printing(self, on=True):
         """Turn printing on/off (Command A5H)"""
-        return self.send_command(0xA5, bytes([0x01 if on else 0x00]))
+        with self.lock:
+            return self.send_frame(self._encoder().printing(on))
     
     def set_printing_speed(self, speed):
         """Set printing speed (Command A1H)"""
-        if speed < 0 or speed > 255:
-            raise ValueError("Speed must be between 0 and 255")
-        return self.send_command(0xA1, bytes([speed]))
+        with self.lock:
+            return self.send_frame(self._encoder().speed(speed))
     
     def close(self):
         """Close the serial connection"""
-        self.serial.close()
-        print("PRINTER COM CLOSED")
-        self.connected = False
+        with self.lock:
+            if self.serial and self.serial.is_open:
+                self.serial.close()
+                print("PRINTER COM CLOSED")
+            self.connected = False
 
 # Example usage
 if __name__ == "__main__":
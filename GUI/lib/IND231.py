@@ -1,12 +1,53 @@
 import serial
+import threading
 import time
 import random
+from collections import deque, namedtuple
+
+# timestamp is time.monotonic() when the frame arrived
+WeightSample = namedtuple("WeightSample", ["weight", "stable", "timestamp"])
+
+
+def parse_weight(response):
+    """
+    Parse one MT-SICS S/SI/SIR reply line
+    :return: (weight, stable) for "S S"/"S D" replies, otherwise None
+    """
+    if response.startswith("S S") or response.startswith("S D"):
+        # Attempt to extract the numeric weight value
+        for part in response.split()[2:]:
+            try:
+                return float(part), response[2] == "S"
+            except ValueError:
+                continue
+    return None
+
 
 class WeightReader:
-    def __init__(self):
+    def __init__(self, buffer_size=256):
+        """
+        :param buffer_size: Number of streamed samples kept in the ring buffer
+        """
         self.connected = False
+        self.serial = None
+        self.lock = threading.RLock()  # Port is shared with DeviceSupervisor
+
+        # Streaming mode: the reader thread replaces self.latest (a single
+        # reference swap, so readers never lock) and appends to self.samples
+        self.streaming = False
+        self.latest = None
+        self.samples = deque(maxlen=buffer_size)
+        self.listeners = []  # Called with each WeightSample on the stream thread
+        self._stream_thread = None
+        self._stream_stop = threading.Event()
 
     def connect(self, port, baudrate=9600):
+        with self.lock:
+            return self._connect(port, baudrate)
+
+    def _connect(self, port, baudrate):
+        # A dropped port must be released before it can be opened again
+        self.close()
         try:
             self.serial = serial.Serial(
                 port=port,
@@ -24,8 +65,87 @@ class WeightReader:
             self.connected = False
             return f"Could not connect to device.\nPlease check the port or connection.\nError: {e}"
 
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def start_stream(self, command="SIR"):
+        """
+        Let the terminal send weights continuously and parse them on a background thread
+        :param command: "SIR" (terminal repeats on its own) or "S" (poll S from the thread)
+        """
+        self.stop_stream()
+        if not self.serial:
+            print("Serial port not available.")
+            return
+        self.latest = None
+        self.samples.clear()
+        self._stream_stop.clear()
+        self._stream_thread = threading.Thread(target=self._stream_loop, args=(command,),
+                                               name="WeightStream", daemon=True)
+        self.streaming = True
+        self._stream_thread.start()
+
+    def stop_stream(self):
+        if not self.streaming:
+            return
+        self.streaming = False
+        self._stream_stop.set()
+        thread = self._stream_thread
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout=2)
+        try:
+            with self.lock:
+                if self.serial and self.serial.is_open:
+                    self.serial.write(b'@\r\n')  # Reset: ends SIR repetition
+        except serial.SerialException as e:
+            print(f"Serial Weight error: {e}")
+
+    def _stream_loop(self, command):
+        repeat = command.upper() == "SIR"
+        frame = f"{command}\r\n".encode('ascii')
+        try:
+            with self.lock:
+                self.serial.reset_input_buffer()
+                self.serial.write(frame)
+            while not self._stream_stop.is_set():
+                if not repeat:
+                    with self.lock:
+                        self.serial.write(frame)
+                line = self.serial.readline()
+                if not line:
+                    continue
+                parsed = parse_weight(line.decode('ascii', errors='replace').strip())
+                if parsed:
+                    sample = WeightSample(parsed[0], parsed[1], time.monotonic())
+                    self.samples.append(sample)
+                    self.latest = sample
+                    for listener in self.listeners:
+                        try:
+                            listener(sample)
+                        except Exception as e:
+                            print(f"Weight listener error: {e}")
+        except (serial.SerialException, TypeError, AttributeError) as e:
+            # Port closed underneath us or cable pulled; the supervisor reconnects
+            if not self._stream_stop.is_set():
+                print(f"Serial Weight stream error: {e}")
+                self.connected = False
+        self.streaming = False
+
+    def latest_weight(self, max_age=1.0):
+        """Most recent streamed weight, or None if the stream is older than max_age seconds"""
+        sample = self.latest
+        if sample is None or time.monotonic() - sample.timestamp > max_age:
+            return None
+        return sample.weight
+
     def read_weight(self):
-        if not hasattr(self, 'serial'):
+        if self.streaming:
+            return self.latest_weight() or 0
+        with self.lock:
+            return self._read_weight()
+
+    def _read_weight(self):
+        if not self.serial:
             print("Serial port not available.")
             return 0
             # return 501.33
@@ -36,17 +156,10 @@ class WeightReader:
             response = self.serial.readline().decode('utf-8').strip()
             print(f"IND 231 Raw response: {response}")
 
-            if response.startswith("S S") or response.startswith("S D"):
-                # Attempt to extract the numeric weight value
-                parts = response.split()
-                for part in parts:
-                    try:
-                        weight = float(part)
-                        print(f"Weight: {weight}")
-                        return weight
-                    except ValueError:
-                        continue
-
+            parsed = parse_weight(response)
+            if parsed:
+                print(f"Weight: {parsed[0]}")
+                return parsed[0]
             elif response.startswith("S I"):
                 print("Command understood but not executable at present.")
             elif response.startswith("S +"):
@@ -69,16 +182,20 @@ class WeightReader:
 
 
     def close(self):
-        if self.serial and self.serial.is_open:
-            self.serial.close()
-            print("Serial port closed.")
+        self.stop_stream()
+        with self.lock:
+            if self.serial and self.serial.is_open:
+                self.serial.close()
+                print("Serial port closed.")
             self.connected = False
 
 # Example usage:
 if __name__ == "__main__":
     scale = WeightReader()
     scale.connect(port = 'COM6')
+    scale.start_stream("SIR")
     while True:
-        print(scale.read_weight())
+        time.sleep(0.5)
+        print(scale.latest, len(scale.samples))
 
     scale.close()
@@ -1,26 +1,197 @@
+import ctypes
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
 import snap7
-from snap7.util import get_bool, get_real
-from snap7.types import Areas
+from snap7.util import get_bool, get_byte, get_dint, get_dword, get_int, get_real, get_word
+from snap7.types import Areas, S7DataItem, S7WLByte
+
+# S7 protocol limits used to size grouped read_multi_vars requests
+DEFAULT_PDU_SIZE = 240
+MAX_VARS = 20
+REQUEST_HEADER = 12      # S7 header + function + item count
+REQUEST_ITEM = 12        # Any-pointer per requested item
+RESPONSE_HEADER = 14     # S7 header + error + function + item count
+RESPONSE_ITEM = 4        # Return code + transport size + length per item
+MAX_GAP = 4              # Unused bytes worth reading to avoid another item
+
+TAG_SIZES = {"bool": 1, "byte": 1, "int": 2, "word": 2, "dint": 4, "dword": 4, "real": 4}
+TAG_DECODERS = {
+    "byte": get_byte,
+    "int": get_int,
+    "word": get_word,
+    "dint": get_dint,
+    "dword": get_dword,
+    "real": get_real,
+}
+
+# Sensor map used when lib/config.json has no "plc_tags" entry
+DEFAULT_TAGS = {
+    "length_on": {"area": "PE", "byte": 6, "bit": 5, "type": "bool"},
+    "length_on_2": {"area": "PE", "byte": 10, "bit": 1, "type": "bool"},
+    "weight_on": {"area": "PE", "byte": 6, "bit": 6, "type": "bool"},
+    "weight_on_2": {"area": "PE", "byte": 10, "bit": 4, "type": "bool"},
+    "printer_on": {"area": "PE", "byte": 6, "bit": 4, "type": "bool"},
+    "printer_on_2": {"area": "PE", "byte": 8, "bit": 2, "type": "bool"},
+    "length": {"area": "DB", "db": 2, "byte": 0, "type": "real"},
+}
+
+Tag = namedtuple("Tag", ["name", "area", "db", "byte", "bit", "type"])
+ReadSpan = namedtuple("ReadSpan", ["area", "db", "start", "size", "tags"])
+
+
+class PLCSnapshot(namedtuple("PLCSnapshot", ["values", "timestamp"])):
+    """
+    Immutable tag values taken in one acquisition cycle.
+    :param values: Read-only mapping of tag name to value
+    :param timestamp: time.monotonic() when the read completed
+    """
+    __slots__ = ()
+
+    def get(self, name, default=None):
+        return self.values.get(name, default)
+
+
+def parse_tags(tags):
+    """
+    Convert the "plc_tags" config mapping into Tag tuples
+    :param tags: {name: {"area", "db", "byte", "bit", "type"}}
+    """
+    parsed = []
+    for name, spec in tags.items():
+        area = spec.get("area", "PE").upper()
+        if area not in Areas.__members__:
+            raise ValueError(f"Tag {name}: unknown area {area}")
+        tag_type = spec.get("type", "bool").lower()
+        if tag_type not in TAG_SIZES:
+            raise ValueError(f"Tag {name}: unknown type {tag_type}")
+        bit = int(spec.get("bit", 0))
+        if not 0 <= bit <= 7:
+            raise ValueError(f"Tag {name}: bit must be between 0 and 7")
+        db = int(spec.get("db", 0)) if area == "DB" else 0
+        parsed.append(Tag(name, area, db, int(spec["byte"]), bit, tag_type))
+    return parsed
+
+
+def _merge_spans(tags, max_payload):
+    """Merge tags of the same area into contiguous byte spans"""
+    spans = []
+    ordered = sorted(tags, key=lambda t: (t.area, t.db, t.byte))
+    for tag in ordered:
+        end = tag.byte + TAG_SIZES[tag.type]
+        last = spans[-1] if spans else None
+        if (last and last.area == tag.area and last.db == tag.db
+                and tag.byte <= last.start + last.size + MAX_GAP
+                and max(end, last.start + last.size) - last.start <= max_payload):
+            size = max(end, last.start + last.size) - last.start
+            spans[-1] = last._replace(size=size, tags=last.tags + (tag,))
+        else:
+            spans.append(ReadSpan(tag.area, tag.db, tag.byte, end - tag.byte, (tag,)))
+    return spans
+
+
+def _response_cost(span):
+    # Odd-sized items are padded to a word boundary in the response
+    return RESPONSE_ITEM + span.size + (span.size & 1)
+
+
+class ReadPlan:
+    """
+    Grouped read_multi_vars requests covering every configured tag.
+    Each request is a list of ReadSpan that fits the negotiated PDU.
+    """
+    def __init__(self, tags, pdu_size=DEFAULT_PDU_SIZE):
+        self.tags = parse_tags(tags)
+        self.pdu_size = pdu_size
+        max_payload = pdu_size - RESPONSE_HEADER - RESPONSE_ITEM - 1
+        spans = _merge_spans(self.tags, max_payload)
+
+        # First-fit decreasing: biggest spans first, into the first request with room
+        self.requests = []
+        for span in sorted(spans, key=_response_cost, reverse=True):
+            for request in self.requests:
+                response = RESPONSE_HEADER + sum(_response_cost(s) for s in request)
+                if (len(request) < MAX_VARS
+                        and REQUEST_HEADER + REQUEST_ITEM * (len(request) + 1) <= pdu_size
+                        and response + _response_cost(span) <= pdu_size):
+                    request.append(span)
+                    break
+            else:
+                self.requests.append([span])
+
+    def __len__(self):
+        return len(self.requests)
+
+    def __str__(self):
+        lines = [f"PLC read plan: {len(self.tags)} tag(s), {len(self.requests)} request(s) per read, PDU {self.pdu_size} bytes"]
+        for i, request in enumerate(self.requests, 1):
+            response = RESPONSE_HEADER + sum(_response_cost(s) for s in request)
+            lines.append(f"  request {i}: {len(request)} item(s), {response} response bytes")
+            for span in request:
+                area = f"DB{span.db}" if span.area == "DB" else span.area
+                names = ", ".join(t.name for t in span.tags)
+                lines.append(f"    {area:<5} byte {span.start}..{span.start + span.size - 1} ({span.size} bytes): {names}")
+        return "\n".join(lines)
+
+
+def _data_item(area, db_number, start, size):
+    """Build a read_multi_vars item with its own receive buffer"""
+    item = S7DataItem()
+    item.Area = ctypes.c_int32(area.value)
+    item.WordLen = ctypes.c_int32(S7WLByte)
+    item.Result = ctypes.c_int32(0)
+    item.DBNumber = ctypes.c_int32(db_number)
+    item.Start = ctypes.c_int32(start)
+    item.Amount = ctypes.c_int32(size)
+    buffer = ctypes.create_string_buffer(size)
+    item.pData = ctypes.cast(ctypes.pointer(buffer), ctypes.POINTER(ctypes.c_uint8))
+    return item, buffer
 
 class PLCReader:
-    def __init__(self):
+    def __init__(self, tags=None):
         self.connected = False  # <-- default to False
         self.client = None
+        self.pdu_size = DEFAULT_PDU_SIZE
+        self.lock = threading.RLock()  # Client is shared with the acquisition thread
+        self.set_tags(tags or DEFAULT_TAGS)
+
+    def set_tags(self, tags):
+        """
+        Compile the tag map into grouped read requests
+        :param tags: {name: {"area", "db", "byte", "bit", "type"}}
+        """
+        self.tags = tags
+        self.read_plan = ReadPlan(tags, self.pdu_size)
 
-    def connect(self, ip, rack=0, slot=2):
-        self.client = snap7.client.Client()
+    def connect(self, ip, rack=0, slot=2, port=102):
+        with self.lock:
+            self._drop()
+            self.client = snap7.client.Client()
+            try:
+                self.client.connect(ip, rack, slot, port)
+                if self.client.get_connected():
+                    print(f"Connected to PLC at {ip}")
+                    self.connected = True
+                    self.pdu_size = self.client.get_pdu_length()
+                    self.set_tags(self.tags)
+                    print(self.read_plan)
+                else:
+                    print(f"Failed to connect to PLC at {ip}")
+            except Exception as e:
+                print(f"Connection error: {e}")
+                self.client = None
+                self.connected = False
+                return f"Could not connect to device.\nPlease check the IP or connection.\nError: {e}"
+
+    def _drop(self):
+        """Mark the link as down and release the socket; DeviceSupervisor reconnects"""
+        self.connected = False
         try:
-            self.client.connect(ip, rack, slot)
-            if self.client.get_connected():
-                print(f"Connected to PLC at {ip}")
-                self.connected = True
-            else:
-                print(f"Failed to connect to PLC at {ip}")
+            if self.client:
+                self.client.disconnect()
         except Exception as e:
-            print(f"Connection error: {e}")
-            self.client = None
-            self.connected = False
-            return f"Could not connect to device.\nPlease check the IP or connection.\nError: {e}"
+            print(f"Disconnect error: {e}")
 
     def read_real(self, db_number, start_byte):
         if not self.client or not self.client.get_connected():
@@ -34,10 +205,44 @@ class PLCReader:
             return value
         except Exception as e:
             print(f"Read Real error: {e}")
-            self.client = False
-            self.connected = False
+            self._drop()
             return None
     
+    def read_snapshot(self):
+        """
+        Read every configured tag using the compiled read plan
+        :return: PLCSnapshot, or None if the read failed
+        """
+        with self.lock:
+            if not self.client or not self.client.get_connected():
+                print("Not connected to PLC.")
+                self.connected = False
+                return None
+            try:
+                values = {}
+                for request in self.read_plan.requests:
+                    items = (S7DataItem * len(request))()
+                    buffers = []
+                    for i, span in enumerate(request):
+                        items[i], buffer = _data_item(Areas[span.area], span.db, span.start, span.size)
+                        buffers.append(buffer)
+                    self.client.read_multi_vars(items)
+                    for item, span, buffer in zip(items, request, buffers):
+                        if item.Result != 0:
+                            raise RuntimeError(f"Item error {item.Result} at {span.area} byte {span.start}")
+                        data = bytearray(buffer.raw[:span.size])
+                        for tag in span.tags:
+                            offset = tag.byte - span.start
+                            if tag.type == "bool":
+                                values[tag.name] = get_bool(data, offset, tag.bit)
+                            else:
+                                values[tag.name] = TAG_DECODERS[tag.type](data, offset)
+                return PLCSnapshot(MappingProxyType(values), time.monotonic())
+            except Exception as e:
+                print(f"Read snapshot error: {e}")
+                self._drop()
+                return None
+
     def read_bit_I(self, byte, bit):
         if not self.client or not self.client.get_connected():
             print("Not connected to PLC.")
@@ -49,8 +254,7 @@ class PLCReader:
             return value
         except Exception as e:
             print(f"Read bit I error: {e}")
-            self.client = False
-            self.connected = False
+            self._drop()
             return None
         
     def read_bit_Q(self, byte, bit):
@@ -64,8 +268,7 @@ class PLCReader:
             return value
         except Exception as e:
             print(f"Read bit Q error: {e}")
-            self.client = False
-            self.connected = False
+            self._drop()
             return None
         
     def read_mem(self, byte, bit):
@@ -79,19 +282,20 @@ class PLCReader:
             return value
         except Exception as e:
             print(f"Read Memory error: {e}")
-            self.client = False
-            self.connected = False
+            self._drop()
             return None
 
     def close(self):
-        if self.client and self.client.get_connected():
-            self.client.disconnect()
-            print("Disconnected from PLC.")
-            self.connected = False
+        with self.lock:
+            if self.client and self.client.get_connected():
+                self.client.disconnect()
+                print("Disconnected from PLC.")
+                self.connected = False
 
 # Example usage
 if __name__ == "__main__":
     plc = PLCReader()
     plc.connect(ip='192.168.1.6')
-    plc.read_real(db_number=2, start_byte=0)
+    print(plc.read_plan)
+    print(plc.read_snapshot())
     plc.close()
@@ -0,0 +1,84 @@
+import threading
+import time
+
+
+class PLCAcquisition(threading.Thread):
+    """
+    Poll PLC snapshots on a background thread and report tag changes.
+    Listeners are called from this thread as listener(name, value, timestamp),
+    where timestamp is the time.monotonic() of the snapshot that saw the change.
+    Edge detectors are fed every cycle; their StationEvents go to event listeners.
+    """
+    def __init__(self, plc, interval=0.02, detectors=()):
+        """
+        :param plc: Connected or not-yet-connected PLCReader
+        :param interval: Poll period in seconds (e.g. 0.02 - 0.05)
+        :param detectors: EdgeDetector instances fed from this thread
+        """
+        super().__init__(name="PLCAcquisition", daemon=True)
+        self.plc = plc
+        self.interval = interval
+        self.listeners = []
+        self.detectors = list(detectors)
+        self.event_listeners = []
+        self.snapshot = None  # Latest good snapshot
+        self.values = {}
+        self._stop_event = threading.Event()
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def add_event_listener(self, listener):
+        self.event_listeners.append(listener)
+
+    def _notify(self, listeners, *args):
+        for listener in listeners:
+            try:
+                listener(*args)
+            except Exception as e:
+                print(f"Acquisition listener error: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+    def poll_once(self):
+        """Read one snapshot and notify listeners about changed tags"""
+        if not self.plc.connected:
+            # Forget the last values so every tag is reported again after reconnect
+            self.values = {}
+            return None
+
+        snapshot = self.plc.read_snapshot()
+        if snapshot is None:
+            self.values = {}
+            return None
+
+        self.snapshot = snapshot
+        timestamp = snapshot.timestamp
+        for name, value in snapshot.values.items():
+            if name not in self.values or self.values[name] != value:
+                self.values[name] = value
+                self._notify(self.listeners, name, value, timestamp)
+                for detector in self.detectors:
+                    event = detector.update(name, value, timestamp)
+                    if event:
+                        self._notify(self.event_listeners, event)
+
+        # Debounce and minimum-on timers expire without any tag changing
+        for detector in self.detectors:
+            event = detector.poll(timestamp)
+            if event:
+                self._notify(self.event_listeners, event)
+        return snapshot
+
+    def run(self):
+        next_poll = time.monotonic()
+        while not self._stop_event.is_set():
+            self.poll_once()
+
+            # Fixed-rate schedule; skip missed slots instead of bursting
+            next_poll += self.interval
+            now = time.monotonic()
+            if next_poll < now:
+                next_poll = now
+            self._stop_event.wait(next_poll - now)
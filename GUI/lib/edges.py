@@ -0,0 +1,87 @@
+from collections import namedtuple
+
+RISING = "rising"
+FALLING = "falling"
+
+# Stations used when lib/config.json has no "stations" entry.
+# min_on_ms keeps the settling times the line was tuned with.
+DEFAULT_STATIONS = {
+    "length": {"tags": ["length_on", "length_on_2"], "mode": "and", "debounce_ms": 30, "min_on_ms": 500},
+    "weight": {"tags": ["weight_on", "weight_on_2"], "mode": "and", "debounce_ms": 30, "min_on_ms": 500},
+    "printer": {"tags": ["printer_on", "printer_on_2"], "mode": "or", "debounce_ms": 30, "min_on_ms": 2000},
+}
+
+# timestamp is when the combined bits really changed (time.monotonic()),
+# duration is how long the station was on (FALLING only)
+StationEvent = namedtuple("StationEvent", ["station", "edge", "timestamp", "duration"])
+
+
+class EdgeDetector:
+    """
+    Combine PLC bits into one debounced "pipe at station" signal.
+    Produces exactly one RISING event per pipe and one FALLING event when it leaves.
+    """
+    def __init__(self, station, tags, mode="and", debounce=0.03, min_on=0.0):
+        """
+        :param station: Station name reported in events
+        :param tags: PLC tag names combined into the station signal
+        :param mode: "and" (all bits on) or "or" (any bit on)
+        :param debounce: Seconds a change must hold before it is accepted
+        :param min_on: Minimum seconds on before a pipe counts as arrived
+        """
+        mode = mode.lower()
+        if mode not in ("and", "or"):
+            raise ValueError(f"Station {station}: mode must be 'and' or 'or'")
+        self.station = station
+        self.tags = tuple(tags)
+        self.combine = all if mode == "and" else any
+        self.debounce = debounce
+        self.min_on = min_on
+        self.values = dict.fromkeys(self.tags, False)
+        self.raw = False         # Combined bits right now
+        self.raw_since = None    # When raw last changed
+        self.active = False      # Debounced state
+        self.rise_time = None
+
+    def update(self, name, value, timestamp):
+        """Feed one tag change; returns a StationEvent or None"""
+        if name not in self.values:
+            return None
+        self.values[name] = bool(value)
+        raw = self.combine(self.values.values())
+        if raw != self.raw:
+            self.raw = raw
+            self.raw_since = timestamp
+        return self.poll(timestamp)
+
+    def poll(self, timestamp):
+        """Confirm a pending edge once it has held long enough; returns a StationEvent or None"""
+        if self.raw == self.active or self.raw_since is None:
+            return None
+        held = timestamp - self.raw_since
+        if self.raw:
+            if held >= max(self.debounce, self.min_on):
+                self.active = True
+                self.rise_time = self.raw_since
+                return StationEvent(self.station, RISING, self.raw_since, 0.0)
+        elif held >= self.debounce:
+            self.active = False
+            return StationEvent(self.station, FALLING, self.raw_since, self.raw_since - self.rise_time)
+        return None
+
+
+def build_detectors(stations):
+    """
+    Create one EdgeDetector per station from the "stations" config mapping
+    :param stations: {name: {"tags", "mode", "debounce_ms", "min_on_ms"}}
+    """
+    return [
+        EdgeDetector(
+            name,
+            spec["tags"],
+            mode=spec.get("mode", "and"),
+            debounce=spec.get("debounce_ms", 30) / 1000,
+            min_on=spec.get("min_on_ms", 0) / 1000,
+        )
+        for name, spec in stations.items()
+    ]
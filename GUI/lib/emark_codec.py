@@ -0,0 +1,226 @@
+"""
+EMARK coder frame codec.
+Frame: [dest, src, cmd, len_hi, len_lo] + data + [xor], where the length counts
+data plus the checksum byte and xor covers everything before it.
+"""
+import operator
+from collections import namedtuple
+from functools import reduce
+
+# Commands
+CMD_TEXT = 0xD3      # Transmit fixed information
+CMD_SPEED = 0xA1     # Printing speed
+CMD_PRINTING = 0xA5  # Printing on/off
+
+# First data byte of an ack frame
+ACK_OK = 0x00
+ACK_CHECKSUM_ERROR = 0x01
+ACK_UNKNOWN_COMMAND = 0x02
+ACK_STATUS_TEXT = {
+    ACK_OK: "OK",
+    ACK_CHECKSUM_ERROR: "CHECKSUM ERROR",
+    ACK_UNKNOWN_COMMAND: "UNKNOWN COMMAND",
+}
+
+HEADER_SIZE = 5
+TEXT_INFO_SIZE = 7    # template, font height, count, x_hi, x_lo, y, spacing
+MAX_TEXT = 0xFF       # Character count is one byte
+MAX_DATA = 0xFFFE     # Frame length (data + checksum) is two bytes
+
+# The coder's font table is shifted against ASCII for punctuation
+CHAR_REMAP = {
+    '~': "|",
+    '`': '_',
+    '@': '"',
+    '^': '&',
+    '&': "'",
+    '*': '(',
+    '(': ')',
+    '_': '}',
+    '-': '+',
+    '+': ',',
+    '{': '.',
+    '[': ';',
+    ']': '<',
+    '}': '/',
+    '\\': '>',
+    ';': '@',
+    ':': '?',
+    "'": '&',
+    ',': '\\',
+    '.': '`',
+    '<': ']',
+    '>': '^',
+    '/': '*',
+    '?': '{'
+}
+REMAP_TABLE = str.maketrans(CHAR_REMAP)
+
+Frame = namedtuple("Frame", ["dest", "src", "command", "data", "checksum_ok"])
+TextInfo = namedtuple("TextInfo", ["template", "font_height", "count", "x_pos", "y_pos", "char_spacing", "text"])
+
+
+def checksum(data):
+    """XOR of all bytes"""
+    size = len(data)
+    if size < 16:
+        return reduce(operator.xor, data, 0)
+    # Fold the whole buffer as one integer: log2(n) shifts instead of n Python steps
+    value = int.from_bytes(data, "little")
+    shift = 1 << (size * 8 - 1).bit_length()
+    while shift > 8:
+        shift >>= 1
+        value ^= value >> shift
+    return value & 0xFF
+
+
+def remap(text):
+    return text.translate(REMAP_TABLE)
+
+
+def encode_text(text):
+    """Remapped printer bytes for text (ASCII, GB2312 for Chinese)"""
+    text = text.translate(REMAP_TABLE)
+    try:
+        return text.encode("ascii")
+    except UnicodeEncodeError:
+        try:
+            return text.encode("gb2312")
+        except UnicodeEncodeError:
+            return text.encode("ascii", errors="replace")
+
+
+def _check_byte(name, value):
+    if not 0 <= value <= 0xFF:
+        raise ValueError(f"{name} must be between 0 and 255, got {value}")
+
+
+class FrameEncoder:
+    """
+    Builds frames in one preallocated buffer. Every encode returns a memoryview
+    into that buffer, valid until the next encode - write it (or copy it with
+    bytes()) before encoding again, and share one encoder per serial lock.
+    """
+    def __init__(self, dest=0x01, src=0x00, max_data=1024):
+        """
+        :param dest: Coder address
+        :param src: PC address
+        :param max_data: Largest data block the buffer holds
+        """
+        if max_data > MAX_DATA:
+            raise ValueError(f"max_data must be at most {MAX_DATA}")
+        self.dest = dest
+        self.src = src
+        self.buffer = bytearray(HEADER_SIZE + max_data + 1)
+        self.view = memoryview(self.buffer)
+
+    def _finish(self, command, size):
+        buffer = self.buffer
+        length = size + 1
+        buffer[0] = self.dest
+        buffer[1] = self.src
+        buffer[2] = command
+        buffer[3] = length >> 8
+        buffer[4] = length & 0xFF
+        end = HEADER_SIZE + size
+        buffer[end] = checksum(self.view[:end])
+        return self.view[:end + 1]
+
+    def frame(self, command, data=b""):
+        """Any command with a raw data block"""
+        size = len(data)
+        if size > len(self.buffer) - HEADER_SIZE - 1:
+            raise ValueError(f"Frame data of {size} bytes does not fit ({len(self.buffer) - HEADER_SIZE - 1} max)")
+        self.buffer[HEADER_SIZE:HEADER_SIZE + size] = data
+        return self._finish(command, size)
+
+    def text(self, text, template_num=1, font_height=0x10, x_pos=0, y_pos=0, char_spacing=0):
+        """D3 frame for text (remapped and encoded here); see EMARKPrinter.send_text"""
+        data = encode_text(text)
+        return self.text_bytes(data, template_num, font_height, x_pos, y_pos, char_spacing, count=len(text))
+
+    def text_bytes(self, data, template_num=1, font_height=0x10, x_pos=0, y_pos=0, char_spacing=0, count=None):
+        """D3 frame for already-encoded printer bytes; count defaults to len(data)"""
+        count = len(data) if count is None else count
+        if count > MAX_TEXT:
+            raise ValueError(f"Text is {count} characters, the coder takes at most {MAX_TEXT}")
+        if not 0 <= x_pos <= 0xFFFF:
+            raise ValueError(f"x_pos must be between 0 and 65535, got {x_pos}")
+        for name, value in (("template_num", template_num), ("font_height", font_height),
+                            ("y_pos", y_pos), ("char_spacing", char_spacing)):
+            _check_byte(name, value)
+        size = TEXT_INFO_SIZE + len(data)
+        if size > len(self.buffer) - HEADER_SIZE - 1:
+            raise ValueError(f"Text of {len(data)} bytes does not fit the frame buffer")
+        buffer = self.buffer
+        buffer[5] = template_num
+        buffer[6] = font_height
+        buffer[7] = count
+        buffer[8] = x_pos >> 8
+        buffer[9] = x_pos & 0xFF
+        buffer[10] = y_pos
+        buffer[11] = char_spacing
+        buffer[12:12 + len(data)] = data
+        return self._finish(CMD_TEXT, size)
+
+    def speed(self, speed):
+        _check_byte("Speed", speed)
+        self.buffer[5] = speed
+        return self._finish(CMD_SPEED, 1)
+
+    def printing(self, on=True):
+        self.buffer[5] = 0x01 if on else 0x00
+        return self._finish(CMD_PRINTING, 1)
+
+
+def decode_frame(raw):
+    """
+    Split one complete frame
+    :return: Frame, or None if raw is shorter than its header says
+    """
+    if len(raw) < HEADER_SIZE + 1:
+        return None
+    length = (raw[3] << 8) | raw[4]
+    if len(raw) < HEADER_SIZE + length or length < 1:
+        return None
+    end = HEADER_SIZE + length
+    return Frame(raw[0], raw[1], raw[2], bytes(raw[HEADER_SIZE:end - 1]), checksum(raw[:end - 1]) == raw[end - 1])
+
+
+def decode_text(data):
+    """D3 data -> TextInfo (text as the coder's bytes, i.e. still remapped)"""
+    if len(data) < TEXT_INFO_SIZE:
+        raise ValueError(f"D3 data is {len(data)} bytes, expected at least {TEXT_INFO_SIZE}")
+    return TextInfo(data[0], data[1], data[2], (data[3] << 8) | data[4], data[5], data[6],
+                    bytes(data[TEXT_INFO_SIZE:TEXT_INFO_SIZE + data[2]]))
+
+
+def decode_speed(data):
+    if len(data) != 1:
+        raise ValueError(f"A1 data is {len(data)} bytes, expected 1")
+    return data[0]
+
+
+def decode_printing(data):
+    if len(data) != 1:
+        raise ValueError(f"A5 data is {len(data)} bytes, expected 1")
+    return bool(data[0])
+
+
+def decode_status(data):
+    """Ack data -> status byte (ACK_*), None for an empty ack"""
+    return data[0] if data else None
+
+
+# Request data decoders by command (acks of any command decode with decode_status)
+COMMAND_DECODERS = {
+    CMD_TEXT: decode_text,
+    CMD_SPEED: decode_speed,
+    CMD_PRINTING: decode_printing,
+}
+
+
+def decode_command(frame):
+    """Decoded data of a PC -> coder frame, or the raw data for unknown commands"""
+    decoder = COMMAND_DECODERS.get(frame.command)
+    return decoder(frame.data) if decoder else frame.data
@@ -0,0 +1,286 @@
+"""
+Pseudo-terminal emulators for the IND231 weight terminal and the EMARK coder.
+Each emulator owns a pty pair; open emulator.port with WeightReader/EMARKPrinter
+(or serial.Serial) exactly as if it were the real COM port. Linux/macOS only.
+
+    python -m lib.emulator ind231 --weight 520.5 --noise 0.05
+    python -m lib.emulator emark --ack-delay 0.005
+"""
+import argparse
+import os
+import random
+import select
+import threading
+import time
+import tty
+from collections import namedtuple
+from lib.emark_codec import (ACK_CHECKSUM_ERROR, ACK_OK, ACK_UNKNOWN_COMMAND, CMD_PRINTING, CMD_SPEED, CMD_TEXT,
+                             checksum, decode_command, decode_frame)
+
+# Frame received by the EMARK emulator
+EmarkFrame = namedtuple("EmarkFrame", ["dest", "src", "command", "data", "checksum_ok", "timestamp"])
+
+
+class PtyDevice:
+    """Base class: a pty pair served by a background thread that reads the master side"""
+    def __init__(self, link=None):
+        """
+        :param link: Optional symlink path pointing at the slave device (e.g. /tmp/ind231)
+        """
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.link = link
+        if link:
+            if os.path.islink(link):
+                os.unlink(link)
+            os.symlink(self.port, link)
+        self.lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name=type(self).__name__, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join(timeout=1)
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        if self.link and os.path.islink(self.link):
+            os.unlink(self.link)
+
+    def write(self, data):
+        with self.lock:
+            os.write(self.master, data)
+
+    def _serve(self):
+        while not self._stop_event.is_set():
+            ready, _, _ = select.select([self.master], [], [], 0.05)
+            if ready:
+                try:
+                    data = os.read(self.master, 4096)
+                except OSError:
+                    break
+                self.received(data)
+            self.tick()
+
+    def received(self, data):
+        """Bytes the app wrote to the port; devices override this, the base device drops them"""
+
+    def tick(self):
+        """Called at least every 50 ms from the serving thread"""
+
+
+class IND231Emulator(PtyDevice):
+    """
+    METTLER TOLEDO IND231 speaking the MT-SICS subset WeightReader uses:
+    SI (immediate), S (stable), SIR (repeat immediate), @ (reset).
+    """
+    def __init__(self, weight=0.0, unit="kg", noise=0.0, latency=0.0, rate=10.0, link=None):
+        """
+        :param weight: Initial (settled) weight
+        :param unit: Unit printed after the weight
+        :param noise: Peak random noise added to every reading
+        :param latency: Seconds before each reply
+        :param rate: SIR readings per second
+        """
+        super().__init__(link)
+        self.unit = unit
+        self.noise = noise
+        self.latency = latency
+        self.rate = rate
+        self.target = weight
+        self.start_weight = weight
+        self.settle_start = 0.0
+        self.settle_time = 0.0
+        self.overload = False
+        self.underload = False
+        self.repeat = False
+        self.next_repeat = 0.0
+        self.pending_stable = []  # Deadlines of S commands waiting for stability
+        self.buffer = b""
+
+    def set_weight(self, weight, settle=0.0):
+        """Move to a new weight; readings are dynamic ("S D") for settle seconds"""
+        self.start_weight = self.current()[0]
+        self.target = weight
+        self.settle_start = time.monotonic()
+        self.settle_time = settle
+        self.overload = self.underload = False
+
+    def set_overload(self, on=True):
+        self.overload = on
+
+    def set_underload(self, on=True):
+        self.underload = on
+
+    def current(self):
+        """(weight, stable) right now"""
+        elapsed = time.monotonic() - self.settle_start
+        if self.settle_time and elapsed < self.settle_time:
+            # Exponential-ish approach with overshoot, like a pipe dropping on the scale
+            progress = elapsed / self.settle_time
+            wobble = (1 - progress) * 0.1 * (self.target - self.start_weight) * random.uniform(-1, 1)
+            weight = self.start_weight + (self.target - self.start_weight) * progress + wobble
+            stable = False
+        else:
+            weight = self.target
+            stable = True
+        return weight + random.uniform(-self.noise, self.noise), stable
+
+    def reading(self):
+        if self.overload:
+            return "S +"
+        if self.underload:
+            return "S -"
+        weight, stable = self.current()
+        return f"S {'S' if stable else 'D'} {weight:>10.2f} {self.unit}"
+
+    def reply(self, text):
+        if self.latency:
+            time.sleep(self.latency)
+        self.write(f"{text}\r\n".encode("ascii"))
+
+    def received(self, data):
+        self.buffer += data
+        while b"\n" in self.buffer:
+            line, self.buffer = self.buffer.split(b"\n", 1)
+            self.command(line.strip().decode("ascii", errors="replace").upper())
+
+    def command(self, command):
+        if command == "SI":
+            self.reply(self.reading())
+        elif command == "S":
+            self.pending_stable.append(time.monotonic() + 10.0)
+        elif command == "SIR":
+            self.repeat = True
+            self.next_repeat = time.monotonic()
+        elif command == "@":
+            self.repeat = False
+            self.pending_stable.clear()
+            self.reply('I4 A "IND231-EMULATOR"')
+        elif command:
+            self.reply("ES")
+
+    def tick(self):
+        now = time.monotonic()
+        if self.pending_stable:
+            stable = self.current()[1] and not (self.overload or self.underload)
+            if stable or now >= self.pending_stable[0]:
+                self.pending_stable.pop(0)
+                self.reply(self.reading() if stable else "S I")
+        if self.repeat and now >= self.next_repeat:
+            self.next_repeat += 1 / self.rate
+            self.reply(self.reading())
+
+
+class EMARKEmulator(PtyDevice):
+    """
+    EMARK coder: parses [dest, src, cmd, len_hi, len_lo, data..., xor] frames,
+    verifies the checksum and answers with an ack frame of the same layout whose
+    single data byte is ACK_OK / ACK_CHECKSUM_ERROR / ACK_UNKNOWN_COMMAND.
+    """
+
+    def __init__(self, ack_delay=0.005, address=0x01, select_command=None, link=None):
+        """
+        :param ack_delay: Seconds between receiving a frame and sending the ack
+        :param address: Coder address (acks are sent from it)
+        :param select_command: Command byte that switches the active template (None: unsupported)
+        """
+        super().__init__(link)
+        self.ack_delay = ack_delay
+        self.address = address
+        self.select_command = select_command
+        self.active_template = 1
+        self.buffer = bytearray()
+        self.frames = []      # Every EmarkFrame received
+        self.templates = {}   # template number -> raw text bytes of the last D3
+        self.printing = False
+        self.speed = None
+
+    def received(self, data):
+        self.buffer += data
+        while len(self.buffer) >= 5:
+            length = (self.buffer[3] << 8) | self.buffer[4]
+            if len(self.buffer) < 5 + length:
+                break
+            frame = bytes(self.buffer[:5 + length])
+            del self.buffer[:5 + length]
+            self.handle(frame)
+
+    def handle(self, raw):
+        frame = decode_frame(raw)
+        if frame is None:
+            # Length 0: not even a checksum byte. NAK it; the frame is not recorded
+            self.reply(raw[1], raw[2], ACK_CHECKSUM_ERROR)
+            return
+        dest, src, command, data = frame.dest, frame.src, frame.command, frame.data
+        self.frames.append(EmarkFrame(dest, src, command, data, frame.checksum_ok, time.monotonic()))
+
+        status = ACK_OK
+        try:
+            if not frame.checksum_ok:
+                status = ACK_CHECKSUM_ERROR
+            elif command == CMD_TEXT:
+                info = decode_command(frame)
+                self.templates[info.template] = info.text
+            elif command == CMD_PRINTING:
+                self.printing = decode_command(frame)
+            elif command == CMD_SPEED:
+                self.speed = decode_command(frame)
+            elif command == self.select_command and data:
+                self.active_template = data[0]
+            else:
+                status = ACK_UNKNOWN_COMMAND
+        except ValueError:
+            status = ACK_UNKNOWN_COMMAND
+        self.reply(src, command, status)
+
+    def reply(self, dest, command, status):
+        if self.ack_delay:
+            time.sleep(self.ack_delay)
+        ack = bytearray([dest, self.address, command, 0x00, 0x02, status])
+        ack.append(checksum(ack))
+        self.write(bytes(ack))
+
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="pty emulators for the IND231 terminal and EMARK coder")
+    sub = parser.add_subparsers(dest="device", required=True)
+    scale = sub.add_parser("ind231")
+    scale.add_argument("--weight", type=float, default=520.0)
+    scale.add_argument("--unit", default="kg")
+    scale.add_argument("--noise", type=float, default=0.0)
+    scale.add_argument("--latency", type=float, default=0.0)
+    scale.add_argument("--rate", type=float, default=10.0, help="SIR readings per second")
+    scale.add_argument("--link", help="Symlink to create for the port, e.g. /tmp/ind231")
+    coder = sub.add_parser("emark")
+    coder.add_argument("--ack-delay", type=float, default=0.005)
+    coder.add_argument("--select-command", type=lambda v: int(v, 16), help="Template switch command byte (hex)")
+    coder.add_argument("--link", help="Symlink to create for the port, e.g. /tmp/emark")
+    args = parser.parse_args()
+
+    if args.device == "ind231":
+        device = IND231Emulator(args.weight, args.unit, args.noise, args.latency, args.rate, args.link)
+    else:
+        device = EMARKEmulator(args.ack_delay, select_command=args.select_command, link=args.link)
+    device.start()
+    print(f"{args.device} emulator on {args.link or device.port} (Ctrl+C to stop)")
+    try:
+        seen = 0
+        while True:
+            time.sleep(0.5)
+            if isinstance(device, EMARKEmulator):
+                for frame in device.frames[seen:]:
+                    print(f"cmd {frame.command:02X} len {len(frame.data)} checksum {'ok' if frame.checksum_ok else 'BAD'}")
+                seen = len(device.frames)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        device.stop()
@@ -0,0 +1,448 @@
+"""
+Measuring-and-marking line without a GUI.
+
+    python -m lib.engine --config lib/config.json --work-order work_order.csv
+
+LineEngine owns the devices, the PLC acquisition and the pipeline: station
+edges grade, stage and print pipes on the worker threads, so the line keeps
+running whether or not a window is attached. A GUI (apps.PrintingSystem) is just
+one more listener.
+"""
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from lib.EMARK import EMARKPrinter
+from lib.IND231 import WeightReader
+from lib.PLC import PLCReader, DEFAULT_TAGS
+from lib.acquisition import PLCAcquisition
+from lib.edges import build_detectors, DEFAULT_STATIONS, RISING
+from lib.grading import grade_for, WEIGHT_TOLERANCES, NO_DATA
+from lib.history import (HistoryEntry, HistoryStore, CsvLogWriter, HISTORY_DB, FLUSH_RECORD, strip_label,
+                         LENGTH_FACTORS, WEIGHT_FACTORS)
+from lib.pipeline import PipeTracker, NORMAL, REJECT
+from lib.printqueue import PrintQueue, PrintJob
+from lib.stats import ProductionStats
+from lib.supervisor import DeviceSupervisor
+from lib.weighing import StabilityCapture
+
+FONT_SIZES = {"5x5": 0x05, "7x5": 0x08, "9x6": 0x09, "12x8": 0x0C, "16x10": 0x10}
+DEFAULT_FONT = 0x0C
+
+
+def unit_of(text):
+    """Unit from a config/combo box entry: "feet (ft)" -> "ft" """
+    return text.split("(")[1].strip(")") if "(" in text else text
+
+
+def printing_template(values, length_unit, weight_unit):
+    """Printing text of a work-order row (NO, TEXT 1, TEXT 2, HEAT NUMBER, WORK ORDER, PIPE NUMBER)"""
+    #Mengubah Space / Spasi
+    return f"{values[1]}      {values[2]}  [L]{length_unit}  [W]{weight_unit}  {values[3]}  {values[4]}  {values[5]}"
+
+
+def read_work_order(path):
+    """Work-order rows from a CSV laid out like the input table (no header)"""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [(row + [""] * 6)[:6] for row in csv.reader(f) if any(row)]
+
+
+class LineEngine:
+    """
+    Length -> weight -> print sequencing for one line, independent of Qt.
+    Station events are handled on the acquisition thread, streamed weights on the
+    scale thread; the pipeline is guarded by self.lock (hold it to edit the
+    production list from another thread).
+    Listeners are called from those threads as listener(station, state, pipe),
+    e.g. ("length", "MEASURE DONE", pipe); history listeners as listener(entry)
+    with a history.HistoryEntry for every printed or rejected pipe.
+    """
+    def __init__(self, config, plc=None, weight=None, printer=None):
+        """
+        :param config: Settings dict (lib/config.json); grading reads it live
+        :param plc: PLCReader, weight: WeightReader, printer: EMARKPrinter (created if None)
+        """
+        self.config = config
+        self.lock = threading.RLock()
+        self.listeners = []
+        # Every printed or rejected pipe goes to the daily CSV and the history database
+        # (both written by their own threads). Logs written while the store was not
+        # recording are imported into it when it starts.
+        self.log_writer = CsvLogWriter(flush=config.get("log_flush", FLUSH_RECORD),
+                                       interval=config.get("log_flush_ms", 500) / 1000)
+        self.store = HistoryStore(config.get("history_db", HISTORY_DB), folder=self.log_writer.folder)
+        # Running statistics per shift, work order and heat number, for dashboards
+        self.stats = ProductionStats(config.get("shifts"))
+        # The store gets each entry once the log writer knows where it wrote it
+        self.log_writer.add_row_listener(self.store.add)
+        self.history_listeners = [lambda entry: self.log_writer.add(entry.row(), entry), self.stats.add]
+        self.store.add_import_listener(self.seed_stats)
+        self.started = time.time()
+
+        self.PLC = plc or PLCReader()
+        self.WEIGHT = weight or WeightReader()
+        self.EMARK = printer or EMARKPrinter()
+        self.PLC.set_tags(config.get("plc_tags", DEFAULT_TAGS))
+        self.EMARK.clear_mode = config.get("printer_clear", "empty")
+        select_command = config.get("printer_select_command")
+        self.EMARK.select_command = int(select_command, 16) if select_command else None
+
+        self.tracker = PipeTracker()
+        # A staged marking must not outlive its pipe (deleted row or new work order)
+        self.tracker.add_drop_listener(lambda pipe: pipe.job and self.print_queue.discard(pipe.job))
+        self.plc_values = {}  # Latest value of every PLC tag
+        self.length = 0       # Latest readings in display units
+        self.weight = 0
+        self.font = DEFAULT_FONT
+        self.apply_config()
+
+        # Connects and reconnects run on supervisor threads
+        self.supervisor = DeviceSupervisor()
+
+        # Streamed weights are captured the moment they settle on the scale
+        capture = config.get("weight_capture", {})
+        self.weight_capture = StabilityCapture(
+            self.WEIGHT.samples,
+            window=capture.get("window_ms", 300) / 1000,
+            tolerance=capture.get("tolerance", 0.5),
+            min_samples=capture.get("min_samples", 3),
+            method=capture.get("filter", "median"),
+            require_stable=capture.get("require_stable", False),
+            timeout=capture.get("timeout_ms", 3000) / 1000,
+        )
+        self.WEIGHT.add_listener(self.weight_capture.feed)
+        self.weight_capture.add_listener(self.on_weight_captured)
+        self.capture_timer = None
+        self.weight_pending = None  # Weight edge (monotonic) of the pipe waiting for its weight
+        # Without the stream the scale is read once, this long after the weight edge
+        self.weight_settle = config.get("weight_settle_ms", 500) / 1000
+
+        # Markings are sent by the printer worker; a slow coder only delays printing
+        self.print_queue = PrintQueue(self.EMARK, retries=config.get("print_retries", 6),
+                                      deadline=config.get("print_deadline_ms", 2000) / 1000)
+        self.print_queue.add_listener(self.on_print_done)
+
+        detectors = build_detectors(config.get("stations", DEFAULT_STATIONS))
+        self.acquisition = PLCAcquisition(self.PLC, interval=config.get("plc_poll_ms", 20) / 1000, detectors=detectors)
+        self.acquisition.add_listener(self.on_tag_changed)
+        self.acquisition.add_event_listener(self.on_station_event)
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def add_history_listener(self, listener):
+        self.history_listeners.append(listener)
+
+    def notify(self, station, state, pipe=None):
+        for listener in self.listeners:
+            try:
+                listener(station, state, pipe)
+            except Exception as e:
+                print(f"Engine listener error: {e}")
+
+    def apply_config(self):
+        """Pick up units and pipe type after config changed"""
+        self.length_unit = unit_of(self.config.get("length_unit", "milimeter (mm)"))
+        self.weight_unit = unit_of(self.config.get("weight_unit", "kilogram (kg)"))
+        self.pipe_type = self.config.get("pipe_type", "5CT")
+        if self.pipe_type not in WEIGHT_TOLERANCES:
+            print(f"Failed to choose pipe type {self.pipe_type}! Grading as 5CT")
+            self.pipe_type = "5CT"
+        self.length_factor = LENGTH_FACTORS.get(self.length_unit, 1)
+        self.weight_factor = WEIGHT_FACTORS.get(self.weight_unit, 1)
+
+    def start(self):
+        os.makedirs("logs", exist_ok=True)
+        self.started = int(time.time())  # Pipes recorded from here on reach the statistics live
+        self.store.start()
+        self.log_writer.start()
+        self.print_queue.start()
+        self.acquisition.start()
+
+    def seed_stats(self, imported):
+        """
+        Statistics pick up where the last run left off (work orders can span days):
+        the stored entries before start, once the store has imported the logs
+        written while the app was closed. Called from the store's thread.
+        """
+        since = self.started - self.config.get("stats_days", 7) * 86400
+        self.stats.add_many(self.store.query(since=since, until=self.started))
+
+    def stop(self):
+        if self.capture_timer:
+            self.capture_timer.cancel()
+        self.acquisition.stop()
+        self.print_queue.stop()
+        self.supervisor.stop()
+        self.log_writer.stop()  # Hands its last rows to the store
+        self.store.stop()
+
+    # --- Devices ---
+
+    def watch_printer(self, port):
+        self.supervisor.watch("printer", self.EMARK, on_connect=self.EMARK.clear_text, port=port)
+
+    def watch_weight(self, port):
+        # Streamed weights make update_weight a memory read instead of a serial round trip
+        stream = self.config.get("weight_stream", "")
+        on_connect = (lambda: self.WEIGHT.start_stream(stream)) if stream else None
+        self.supervisor.watch("weight", self.WEIGHT, on_connect=on_connect, port=port)
+
+    def watch_plc(self, ip):
+        self.supervisor.watch("plc", self.PLC, ip=ip, port=self.config.get("plc_port", 102))
+
+    def watch_devices(self):
+        """Connect every device configured in config (and keep reconnecting)"""
+        if self.config.get("printer_port"):
+            self.watch_printer(self.config["printer_port"])
+        if self.config.get("weight_port"):
+            self.watch_weight(self.config["weight_port"])
+        if self.config.get("plc_ip"):
+            self.watch_plc(self.config["plc_ip"])
+
+    # --- Readings ---
+
+    def on_tag_changed(self, name, value, timestamp):
+        self.plc_values[name] = value
+        if name == "length":
+            self.update_length()
+
+    def update_length(self):
+        length_data = self.plc_values.get("length")
+        self.length = round(length_data * self.length_factor, 2) if length_data else 0
+        return self.length
+
+    def update_weight(self):
+        return self.set_weight(self.WEIGHT.read_weight())
+
+    def set_weight(self, weight_data):
+        self.weight = round(weight_data * self.weight_factor, 2) if weight_data else 0
+        return self.weight
+
+    # --- Grading ---
+
+    def grade(self):
+        """Limits for the current settings; OD, WT and min_length are read live, the Grade is cached"""
+        return grade_for(self.pipe_type, self.config["OD"], self.config["WT"], self.config["min_length"],
+                         self.length_unit, self.weight_unit)
+
+    def check_length(self, length):
+        return self.grade().grade_length(length)
+
+    def check_weight(self, weight, length):
+        return self.grade().grade_weight(weight, length)
+
+    # --- Production list ---
+
+    def printing_template(self, values):
+        return printing_template(values, self.length_unit, self.weight_unit)
+
+    def pipe_entry(self, values):
+        """PipeTracker entry of a work-order row: no, template, heat number, work order, pipe number"""
+        return (values[0], self.printing_template(values),
+                strip_label(values[3], "HN"), strip_label(values[4], "WO"), values[5])
+
+    def load_work_order(self, rows):
+        with self.lock:
+            self.tracker.load([self.pipe_entry(values) for values in rows])
+
+    # --- Stations ---
+
+    def on_station_event(self, event):
+        if event.edge != RISING:
+            return
+        try:
+            with self.lock:
+                if event.station == "length":
+                    self.measure_length(event)
+                elif event.station == "weight":
+                    self.measure_weight(event)
+                elif event.station == "printer":
+                    self.trigger_printer(event)
+        except Exception as e:
+            print(f"Sensor event error: {e}")
+
+    def measure_length(self, event=None):
+        if self.length <= 0:
+            self.notify("length", "INVALID")
+            return None
+
+        if self.tracker.at_length is None:
+            self.notify("length", "ROW EMPTY")
+            return None
+
+        pipe = self.tracker.record_length(self.length, self.check_length(self.length))
+        self.notify("length", "MEASURE DONE", pipe)
+        return pipe
+
+    def measure_weight(self, event=None):
+        armed_at = event.timestamp if event else time.monotonic()
+        if self.weight_pending is not None:
+            # The next pipe reached the scale before the last one was weighed: grade that
+            # one from the samples it left, so each pipe gets its own weight
+            self.finish_weight(self.weight_pending, armed_at)
+
+        if self.tracker.at_weight is None:
+            self.notify("weight", "ROW EMPTY")
+            return None
+
+        self.weight_pending = armed_at
+        if self.WEIGHT.streaming:
+            # Grade as soon as the streamed weight settles instead of after a fixed delay
+            self.weight_capture.arm(armed_at)
+            delay = self.weight_capture.timeout + 0.1
+        else:
+            delay = self.weight_settle
+        if self.capture_timer:
+            self.capture_timer.cancel()
+        self.capture_timer = threading.Timer(delay, self.on_weight_timer, (armed_at,))
+        self.capture_timer.daemon = True
+        self.capture_timer.start()
+        self.notify("weight", "MEASURING")
+        return None
+
+    def on_weight_timer(self, armed_at):
+        with self.lock:
+            if self.weight_pending != armed_at:
+                return
+            if self.weight_capture.armed_at == armed_at:
+                self.finish_weight(armed_at)
+            else:
+                # Not streaming: the pipe has settled, read the scale once
+                self.weight_pending = None
+                self.record_weight(self.update_weight())
+
+    def finish_weight(self, armed_at, now=None):
+        """
+        Grade the pipe waiting since armed_at with the samples streamed until now
+        (NO DATA if there are none, or the scale was not streaming)
+        """
+        if self.weight_capture.armed_at == armed_at and self.weight_capture.expire(now) is not None:
+            return  # Graded by on_weight_captured
+        if self.weight_pending == armed_at:
+            self.weight_pending = None
+            self.record_no_weight()
+
+    def on_weight_captured(self, result):
+        print(f"Weight captured: {result.weight} stable={result.stable} spread={result.spread:.2f} "
+              f"samples={result.count} dwell={result.dwell:.2f}s")
+        with self.lock:
+            if self.weight_pending != result.armed_at:
+                print("Weight capture ignored: its pipe was already graded")
+                return
+            self.weight_pending = None
+            if self.capture_timer:
+                self.capture_timer.cancel()
+            self.record_weight(self.set_weight(result.weight))
+
+    def record_no_weight(self):
+        """Grade the pipe at the scale NO DATA: it left before a weight was read"""
+        pipe = self.tracker.record_weight(0, NO_DATA)
+        self.notify("weight", NO_DATA, pipe)
+        return pipe
+
+    def record_weight(self, weight):
+        """
+        Grade the pipe at the scale with weight (display units). The weight is passed
+        in rather than read from self.weight, which the GUI's display poll also writes.
+        """
+        if weight <= 0:
+            self.notify("weight", "INVALID")
+            return None
+
+        pipe = self.tracker.at_weight
+        if pipe is None:
+            self.notify("weight", "ROW EMPTY")
+            return None
+
+        self.tracker.record_weight(weight, self.check_weight(weight, pipe.length))
+        print(f"Weight {weight} for length {pipe.length}: {pipe.weight_status}")
+
+        # Graded NORMAL: download the marking now so the print trigger only switches templates
+        if pipe.status == NORMAL:
+            pipe.job = self.print_queue.stage(PrintJob(pipe.no, pipe.text, self.font))
+        self.notify("weight", "MEASURE DONE", pipe)
+        return pipe
+
+    def trigger_printer(self, event=None):
+        pipe = self.tracker.record_print()
+        if pipe is None:
+            return None
+        try:
+            self.print_pipe(pipe)
+        except Exception as e:
+            print(e)
+            self.notify("printer", "ERROR", pipe)
+            return pipe
+        self.notify("printer", pipe.printed, pipe)
+        return pipe
+
+    def print_pipe(self, pipe):
+        """Mark (NORMAL) or clear (REJECT) the pipe at the print head and log it"""
+        status = pipe.printed
+        font_size = self.font if status == NORMAL else DEFAULT_FONT
+        staged, pipe.job = pipe.job, None
+        if staged and (status, pipe.text, font_size) == (staged.status, staged.text, staged.font):
+            self.print_queue.submit(staged)
+        elif status in (NORMAL, REJECT):
+            if staged:
+                self.print_queue.discard(staged)
+            self.print_queue.submit(PrintJob(pipe.no, pipe.text, font_size, status))
+
+        # Log it (whether printed or rejected)
+        now = time.time()
+        entry = HistoryEntry(now, time.strftime("%Y-%m-%d", time.localtime(now)), time.strftime("%H:%M:%S", time.localtime(now)),
+                             pipe.no, pipe.pipe_number, pipe.heat_number, pipe.work_order,
+                             pipe.length, self.length_unit, pipe.length_status,
+                             pipe.weight, self.weight_unit, pipe.weight_status, status, pipe.text)
+        for listener in self.history_listeners:
+            try:
+                listener(entry)
+            except Exception as e:
+                print(f"History listener error: {e}")
+
+    def on_print_done(self, job):
+        if job.ok:
+            staged = f", pre-loaded in {job.stage_time * 1000:.0f} ms" if job.stage_time else ""
+            print(f"Pipe {job.pipe_id} {job.result} in {job.service_time * 1000:.0f} ms "
+                  f"(queued {job.wait_time * 1000:.0f} ms, {job.attempts} attempt(s){staged})")
+        elif job.status == NORMAL:
+            print(f"Pipe {job.pipe_id} was not printed: EMark printer not connected or error")
+        else:
+            print(f"Pipe {job.pipe_id}: printer clear failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the measuring-and-marking line without the GUI")
+    parser.add_argument("--config", default="lib/config.json")
+    parser.add_argument("--work-order", help="CSV of work-order rows: NO, TEXT 1, TEXT 2, HEAT NUMBER, WORK ORDER, PIPE NUMBER")
+    parser.add_argument("--font", default="12x8", choices=sorted(FONT_SIZES))
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = json.load(f)
+
+    engine = LineEngine(config)
+    engine.font = FONT_SIZES[args.font]
+    engine.add_listener(lambda station, state, pipe: print(f"{station.upper()} : {state}" + (f" {pipe}" if pipe else "")))
+    engine.supervisor.add_listener(lambda name, state, message: print(f"{name.upper()} : {state} {message}"))
+    if args.work_order:
+        engine.load_work_order(read_work_order(args.work_order))
+        print(f"Loaded {len(engine.tracker)} pipes from {args.work_order}")
+
+    engine.watch_devices()
+    engine.start()
+    print("Line running, Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Excel export of the CSV production logs.
+
+Rows are streamed from the logs into an openpyxl write-only workbook, so memory
+stays flat however many days are exported. From the GUI folder:
+
+    python -m lib.export --month 2025-08 august.xlsx
+"""
+import argparse
+import csv
+import glob
+import os
+import threading
+import time
+from collections import namedtuple
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+from lib.history import HISTORY_HEADERS
+
+STATUS = HISTORY_HEADERS.index("Status")
+WEIGHT = HISTORY_HEADERS.index("Weight")
+
+# Shared styles: one object each, whatever the number of rows
+HEADER_FONT = Font(bold=True)
+WEIGHT_FILL = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")  # Rejected on weight
+REJECT_FILL = PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")  # Rejected otherwise
+
+ExportResult = namedtuple("ExportResult", ["path", "rows", "cancelled", "error", "elapsed"])
+
+
+def reject_fill(row):
+    """Highlight of a log row: None for NORMAL pipes"""
+    if len(row) <= STATUS or row[STATUS] in ("NORMAL", ""):
+        return None
+    return WEIGHT_FILL if "WEIGHT" in row[WEIGHT] else REJECT_FILL
+
+
+def read_rows(paths, progress=None):
+    """
+    Rows of the logs in order, headers skipped
+    :param progress: Called as progress(bytes_read) while reading
+    """
+    done = 0
+    for path in paths:
+        with open(path, "rb") as f:
+            header = True
+            lines = []
+            for line in f:
+                done += len(line)
+                if header:
+                    header = False
+                    continue
+                if line.strip():
+                    lines.append(line.decode("utf-8", errors="replace"))
+                if len(lines) == 256:
+                    yield from csv.reader(lines)
+                    lines = []
+                    if progress:
+                        progress(done)
+            yield from csv.reader(lines)
+            if progress:
+                progress(done)
+
+
+def month_logs(month, folder="logs"):
+    """Daily logs of a month ("2025-08"), oldest first"""
+    return sorted(glob.glob(os.path.join(folder, f"{month}-??.csv")))
+
+
+class ExcelExport(threading.Thread):
+    """
+    Writes logs to an .xlsx file on this thread.
+    Listeners are called from this thread: progress listeners as
+    listener(bytes_done, bytes_total), done listeners as listener(ExportResult).
+    cancel() stops at the next page of rows and leaves no file behind.
+    """
+    def __init__(self, sources, path, title="Printing History"):
+        """
+        :param sources: CSV log paths, exported in this order
+        :param path: .xlsx file to write
+        """
+        super().__init__(name="ExcelExport", daemon=True)
+        self.sources = list(sources)
+        self.path = path
+        self.title = title
+        self.total = sum(os.path.getsize(source) for source in self.sources)
+        self.progress_listeners = []
+        self.done_listeners = []
+        self._cancel = threading.Event()
+
+    def add_progress_listener(self, listener):
+        self.progress_listeners.append(listener)
+
+    def add_done_listener(self, listener):
+        self.done_listeners.append(listener)
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def _progress(self, done):
+        if self._cancel.is_set():
+            raise InterruptedError
+        for listener in self.progress_listeners:
+            try:
+                listener(done, self.total)
+            except Exception as e:
+                print(f"Export listener error: {e}")
+
+    def export(self):
+        """Run the export on the calling thread; returns the number of rows"""
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(self.title)
+        header = []
+        for name in HISTORY_HEADERS:
+            cell = WriteOnlyCell(sheet, value=name)
+            cell.font = HEADER_FONT
+            header.append(cell)
+        sheet.append(header)
+
+        rows = 0
+        try:
+            for row in read_rows(self.sources, self._progress):
+                fill = reject_fill(row)
+                if fill is not None:
+                    cells = []
+                    for value in row:
+                        cell = WriteOnlyCell(sheet, value=value)
+                        cell.fill = fill
+                        cells.append(cell)
+                    row = cells
+                sheet.append(row)
+                rows += 1
+        except InterruptedError:
+            sheet.close()  # End the sheet's temporary stream; no workbook is saved
+            raise
+
+        workbook.save(self.path)
+        return rows
+
+    def run(self):
+        start = time.monotonic()
+        rows, error = 0, None
+        try:
+            rows = self.export()
+        except InterruptedError:
+            pass
+        except Exception as e:
+            error = str(e)
+        result = ExportResult(self.path, rows, self.cancelled, error, time.monotonic() - start)
+        for listener in self.done_listeners:
+            try:
+                listener(result)
+            except Exception as e:
+                print(f"Export listener error: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export production logs to Excel")
+    parser.add_argument("output")
+    parser.add_argument("logs", nargs="*", help="CSV logs to export")
+    parser.add_argument("--month", help="Export every daily log of a month (YYYY-MM)")
+    parser.add_argument("--folder", default="logs")
+    args = parser.parse_args()
+
+    sources = args.logs + (month_logs(args.month, args.folder) if args.month else [])
+    if not sources:
+        parser.error("No logs to export")
+    export = ExcelExport(sources, args.output)
+    export.add_progress_listener(lambda done, total: print(f"\r{done * 100 // max(total, 1)}%", end="", flush=True))
+    export.add_done_listener(lambda result: print(f"\r{result.rows} rows from {len(sources)} logs -> {result.path} "
+                                                  f"in {result.elapsed:.1f} s" + (f" ({result.error})" if result.error else "")))
+    export.start()
+    try:
+        export.join()
+    except KeyboardInterrupt:
+        export.cancel()
+        export.join()
+
+
+if __name__ == "__main__":
+    main()
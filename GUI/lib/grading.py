@@ -0,0 +1,88 @@
+"""
+Pipe grading against API product specs.
+
+The calculated weight of a plain-end pipe is (OD - WT) * WT * 0.02466 kg per
+metre, OD and WT in mm. A Grade holds the limits of one pipe type, size and pair
+of display units, already converted: the minimum length, and the weight limits
+per unit of displayed length. Grading a pipe is then a multiply and a compare.
+Grades are cached, so they are computed once per setting, not once per pipe.
+
+    python -m lib.grading --od 177.8 --wt 10.36 --length 40.12 --units ft lbs
+"""
+import argparse
+import functools
+from collections import namedtuple
+from lib.history import LENGTH_FACTORS, WEIGHT_FACTORS
+from lib.pipeline import NORMAL
+
+UNDERLENGTH = "UNDERLENGTH"
+UNDERWEIGHT = "UNDERWEIGHT"
+OVERWEIGHT = "OVERWEIGHT"
+NO_DATA = "NO DATA"  # The pipe left the scale before a weight was read
+
+STEEL_WEIGHT = 0.02466  # kg/m per mm² of (OD - WT) * WT
+
+# Product spec -> (under, over) tolerance on the calculated weight of a single length
+WEIGHT_TOLERANCES = {"5CT": (0.035, 0.06), "5L": (0.035, 0.1)}
+
+
+class Grade(namedtuple("Grade", ["pipe_type", "min_length", "weight_per_length", "min_per_length", "max_per_length"])):
+    """Limits of one spec in display units; weights are per unit of displayed length"""
+    __slots__ = ()
+
+    def grade_length(self, length):
+        return UNDERLENGTH if length < self.min_length else NORMAL
+
+    def grade_weight(self, weight, length):
+        if weight < self.min_per_length * length:
+            return UNDERWEIGHT
+        if weight > self.max_per_length * length:
+            return OVERWEIGHT
+        return NORMAL
+
+    def weight_bounds(self, length):
+        """(calculated, min, max) weight of a pipe of this length"""
+        return self.weight_per_length * length, self.min_per_length * length, self.max_per_length * length
+
+
+@functools.lru_cache(maxsize=64)
+def grade_for(pipe_type, od, wt, min_length, length_unit="mm", weight_unit="kg"):
+    """
+    Grade of a spec, computed on the first call for each set of arguments
+    :param od, wt: mm; min_length: m; length_unit, weight_unit: display units ("ft", "lbs")
+    :raises KeyError: pipe_type is not in WEIGHT_TOLERANCES
+    """
+    under, over = WEIGHT_TOLERANCES[pipe_type]
+    length_factor = LENGTH_FACTORS.get(length_unit, 1)
+    per_length = (od - wt) * wt * STEEL_WEIGHT * WEIGHT_FACTORS.get(weight_unit, 1) / (1000 * length_factor)
+    return Grade(pipe_type, min_length * 1000 * length_factor, per_length, per_length * (1 - under), per_length * (1 + over))
+
+
+def add_spec(pipe_type, under, over):
+    """Register (or change) a product spec's weight tolerances"""
+    WEIGHT_TOLERANCES[pipe_type] = (under, over)
+    grade_for.cache_clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Length and weight limits of a pipe size")
+    parser.add_argument("--od", type=float, required=True, help="Outside diameter (mm)")
+    parser.add_argument("--wt", type=float, required=True, help="Wall thickness (mm)")
+    parser.add_argument("--min-length", type=float, default=0, help="Minimum length (m)")
+    parser.add_argument("--length", type=float, required=True, help="Pipe length in the length unit")
+    parser.add_argument("--weight", type=float, help="Measured weight to grade")
+    parser.add_argument("--units", nargs=2, default=["mm", "kg"], metavar=("LENGTH", "WEIGHT"))
+    args = parser.parse_args()
+
+    length_unit, weight_unit = args.units
+    for pipe_type in WEIGHT_TOLERANCES:
+        grade = grade_for(pipe_type, args.od, args.wt, args.min_length, length_unit, weight_unit)
+        calculated, low, high = grade.weight_bounds(args.length)
+        line = f"{pipe_type:<5} calculated {calculated:.2f}{weight_unit}  min {low:.2f}  max {high:.2f}"
+        if args.weight is not None:
+            line += f"  -> {grade.grade_length(args.length)} / {grade.grade_weight(args.weight, args.length)}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,762 @@
+"""
+Production history: the daily CSV logs (logs/YYYY-MM-DD.csv) and the SQLite
+store that keeps the same records typed and indexed.
+
+Import existing logs (only rows not imported yet), from the GUI folder:
+
+    python -m lib.history --import logs
+    python -m lib.history --search 241B73761
+"""
+import argparse
+import csv
+import datetime
+import glob
+import io
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+HISTORY_HEADERS = ["No", "Date", "Time", "Length", "Weight", "Printed Text", "Status"]
+HISTORY_DB = "logs/history.db"
+
+# Display unit -> factor from the device unit (mm from the PLC, kg from the scale)
+LENGTH_FACTORS = {"mm": 1, "m": 1 / 1000, "ft": 1 / 304.8}
+WEIGHT_FACTORS = {"kg": 1, "lbs": 2.20462262}
+
+FIELDS = ["timestamp", "date", "time", "no", "pipe_number", "heat_number", "work_order",
+          "length", "length_unit", "length_status", "weight", "weight_unit", "weight_status",
+          "status", "text"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,      -- Unix time of the print trigger
+    date TEXT NOT NULL,           -- YYYY-MM-DD, local
+    time TEXT NOT NULL,           -- HH:MM:SS, local
+    no TEXT,
+    pipe_number TEXT,
+    heat_number TEXT,
+    work_order TEXT,
+    length REAL,
+    length_unit TEXT,
+    length_status TEXT,
+    weight REAL,
+    weight_unit TEXT,
+    weight_status TEXT,
+    status TEXT,                  -- NORMAL / REJECT
+    text TEXT,
+    source TEXT,                  -- Daily CSV log the row was written to (file name)
+    source_offset INTEGER         -- Byte offset of the row in that log
+);
+CREATE INDEX IF NOT EXISTS history_timestamp ON history (timestamp);
+CREATE INDEX IF NOT EXISTS history_heat_number ON history (heat_number, timestamp);
+CREATE INDEX IF NOT EXISTS history_work_order ON history (work_order, timestamp);
+CREATE INDEX IF NOT EXISTS history_pipe_number ON history (pipe_number, timestamp);
+CREATE INDEX IF NOT EXISTS history_no ON history (no, timestamp);
+CREATE TABLE IF NOT EXISTS imports (
+    file TEXT PRIMARY KEY,
+    rows INTEGER,
+    imported REAL,
+    offset INTEGER                -- Bytes of the log imported so far
+);
+"""
+
+# A log row is stored once: recorded live (CsvLogWriter reports where it wrote
+# it) and found again when its log is imported, it has the same source and offset.
+# Rows without a source (stored before sources were kept, or whose CSV write
+# failed) do not conflict. (date, time, no) is only a lookup index: two pipes can
+# share it.
+INDEXES = """
+CREATE UNIQUE INDEX IF NOT EXISTS history_source ON history (source, source_offset);
+CREATE INDEX IF NOT EXISTS history_record ON history (date, time, no);
+"""
+
+# Search index: every 3-character sequence of the numbers (FTS5 trigram
+# tokenizer), so any part of a number is found, not just its start. It indexes
+# the history table in place and the triggers keep it current. The pipe number
+# is usually logged in the No column.
+SEARCH_COLUMNS = ["heat_number", "work_order", "pipe_number", "no"]
+SEARCH_SCHEMA = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS history_search USING fts5(
+    {', '.join(SEARCH_COLUMNS)}, content='history', content_rowid='id', tokenize='trigram');
+CREATE TRIGGER IF NOT EXISTS history_search_insert AFTER INSERT ON history BEGIN
+    INSERT INTO history_search (rowid, {', '.join(SEARCH_COLUMNS)})
+    VALUES (new.id, {', '.join('new.' + column for column in SEARCH_COLUMNS)});
+END;
+CREATE TRIGGER IF NOT EXISTS history_search_delete AFTER DELETE ON history BEGIN
+    INSERT INTO history_search (history_search, rowid, {', '.join(SEARCH_COLUMNS)})
+    VALUES ('delete', old.id, {', '.join('old.' + column for column in SEARCH_COLUMNS)});
+END;
+"""
+TRIGRAM = 3  # Shortest text the search index can look up
+
+COLUMNS = FIELDS + ["source", "source_offset"]
+# Live rows replace what a log position held before: if a crash lost the end of a
+# log, the rows written there since are the ones in the file
+INSERT = f"INSERT OR REPLACE INTO history ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+# Imported rows are skipped if their position is stored, or if the same pipe was
+# stored without a source before sources were kept
+INSERT_IMPORT = (f"INSERT OR IGNORE INTO history ({', '.join(COLUMNS)}) SELECT {', '.join('?' * len(COLUMNS))} "
+                 "WHERE NOT EXISTS (SELECT 1 FROM history WHERE date = ? AND time = ? AND no IS ? AND text IS ? "
+                 "AND source IS NULL)")
+
+# "41.76 (NORMAL)" as logged in the Length / Weight columns
+MEASUREMENT = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*\(\s*([A-Z]+(?: [A-Z]+)*)\s*\)\s*$")
+HEAT_NUMBER = re.compile(r"\bHN\s+(\S+)")
+VALUE_UNIT = re.compile(r"(?<![\d.])(-?\d+(?:\.\d+)?)\s*([A-Za-z]+)")  # "12262.13mm" in the marking
+WORK_ORDER = re.compile(r"\bWO\s+(\S+)(?:\s+(\S+))?\s*$")
+
+
+class HistoryEntry(namedtuple("HistoryEntry", FIELDS)):
+    """One printed or rejected pipe. length/weight are floats in length_unit/weight_unit."""
+    __slots__ = ()
+
+    def row(self):
+        """The record as the CSV log and the History table show it"""
+        return [self.no, self.date, self.time,
+                f"{self.length} ({self.length_status})", f"{self.weight} ({self.weight_status})",
+                self.text, self.status]
+
+
+def strip_label(value, label):
+    """Work-order cells are typed as "HN 241B11000-1" / "WO 04-0475": keep the number"""
+    return re.sub(rf"^\s*{label}\b[\s:.]*", "", value or "", flags=re.IGNORECASE).strip()
+
+
+def parse_measurement(text):
+    """ "41.76 (NORMAL)" -> (41.76, "NORMAL"); (None, None) if it does not parse"""
+    match = MEASUREMENT.match(text or "")
+    return (float(match.group(1)), match.group(2)) if match else (None, None)
+
+
+def _units(text):
+    """Value -> unit of every number printed with a unit in the marking, first one wins"""
+    units = {}
+    for value, unit in VALUE_UNIT.findall(text):
+        units.setdefault(value, unit)
+    return units
+
+
+def entry_from_row(row):
+    """
+    HistoryEntry from a CSV log row (No, Date, Time, Length, Weight, Printed Text, Status).
+    HN, WO and pipe number are read back out of the printed text.
+    :return: HistoryEntry, or None if the row is not a history record
+    """
+    if len(row) < len(HISTORY_HEADERS):
+        return None
+    no, date, time_str, length_text, weight_text, text, status = row[:7]
+    try:
+        timestamp = datetime.datetime(*map(int, date.split("-") + time_str.split(":"))).timestamp()
+    except (ValueError, TypeError):
+        return None
+    length, length_status = parse_measurement(length_text)
+    weight, weight_status = parse_measurement(weight_text)
+    heat_number = HEAT_NUMBER.search(text)
+    work_order = WORK_ORDER.search(text)
+    units = _units(text)
+    return HistoryEntry(
+        timestamp, date, time_str, no,
+        (work_order.group(2) or "") if work_order else "",
+        heat_number.group(1) if heat_number else "",
+        work_order.group(1) if work_order else "",
+        length, units.get(length_text.split("(")[0].strip()), length_status,
+        weight, units.get(weight_text.split("(")[0].strip()), weight_status,
+        status, text)
+
+
+# CsvLogWriter durability policies
+FLUSH_RECORD = "record"      # Flush after every record (the file is current after each pipe)
+FLUSH_INTERVAL = "interval"  # Flush at most every interval seconds
+FLUSH_SHUTDOWN = "shutdown"  # Flush when the writer stops (or the OS buffer fills)
+
+
+class CsvLogWriter(threading.Thread):
+    """
+    Daily CSV log (logs/YYYY-MM-DD.csv) written from its own thread.
+    The day's file stays open; a record dated another day closes it and opens
+    (creating, with header) that day's file. add() only queues the row, so a slow
+    disk or virus scanner delays the log, never the line; pending() is the queue
+    depth and max_pending its high-water mark.
+    Listeners are called from this thread as listener(path) after each flush; row
+    listeners as listener(entry, file name, byte offset) for every row added with
+    an entry, once it is written (file name and offset None if the write failed).
+    """
+    def __init__(self, folder="logs", flush=FLUSH_RECORD, interval=0.5, warn_depth=100):
+        """
+        :param folder: Folder of the daily files
+        :param flush: FLUSH_RECORD, FLUSH_INTERVAL or FLUSH_SHUTDOWN
+        :param interval: Seconds between flushes for FLUSH_INTERVAL
+        :param warn_depth: Print a warning when this many rows are waiting
+        """
+        if flush not in (FLUSH_RECORD, FLUSH_INTERVAL, FLUSH_SHUTDOWN):
+            raise ValueError(f"Unknown flush policy {flush}")
+        super().__init__(name="CsvLogWriter", daemon=True)
+        self.folder = folder
+        self.flush_policy = flush
+        self.interval = interval
+        self.warn_depth = warn_depth
+        self.rows = queue.Queue()
+        self.file = None
+        self.line = io.StringIO()  # Each row is formatted here, so its size in bytes is known
+        self.writer = csv.writer(self.line)
+        self.offset = 0  # Bytes in the open file
+        self.date = None
+        self.unflushed = 0
+        self.written = 0
+        self.flushes = 0
+        self.max_pending = 0
+        self.lag = 0.0  # Seconds the last written row waited in the queue
+        self.listeners = []
+        self.row_listeners = []
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def add_row_listener(self, listener):
+        self.row_listeners.append(listener)
+
+    def add(self, row, entry=None):
+        """
+        Queue one history row (No, Date, Time, Length, Weight, Printed Text, Status)
+        :param entry: HistoryEntry of the row, handed to the row listeners once written
+        """
+        self.rows.put((time.monotonic(), row, entry))
+        depth = self.rows.qsize()
+        if depth > self.max_pending:
+            self.max_pending = depth
+            if depth == self.warn_depth:
+                print(f"CSV log is falling behind: {depth} rows waiting")
+
+    def pending(self):
+        return self.rows.qsize()
+
+    def stop(self):
+        """Write and flush what is queued, close the file and end the thread"""
+        self.rows.put(None)
+        if self.is_alive():
+            self.join(timeout=5)
+
+    def _open(self, date):
+        self._close()
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, f"{date}.csv")
+        self.file = open(path, "a", newline="", encoding="utf-8")
+        self.offset = os.path.getsize(path)
+        self.date = date
+        if self.offset == 0:
+            self._writerow(HISTORY_HEADERS)
+
+    def _writerow(self, row):
+        """Write one row; returns its byte offset in the file"""
+        self.line.seek(0)
+        self.line.truncate()
+        self.writer.writerow(row)
+        line = self.line.getvalue()
+        self.file.write(line)
+        offset = self.offset
+        self.offset += len(line.encode("utf-8"))
+        return offset
+
+    def _flush(self):
+        if self.file and self.unflushed:
+            self.file.flush()
+            self.unflushed = 0
+            self.flushes += 1
+            for listener in self.listeners:
+                try:
+                    listener(self.file.name)
+                except Exception as e:
+                    print(f"Log listener error: {e}")
+
+    def _close(self):
+        if self.file:
+            self._flush()
+            self.file.close()
+            self.file = None
+
+    def _write(self, queued, row, entry):
+        date = row[1] or datetime.date.today().isoformat()
+        if date != self.date or self.file is None:
+            self._open(date)
+        offset = self._writerow(row)
+        self.unflushed += 1
+        self.written += 1
+        self.lag = time.monotonic() - queued
+        return os.path.basename(self.file.name), offset
+
+    def _written(self, entry, source, offset):
+        for listener in self.row_listeners:
+            try:
+                listener(entry, source, offset)
+            except Exception as e:
+                print(f"Log row listener error: {e}")
+
+    def run(self):
+        last_flush = time.monotonic()
+        running = True
+        while running:
+            timeout = None
+            if self.flush_policy == FLUSH_INTERVAL and self.unflushed:
+                timeout = max(0.0, last_flush + self.interval - time.monotonic())
+            try:
+                batch = [self.rows.get(timeout=timeout)]
+            except queue.Empty:
+                batch = []
+            while True:
+                try:
+                    batch.append(self.rows.get_nowait())
+                except queue.Empty:
+                    break
+
+            for item in batch:
+                if item is None:
+                    running = False
+                    continue
+                source = offset = None
+                try:
+                    source, offset = self._write(*item)
+                except Exception as e:
+                    print(f"Error saving to CSV: {e}")
+                    self.date = None  # Reopen on the next row
+                if item[2] is not None:
+                    self._written(item[2], source, offset)
+
+            now = time.monotonic()
+            if self.flush_policy == FLUSH_RECORD or (self.flush_policy == FLUSH_INTERVAL and now - last_flush >= self.interval):
+                try:
+                    self._flush()
+                except Exception as e:
+                    print(f"Error saving to CSV: {e}")
+                last_flush = now
+        try:
+            self._close()
+        except Exception as e:
+            print(f"Error saving to CSV: {e}")
+
+
+class CsvLogReader(threading.Thread):
+    """
+    Pages of a CSV log, read on this thread.
+    open(path) indexes the file: one pass over its lines keeps the byte offset of
+    every page_size-th row, so only the offsets stay in memory however long the log
+    is. page(number) then parses just that page. refresh() indexes rows appended
+    since the last pass (the file is read up to its last complete line).
+
+    Listeners are called from this thread:
+      count listeners as listener(path, rows) after each (re)index,
+      page listeners as listener(path, number, rows) with a list of row lists.
+    Rows are lines of the log: log fields never contain line breaks.
+    """
+    def __init__(self, page_size=256):
+        super().__init__(name="CsvLogReader", daemon=True)
+        self.page_size = page_size
+        self.requests = queue.Queue()
+        self.count_listeners = []
+        self.page_listeners = []
+        self.path = None
+        self.offsets = []  # Byte offset of rows 0, page_size, 2 * page_size, ...
+        self.rows = 0
+        self.end = 0       # Byte offset just past the last indexed line
+
+    def add_count_listener(self, listener):
+        self.count_listeners.append(listener)
+
+    def add_page_listener(self, listener):
+        self.page_listeners.append(listener)
+
+    def open(self, path):
+        self.requests.put(("open", path))
+
+    def refresh(self):
+        self.requests.put(("refresh", None))
+
+    def page(self, number):
+        self.requests.put(("page", number))
+
+    def stop(self):
+        self.requests.put(None)
+
+    def _index(self):
+        with open(self.path, "rb") as f:
+            f.seek(self.end)
+            if self.end == 0:
+                f.readline()  # Header
+                self.end = f.tell()
+            position = self.end
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Still being written
+                if line.strip():
+                    if self.rows % self.page_size == 0:
+                        self.offsets.append(position)
+                    self.rows += 1
+                position += len(line)
+            self.end = position
+
+    def _page(self, number):
+        if number >= len(self.offsets):
+            return []
+        lines = []
+        with open(self.path, "rb") as f:
+            f.seek(self.offsets[number])
+            for line in f:
+                if not line.endswith(b"\n") or len(lines) == self.page_size:
+                    break
+                if line.strip():
+                    lines.append(line.decode("utf-8", errors="replace"))
+        return list(csv.reader(lines))
+
+    def run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                break
+            kind, value = request
+            try:
+                if kind == "open":
+                    self.path, self.offsets, self.rows, self.end = value, [], 0, 0
+                if kind in ("open", "refresh"):
+                    if self.path is not None and os.path.isfile(self.path):
+                        self._index()
+                    for listener in self.count_listeners:
+                        listener(self.path, self.rows)
+                elif kind == "page" and self.path is not None:
+                    rows = self._page(value)
+                    for listener in self.page_listeners:
+                        listener(self.path, value, rows)
+            except Exception as e:
+                print(f"Log reader error: {e}")
+
+
+def connect(path=HISTORY_DB):
+    """Connection to the history database, created (WAL mode) if needed"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # WAL: a commit survives a crash of the app, not of the OS
+    conn.execute("PRAGMA recursive_triggers=ON")  # Rows deleted by INSERT OR REPLACE leave the search index too
+    conn.executescript(SCHEMA)
+    # Databases of older versions
+    if "offset" not in [column[1] for column in conn.execute("PRAGMA table_info(imports)")]:
+        conn.execute("ALTER TABLE imports ADD COLUMN offset INTEGER")
+    if "source" not in [column[1] for column in conn.execute("PRAGMA table_info(history)")]:
+        conn.execute("ALTER TABLE history ADD COLUMN source TEXT")
+        conn.execute("ALTER TABLE history ADD COLUMN source_offset INTEGER")
+    if any(index[1] == "history_record" and index[2] for index in conn.execute("PRAGMA index_list(history)")):
+        conn.execute("DROP INDEX history_record")  # Was unique
+    conn.executescript(INDEXES)
+    indexed = [column[1] for column in conn.execute("PRAGMA table_info(history_search)")]
+    if indexed and indexed != SEARCH_COLUMNS:  # Built over other columns: index again
+        conn.executescript("DROP TRIGGER IF EXISTS history_search_insert; DROP TRIGGER IF EXISTS history_search_delete;"
+                           "DROP TABLE history_search;")
+        indexed = []
+    if not indexed:
+        try:
+            with conn:
+                conn.executescript(SEARCH_SCHEMA)
+                conn.execute("INSERT INTO history_search (history_search) VALUES ('rebuild')")  # Rows stored before
+        except sqlite3.OperationalError as e:
+            print(f"History search index not available ({e}): searches match the start of numbers only")
+    return conn
+
+
+def prefix_range(text):
+    """(low, high) such that low <= value < high for every value starting with text"""
+    return text, text[:-1] + chr(ord(text[-1]) + 1)
+
+
+class HistoryStore(threading.Thread):
+    """
+    Production history in SQLite.
+    add() only queues the entry: the writer thread inserts everything that queued
+    up in one transaction, so the station threads never wait for the disk.
+    Queries open one connection per calling thread; in WAL mode they read while
+    the writer writes.
+    """
+    def __init__(self, path=HISTORY_DB, batch_size=500, folder=None):
+        """
+        :param path: Database file
+        :param batch_size: Most entries inserted per transaction
+        :param folder: Daily CSV logs to catch up on (rows not in the store yet)
+            when the thread starts, before the queued entries
+        """
+        super().__init__(name="HistoryStore", daemon=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.folder = folder
+        self.entries = queue.Queue()
+        self.local = threading.local()
+        self.listeners = []
+        self.import_listeners = []
+        self.connection()  # Create the database before the first query
+
+    def connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = connect(self.path)
+        return conn
+
+    def add_listener(self, listener):
+        """listener(entries) is called from the writer thread after each committed batch"""
+        self.listeners.append(listener)
+
+    def add_import_listener(self, listener):
+        """
+        listener(imported) is called from the writer thread once the logs are imported
+        ({file: new entries}, empty without a folder), before any queued entry is inserted
+        """
+        self.import_listeners.append(listener)
+
+    def add(self, entry, source=None, offset=None):
+        """
+        Queue an entry; a CsvLogWriter row listener
+        :param source, offset: Log file name and byte offset the row was written at, if it was
+        """
+        self.entries.put((entry, source, offset))
+
+    def add_many(self, entries):
+        """Insert entries (not in any log) now, in one transaction on the calling thread"""
+        self._insert([(entry, None, None) for entry in entries])
+
+    def _insert(self, records):
+        conn = self.connection()
+        with conn:
+            conn.executemany(INSERT, [tuple(entry) + (source, offset) for entry, source, offset in records])
+
+    def pending(self):
+        return self.entries.qsize()
+
+    def stop(self):
+        """Write what is queued, then end the thread"""
+        self.entries.put(None)
+        if self.is_alive():
+            self.join(timeout=5)
+
+    def run(self):
+        imported = self.import_logs(self.folder) if self.folder else {}
+        if imported:
+            print(f"History: {sum(imported.values())} entries imported from {len(imported)} logs")
+        for listener in self.import_listeners:
+            try:
+                listener(imported)
+            except Exception as e:
+                print(f"History import listener error: {e}")
+        running = True
+        while running:
+            batch = [self.entries.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.entries.get_nowait())
+                except queue.Empty:
+                    break
+            running = None not in batch
+            batch = [entry for entry in batch if entry is not None]
+            if not batch:
+                continue
+            try:
+                self._insert(batch)
+            except Exception as e:
+                print(f"History store error: {e}")
+                continue
+            entries = [entry for entry, _, _ in batch]
+            for listener in self.listeners:
+                try:
+                    listener(entries)
+                except Exception as e:
+                    print(f"History listener error: {e}")
+
+    # --- Queries ---
+
+    @staticmethod
+    def _where(heat_number=None, work_order=None, pipe_number=None, status=None, since=None, until=None):
+        clauses, params = [], []
+        for column, value in (("heat_number", heat_number), ("work_order", work_order),
+                              ("pipe_number", pipe_number), ("status", status)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def query(self, limit=None, offset=0, newest_first=False, **filters):
+        """
+        Entries matching all given filters, oldest first
+        :param filters: heat_number, work_order, pipe_number, status (exact), since/until (Unix time)
+        """
+        where, params = self._where(**filters)
+        sql = f"SELECT {', '.join(FIELDS)} FROM history{where} ORDER BY timestamp{' DESC' if newest_first else ''}, id"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        return [HistoryEntry(*row) for row in self.connection().execute(sql, params)]
+
+    def count(self, **filters):
+        where, params = self._where(**filters)
+        return self.connection().execute(f"SELECT COUNT(*) FROM history{where}", params).fetchone()[0]
+
+    BROAD_SEARCH = 20000  # Matches from which search() walks the history newest first
+
+    def search(self, text, limit=500):
+        """
+        Entries whose heat number, work order, pipe number or No contains text
+        (starts with it, for texts shorter than 3 characters), newest first.
+        "HN ..." / "WO ..." only look at that column. Without FTS5 in the SQLite build only the
+        start of the numbers is matched.
+        """
+        text = text.strip()
+        columns = SEARCH_COLUMNS
+        for label, column in (("HN", "heat_number"), ("WO", "work_order")):
+            number = strip_label(text, label)
+            if number != text:
+                text, columns = number, [column]
+                break
+        if not text:
+            return []
+        conn = self.connection()
+        if len(text) >= TRIGRAM and self.searchable(conn):
+            return self._search_index(conn, text, columns, limit)
+        # Range terms rather than LIKE, so each column's index is used
+        where = " OR ".join(f"({column} >= ? AND {column} < ?)" for column in columns)
+        params = list(prefix_range(text)) * len(columns)
+        # A short prefix can match most of the history: sorting every match would
+        # take longer than walking the newest entries until limit of them match
+        broad = conn.execute(f"SELECT COUNT(*) FROM (SELECT 1 FROM history WHERE {where} LIMIT ?)",
+                             params + [self.BROAD_SEARCH]).fetchone()[0] == self.BROAD_SEARCH
+        source = "history INDEXED BY history_timestamp" if broad else "history"
+        sql = f"SELECT {', '.join(FIELDS)} FROM {source} WHERE {where} ORDER BY timestamp DESC, id DESC LIMIT ?"
+        return [HistoryEntry(*row) for row in conn.execute(sql, params + [limit])]
+
+    @staticmethod
+    def searchable(conn):
+        """Whether the database has the search index (SQLite built with FTS5)"""
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'history_search'").fetchone() is not None
+
+    def _search_index(self, conn, text, columns, limit):
+        """search() through the trigram index: text anywhere in the numbers"""
+        phrase = text.replace('"', '""')
+        match = f"{{{' '.join(columns)}}} : \"{phrase}\""
+        broad = conn.execute("SELECT COUNT(*) FROM (SELECT 1 FROM history_search WHERE history_search MATCH ? LIMIT ?)",
+                             (match, self.BROAD_SEARCH)).fetchone()[0] == self.BROAD_SEARCH
+        if broad:
+            # As for short prefixes: walk the newest entries (LIKE is case-insensitive, as the index is)
+            pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            where = " OR ".join(f"{column} LIKE ? ESCAPE '\\'" for column in columns)
+            sql = (f"SELECT {', '.join(FIELDS)} FROM history INDEXED BY history_timestamp WHERE {where} "
+                   "ORDER BY timestamp DESC, id DESC LIMIT ?")
+            params = [pattern] * len(columns) + [limit]
+        else:
+            sql = (f"SELECT {', '.join(FIELDS)} FROM history WHERE id IN "
+                   "(SELECT rowid FROM history_search WHERE history_search MATCH ?) ORDER BY timestamp DESC, id DESC LIMIT ?")
+            params = [match, limit]
+        return [HistoryEntry(*row) for row in conn.execute(sql, params)]
+
+    def summary(self, **filters):
+        """{status: count} of the matching entries"""
+        where, params = self._where(**filters)
+        return dict(self.connection().execute(f"SELECT status, COUNT(*) FROM history{where} GROUP BY status", params))
+
+    # --- Import ---
+
+    def import_csv(self, path):
+        """
+        Import the rows appended to a daily CSV log since its last import. Rows the
+        engine already stored live are skipped (same source and offset, see INDEXES).
+        :return: Number of new entries, None if the log has not grown
+        """
+        name = os.path.basename(path)
+        conn = self.connection()
+        imported = conn.execute("SELECT rows, offset FROM imports WHERE file = ?", (name,)).fetchone()
+        rows, offset = imported if imported else (0, 0)
+        offset = offset or 0  # Imported whole by an older version: read it again, duplicates are ignored
+        size = os.path.getsize(path)
+        if size == offset:
+            return None
+        if size < offset:  # The log was rewritten
+            offset = 0
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read(size - offset)
+        data = data[:data.rfind(b"\n") + 1]  # A row still being written is left for next time
+        if not data:
+            return None
+        lines = data.split(b"\n")[:-1]
+        offsets = []
+        position = offset
+        for line in lines:
+            offsets.append(position)
+            position += len(line) + 1
+        reader = csv.reader(line.decode("utf-8", errors="replace") for line in lines)
+        records = []
+        for row_offset, row in zip(offsets, reader):
+            entry = entry_from_row(row)  # None for the header
+            if entry is not None:
+                records.append(tuple(entry) + (name, row_offset, entry.date, entry.time, entry.no, entry.text))
+        with conn:
+            # rowcount, not total_changes: the rows the triggers write into the search index are not entries
+            added = conn.executemany(INSERT_IMPORT, records).rowcount
+            conn.execute("INSERT OR REPLACE INTO imports (file, rows, imported, offset) VALUES (?, ?, ?, ?)",
+                         (name, rows + len(records), time.time(), offset + len(data)))
+        return added
+
+    def import_logs(self, folder="logs"):
+        """Import what is new in every logs/YYYY-MM-DD.csv; returns {file: new entries}"""
+        imported = {}
+        for path in sorted(glob.glob(os.path.join(folder, "????-??-??.csv"))):
+            try:
+                count = self.import_csv(path)
+            except Exception as e:
+                print(f"Failed to import {path}: {e}")
+                continue
+            if count is not None:
+                imported[os.path.basename(path)] = count
+        return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Production history database")
+    parser.add_argument("--db", default=HISTORY_DB)
+    parser.add_argument("--import", dest="folder", help="Import the daily CSV logs of this folder")
+    parser.add_argument("--heat-number")
+    parser.add_argument("--work-order")
+    parser.add_argument("--pipe-number")
+    parser.add_argument("--search", help="Heat number, work order, pipe number or No, or any part of one")
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    store = HistoryStore(args.db)
+    if args.folder:
+        for name, count in store.import_logs(args.folder).items():
+            print(f"Imported {count} entries from {name}")
+
+    filters = {"heat_number": args.heat_number, "work_order": args.work_order, "pipe_number": args.pipe_number}
+    if args.search:
+        start = time.perf_counter()
+        entries = store.search(args.search, args.limit)
+        elapsed = time.perf_counter() - start
+        for entry in entries:
+            print(", ".join(str(value) for value in entry.row()))
+        print(f"{len(entries)} entries ({elapsed * 1000:.1f} ms)")
+    elif any(filters.values()):
+        start = time.perf_counter()
+        entries = store.query(limit=args.limit, **filters)
+        total = store.count(**filters)
+        elapsed = time.perf_counter() - start
+        for entry in entries:
+            print(", ".join(str(value) for value in entry.row()))
+        print(f"{total} entries ({elapsed * 1000:.1f} ms)")
+    else:
+        print(f"{store.count()} entries in {args.db}: {store.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+import os
+from collections import OrderedDict
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QBrush, QColor
+from PyQt5.QtWidgets import QHeaderView
+from lib.history import CsvLogReader, HISTORY_HEADERS
+from lib.signals import LogReaderSignals
+
+color_green = "#00aa00"
+color_red = "#D73232"
+
+
+def set_uniform_rows(view, lines=2, padding=8):
+    """
+    Give every row of view the same fixed height, enough for lines lines of its font.
+    Qt then never measures row contents, so updating a cell costs the same at 100
+    or 20,000 rows (resizeRowsToContents re-measures every row). ResizeToContents
+    columns are sized from the visible rows only, for the same reason.
+    """
+    height = view.fontMetrics().lineSpacing() * lines + padding
+    vheader = view.verticalHeader()
+    vheader.setSectionResizeMode(QHeaderView.Fixed)
+    vheader.setDefaultSectionSize(height)
+    view.horizontalHeader().setResizeContentsPrecision(0)
+    view.setWordWrap(True)
+    return height
+
+
+class InputTableModel(QAbstractTableModel):
+    """
+    Work-order grid (tableWidget_input). Cells are kept column by column as plain
+    strings; only rows that hold data are stored, plus spare_rows blank rows at the
+    end for typing and pasting. Editing or pasting into a spare row appends it.
+    """
+    HEADERS = ["NO", "TEXT 1", "TEXT 2", "HEAT NUMBER", "WORK ORDER", "PIPE NUMBER"]
+
+    # row, column of an edited cell (column -1: several columns of the row changed)
+    cell_changed = pyqtSignal(int, int)
+
+    def __init__(self, spare_rows=20, parent=None):
+        super().__init__(parent)
+        self.spare_rows = spare_rows
+        self.columns = [[] for _ in self.HEADERS]
+
+    @property
+    def rows(self):
+        """Rows holding data (the spare rows excluded)"""
+        return len(self.columns[0])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.rows + self.spare_rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            return self.HEADERS[section] if orientation == Qt.Horizontal else str(section + 1)
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        return None
+
+    def flags(self, index):
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return self.value(index.row(), index.column())
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        return None
+
+    def value(self, row, column):
+        return self.columns[column][row] if row < self.rows else ""
+
+    def row_values(self, row):
+        return [column[row] if row < self.rows else "" for column in self.columns]
+
+    def iter_rows(self):
+        return zip(*self.columns)
+
+    def _grow(self, rows):
+        """Make sure rows data rows exist; the view gains as many new spare rows"""
+        if rows <= self.rows:
+            return
+        first = self.rows + self.spare_rows
+        self.beginInsertRows(QModelIndex(), first, rows + self.spare_rows - 1)
+        for column in self.columns:
+            column.extend([""] * (rows - len(column)))
+        self.endInsertRows()
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid():
+            return False
+        row, col = index.row(), index.column()
+        value = "" if value is None else str(value)
+        if value == self.value(row, col):
+            return False
+        self._grow(row + 1)
+        self.columns[col][row] = value
+        self.dataChanged.emit(index, index)
+        self.cell_changed.emit(row, col)
+        return True
+
+    def set_block(self, row, col, block):
+        """Paste: write a list of rows (lists of strings) with its top-left cell at row, col"""
+        block = [cells[:len(self.HEADERS) - col] for cells in block]
+        if not block or col >= len(self.HEADERS):
+            return
+        self._grow(row + len(block))
+        width = max(len(cells) for cells in block)
+        for i, cells in enumerate(block):
+            for j, text in enumerate(cells):
+                self.columns[col + j][row + i] = text
+        self.dataChanged.emit(self.index(row, col), self.index(row + len(block) - 1, col + width - 1))
+        for i in range(len(block)):
+            self.cell_changed.emit(row + i, -1)
+
+    def load(self, rows):
+        """Replace everything with a list of rows in one reset (large work orders)"""
+        self.beginResetModel()
+        self.columns = [[] for _ in self.HEADERS]
+        for cells in rows:
+            cells = list(cells[:len(self.HEADERS)]) + [""] * (len(self.HEADERS) - len(cells))
+            for column, text in zip(self.columns, cells):
+                column.append(text)
+        self.endResetModel()
+
+    def remove_rows(self, rows):
+        for row in sorted(set(rows), reverse=True):
+            if row >= self.rows:
+                continue
+            self.beginRemoveRows(QModelIndex(), row, row)
+            for column in self.columns:
+                del column[row]
+            self.endRemoveRows()
+
+
+class HomeTableModel(QAbstractTableModel):
+    """
+    Read-only view of a PipeTracker (tableWidget_home): one row per pipe.
+    Changes go through this model so only the touched cells are repainted.
+    """
+    HEADERS = ["Printing Text", "Length", "Weight", "Status Print"]
+    TEXT, LENGTH, WEIGHT, STATUS = range(4)
+
+    def __init__(self, tracker, parent=None):
+        super().__init__(parent)
+        self.tracker = tracker
+        self.green = QBrush(QColor(color_green))
+        self.red = QBrush(QColor(color_red))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.tracker)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            return self.HEADERS[section] if orientation == Qt.Horizontal else str(section + 1)
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        pipe = self.tracker.get(index.row())
+        if pipe is None:
+            return None
+        col = index.column()
+        if role == Qt.DisplayRole:
+            return self.display(pipe, col)
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role == Qt.BackgroundRole:
+            return self.background(pipe, col)
+        return None
+
+    def display(self, pipe, col):
+        if col == self.TEXT:
+            return pipe.text
+        if col == self.LENGTH:
+            return f"{pipe.length}\n({pipe.length_status})" if pipe.length_status is not None else None
+        if col == self.WEIGHT:
+            return f"{pipe.weight}\n({pipe.weight_status})" if pipe.weight_status is not None else None
+        if pipe.printed:
+            return pipe.printed
+        return f"WAITING ({pipe.status})" if pipe.status else None
+
+    def background(self, pipe, col):
+        if col == self.TEXT:
+            return self.green if pipe is self.tracker.last_measured else None
+        if col == self.LENGTH:
+            if pipe.length_status is None:
+                return None
+            return self.green if pipe.length_status == "NORMAL" else self.red
+        if col == self.WEIGHT:
+            if pipe.weight_status is None:
+                return None
+            return self.green if pipe.status == "NORMAL" else self.red
+        if pipe.printed:
+            return self.green if pipe.printed == "NORMAL" else self.red
+        return None
+
+    def refresh(self, pipe, first=0, last=None):
+        """Repaint columns first..last of one pipe's row"""
+        if pipe is None:
+            return
+        last = len(self.HEADERS) - 1 if last is None else last
+        self.dataChanged.emit(self.index(pipe.row, first), self.index(pipe.row, last))
+
+    def load(self, templates):
+        """PipeTracker.load as one model reset"""
+        self.beginResetModel()
+        self.tracker.load(templates)
+        self.endResetModel()
+
+    def set_template(self, row, no, template, *info):
+        """PipeTracker.set_template, inserting the view rows it creates"""
+        count = len(self.tracker)
+        if row >= count:
+            self.beginInsertRows(QModelIndex(), count, row)
+            pipe = self.tracker.set_template(row, no, template, *info)
+            self.endInsertRows()
+        else:
+            pipe = self.tracker.set_template(row, no, template, *info)
+            self.refresh(pipe, self.TEXT, self.TEXT)
+        return pipe
+
+    def remove_rows(self, rows):
+        """PipeTracker.remove_rows with the matching view updates"""
+        for row in sorted(set(rows), reverse=True):
+            if row >= len(self.tracker):
+                continue
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self.tracker.remove_rows([row])
+            self.endRemoveRows()
+
+
+class HistoryTableModel(QAbstractTableModel):
+    """
+    History tab (tableWidget): one CSV log, indexed and parsed page by page on a
+    CsvLogReader thread. Rows are handed to the view a page at a time through
+    canFetchMore/fetchMore, and only the max_pages most recently used pages stay
+    in memory; a row whose page was dropped is blank until the reader brings it back.
+    """
+    HEADERS = HISTORY_HEADERS
+
+    def __init__(self, page_size=256, max_pages=16, parent=None):
+        super().__init__(parent)
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.path = None
+        self.total = 0       # Rows in the log (indexed so far)
+        self.fetched = 0     # Rows handed to the view
+        self.pages = OrderedDict()  # page number -> rows, least recently used first
+        self.requested = set()
+        self.reader = CsvLogReader(page_size)
+        self.reader_signals = LogReaderSignals().attach(self.reader)
+        self.reader_signals.counted.connect(self.on_counted)
+        self.reader_signals.page_loaded.connect(self.on_page)
+        self.reader.start()
+
+    def load(self, path):
+        """Show another log; its rows arrive once the reader has indexed it"""
+        self.beginResetModel()
+        self.path = path
+        self.total = self.fetched = 0
+        self.pages.clear()
+        self.requested.clear()
+        self.endResetModel()
+        self.reader.open(path)
+
+    def refresh(self):
+        """Pick up rows appended to the log"""
+        self.reader.refresh()
+
+    def is_showing(self, path):
+        return self.path is not None and os.path.abspath(path) == os.path.abspath(self.path)
+
+    def stop(self):
+        self.reader.stop()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.fetched
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            return self.HEADERS[section] if orientation == Qt.Horizontal else str(section + 1)
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.fetched < self.total
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(self.page_size, self.total - self.fetched)
+        if parent.isValid() or count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.fetched, self.fetched + count - 1)
+        self.fetched += count
+        self.endInsertRows()
+
+    def row(self, row):
+        """Cells of a row, or None while its page is being read"""
+        number = row // self.page_size
+        rows = self.pages.get(number)
+        if rows is None:
+            if number not in self.requested:
+                self.requested.add(number)
+                self.reader.page(number)
+            return None
+        self.pages.move_to_end(number)
+        offset = row - number * self.page_size
+        return rows[offset] if offset < len(rows) else None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            cells = self.row(index.row())
+            return cells[index.column()] if cells and index.column() < len(cells) else None
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        return None
+
+    def on_counted(self, path, rows):
+        if path != self.path or rows == self.total:
+            return
+        previous, self.total = self.total, rows
+        if previous % self.page_size:
+            # The last page was read while it was still filling up
+            number = previous // self.page_size
+            self.pages.pop(number, None)
+            self.requested.discard(number)
+        if self.fetched == previous and previous:
+            # Everything was shown: show appended rows right away, like a live log
+            self.beginInsertRows(QModelIndex(), previous, rows - 1)
+            self.fetched = rows
+            self.endInsertRows()
+        elif self.fetched == 0:
+            self.fetchMore()
+
+    def on_page(self, path, number, rows):
+        if path != self.path:
+            return
+        self.requested.discard(number)
+        self.pages[number] = rows
+        while len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+        first = number * self.page_size
+        last = min(first + len(rows), self.fetched) - 1
+        if last >= first:
+            self.dataChanged.emit(self.index(first, 0), self.index(last, len(self.HEADERS) - 1))
+
+
+class SearchTableModel(QAbstractTableModel):
+    """History tab while searching: entries found in the history database, across every day"""
+    HEADERS = HISTORY_HEADERS
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+
+    def set_entries(self, entries):
+        self.beginResetModel()
+        self.rows = [entry.row() for entry in entries]
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            return self.HEADERS[section] if orientation == Qt.Horizontal else str(section + 1)
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            return str(self.rows[index.row()][index.column()])
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        return None
@@ -0,0 +1,162 @@
+NORMAL = "NORMAL"
+REJECT = "REJECT"
+
+
+class Pipe:
+    """
+    One row of the production list as it moves length -> weight -> print.
+    Values are in display units; statuses are the check_length/check_weight strings.
+    """
+    __slots__ = ("row", "no", "template", "heat_number", "work_order", "pipe_number",
+                 "length", "length_status", "weight", "weight_status", "printed", "job")
+
+    def __init__(self, row, no="", template="", heat_number="", work_order="", pipe_number=""):
+        self.row = row
+        self.no = no
+        self.template = template  # Printing text with [L] and [W] placeholders
+        self.heat_number = heat_number
+        self.work_order = work_order
+        self.pipe_number = pipe_number
+        self.length = None
+        self.length_status = None
+        self.weight = None
+        self.weight_status = None
+        self.printed = None       # NORMAL / REJECT once the print station handled it
+        self.job = None           # PrintJob staged for this pipe, if any
+
+    @property
+    def status(self):
+        """NORMAL/REJECT once both measurements are graded, else None"""
+        if self.weight_status is None:
+            return None
+        return NORMAL if self.length_status == NORMAL and self.weight_status == NORMAL else REJECT
+
+    @property
+    def text(self):
+        """Printing text with the measured values filled in"""
+        text = self.template
+        if self.length is not None:
+            text = text.replace("[L]", str(self.length), 1)
+        if self.weight is not None:
+            text = text.replace("[W]", str(self.weight), 1)
+        return text
+
+    def __repr__(self):
+        return f"Pipe(row={self.row}, no={self.no!r}, length={self.length}, weight={self.weight}, status={self.status})"
+
+
+class PipeTracker:
+    """
+    Production list plus one cursor per station. Each cursor is the index of the
+    next pipe that station will handle, so a sensor edge costs O(1) however many
+    rows are loaded. Cursors never pass each other: print <= weight <= length.
+    Drop listeners are called as listener(pipe) for every pipe removed or replaced
+    by load(), e.g. to discard its staged print job.
+    """
+    def __init__(self):
+        self.pipes = []
+        self.length_cursor = 0
+        self.weight_cursor = 0
+        self.print_cursor = 0
+        self.drop_listeners = []
+
+    def add_drop_listener(self, listener):
+        self.drop_listeners.append(listener)
+
+    def _dropped(self, pipes):
+        for pipe in pipes:
+            for listener in self.drop_listeners:
+                try:
+                    listener(pipe)
+                except Exception as e:
+                    print(f"Pipe drop listener error: {e}")
+
+    def __len__(self):
+        return len(self.pipes)
+
+    def __getitem__(self, row):
+        return self.pipes[row]
+
+    def get(self, row):
+        return self.pipes[row] if 0 <= row < len(self.pipes) else None
+
+    def set_template(self, row, no, template, heat_number="", work_order="", pipe_number=""):
+        """Set (or create) the pipe for an input-table row"""
+        while len(self.pipes) <= row:
+            self.pipes.append(Pipe(len(self.pipes)))
+        pipe = self.pipes[row]
+        pipe.no = no
+        pipe.template = template
+        pipe.heat_number = heat_number
+        pipe.work_order = work_order
+        pipe.pipe_number = pipe_number
+        return pipe
+
+    def load(self, templates):
+        """
+        Start over with a new production list
+        :param templates: (no, template) or (no, template, heat_number, work_order, pipe_number) per pipe
+        """
+        dropped, self.pipes = self.pipes, [Pipe(row, *entry) for row, entry in enumerate(templates)]
+        self.length_cursor = self.weight_cursor = self.print_cursor = 0
+        self._dropped(dropped)
+
+    def remove_rows(self, rows):
+        """Delete pipes (input rows removed by the operator) and keep the cursors on the same pipes"""
+        for row in sorted(set(rows), reverse=True):
+            if row >= len(self.pipes):
+                continue
+            self._dropped([self.pipes.pop(row)])
+            if row < self.length_cursor:
+                self.length_cursor -= 1
+            if row < self.weight_cursor:
+                self.weight_cursor -= 1
+            if row < self.print_cursor:
+                self.print_cursor -= 1
+        for row, pipe in enumerate(self.pipes):
+            pipe.row = row
+
+    @property
+    def at_length(self):
+        """Next pipe for the length station (None if the list is used up or the row is blank)"""
+        pipe = self.get(self.length_cursor)
+        return pipe if pipe and pipe.template else None
+
+    @property
+    def at_weight(self):
+        return self.pipes[self.weight_cursor] if self.weight_cursor < self.length_cursor else None
+
+    @property
+    def at_print(self):
+        return self.pipes[self.print_cursor] if self.print_cursor < self.weight_cursor else None
+
+    @property
+    def last_measured(self):
+        return self.get(self.length_cursor - 1)
+
+    def record_length(self, length, status):
+        pipe = self.at_length
+        if pipe is None:
+            return None
+        pipe.length = length
+        pipe.length_status = status
+        self.length_cursor += 1
+        return pipe
+
+    def record_weight(self, weight, status):
+        pipe = self.at_weight
+        if pipe is None:
+            return None
+        pipe.weight = weight
+        pipe.weight_status = status
+        self.weight_cursor += 1
+        return pipe
+
+    def record_print(self):
+        """Advance past the pipe at the print head; returns it with printed set"""
+        pipe = self.at_print
+        if pipe is None:
+            return None
+        pipe.printed = pipe.status
+        self.print_cursor += 1
+        return pipe
@@ -0,0 +1,225 @@
+import collections
+import itertools
+import queue
+import threading
+import time
+
+# PrintJob.result values
+PENDING = "PENDING"
+PRINTED = "PRINTED"
+CLEARED = "CLEARED"
+FAILED = "FAILED"
+DISCARDED = "DISCARDED"  # Staged for a pipe that was removed or rejected; never printed
+
+# Queue priorities: a print trigger never waits behind a staging download
+PRINT, STAGE = 0, 1
+
+
+class PrintJob:
+    """
+    One marking for one pipe. Times are time.monotonic(): created when the job is
+    built (it may be staged long before the pipe reaches the printer), submitted
+    at the print trigger. The worker fills in started/finished/attempts/result/
+    response, and staged/template once the text has been downloaded ahead of the
+    print trigger.
+    """
+    def __init__(self, pipe_id, text, font=0x0C, status="NORMAL", template=None):
+        """
+        :param pipe_id: Row / pipe number the marking belongs to
+        :param text: Text to print
+        :param font: EMARK font height code
+        :param status: "NORMAL" prints text, "REJECT" clears the coder
+        :param template: Coder template number (default: the active one)
+        """
+        self.pipe_id = pipe_id
+        self.text = text
+        self.font = font
+        self.status = status
+        self.template = template
+        self.created = time.monotonic()
+        self.submitted = None
+        self.started = None
+        self.finished = None
+        self.attempts = 0
+        self.result = PENDING
+        self.response = None
+        self.staged = False  # Text already stored in self.template
+        self.stage_time = 0.0
+
+    @property
+    def ok(self):
+        return self.result in (PRINTED, CLEARED)
+
+    @property
+    def wait_time(self):
+        """Seconds spent queued behind other jobs after the print trigger"""
+        submitted = self.submitted or self.created
+        return (self.started or submitted) - submitted
+
+    @property
+    def service_time(self):
+        """Seconds from the first attempt to completion"""
+        return (self.finished - self.started) if self.finished and self.started else 0.0
+
+    def __repr__(self):
+        return (f"PrintJob(pipe={self.pipe_id}, {self.status}, {self.result}, attempts={self.attempts}, "
+                f"wait={self.wait_time * 1000:.0f} ms, service={self.service_time * 1000:.0f} ms)")
+
+
+class PrintQueue(threading.Thread):
+    """
+    Printer worker: sends queued PrintJobs to an EMARKPrinter one at a time.
+    Failed sends are retried until the job's deadline; listeners are called from
+    this thread as listener(job) once a job is done (printed, cleared or failed).
+
+    Double buffering: when the printer has a select_command, stage(job) downloads
+    the text into the template that is not printing, so the print trigger only
+    has to switch templates. One job can be staged at a time; the others wait,
+    oldest first, until a print or discard frees the spare template.
+    """
+    def __init__(self, printer, retries=6, retry_delay=0.05, deadline=2.0):
+        """
+        :param printer: EMARKPrinter
+        :param retries: Maximum send attempts per job
+        :param retry_delay: Seconds between attempts
+        :param deadline: Seconds after submit() after which a job is given up
+        """
+        super().__init__(name="PrintQueue", daemon=True)
+        self.printer = printer
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.deadline = deadline
+        self.jobs = queue.PriorityQueue()
+        self._order = itertools.count()
+        self.staged = None  # Job waiting in the inactive template
+        self.waiting = collections.deque()  # Jobs to stage once the spare template is free
+        self.staged_lock = threading.Lock()
+        self.listeners = []
+        self._stop_event = threading.Event()
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def submit(self, job):
+        job.submitted = time.monotonic()  # The deadline runs from here, not from staging
+        self.jobs.put((PRINT, next(self._order), job))
+        return job
+
+    def stage(self, job):
+        """Pre-load job's text into the inactive template; no-op if the printer cannot switch"""
+        if self.printer.select_command is None:
+            return None
+        self.jobs.put((STAGE, next(self._order), job))
+        return job
+
+    def discard(self, job):
+        """
+        Drop a job that will not be printed (its pipe was rejected, removed or
+        replaced): a STAGE entry still queued for it is skipped, and the spare
+        template is free again.
+        """
+        with self.staged_lock:
+            if job.result == PENDING and job.submitted is None:
+                job.result = DISCARDED
+            if self.staged is job:
+                self._free_spare()
+
+    def _free_spare(self):
+        """With staged_lock held: empty the spare template and have the worker stage the next waiting job"""
+        self.staged = None
+        if self.waiting:
+            self.jobs.put((STAGE, next(self._order), None))
+
+    def pending(self):
+        return self.jobs.qsize()
+
+    def stop(self):
+        self._stop_event.set()
+        self.jobs.put((PRINT, -1, None))
+
+    def _stage(self, job):
+        """Queue job (None: the spare template was freed) and download the oldest waiting job if the spare is free"""
+        with self.staged_lock:
+            if job is not None:
+                self.waiting.append(job)
+            if self.staged is not None and self.staged.result == PENDING:
+                return  # Staged when the job in the spare template is printed or discarded
+            while self.waiting:
+                job = self.waiting.popleft()
+                if job.result == PENDING and job.submitted is None:
+                    break
+            else:
+                return  # Nothing left that has not been printed, queued to print or discarded
+        start = time.monotonic()
+        template = 2 if self.printer.active_template == 1 else 1
+        if self.printer.send_text(job.text, template_num=template, font_height=job.font, x_pos=0, y_pos=0):
+            job.template = template
+            job.staged = True
+            job.stage_time = time.monotonic() - start
+            with self.staged_lock:
+                if job.result == PENDING:
+                    self.staged = job
+                else:  # Discarded while downloading
+                    self._free_spare()
+
+    def _send(self, job):
+        if job.status == "REJECT":
+            return self.printer.clear_text()
+        if job.template is None:
+            job.template = self.printer.active_template
+        response = True
+        if not job.staged:
+            response = self.printer.send_text(job.text, template_num=job.template,
+                                              font_height=job.font, x_pos=0, y_pos=0)
+            if not response:
+                return response
+            job.staged = True
+        if job.template != self.printer.active_template:
+            response = self.printer.select_template(job.template)
+        return response
+
+    def execute(self, job):
+        """Send one job, retrying until it succeeds, runs out of attempts or passes its deadline"""
+        job.started = time.monotonic()
+        deadline = (job.submitted or job.started) + self.deadline
+        while True:
+            job.attempts += 1
+            job.response = self._send(job)
+            if job.response:
+                job.result = CLEARED if job.status == "REJECT" else PRINTED
+                break
+            if job.attempts >= self.retries or time.monotonic() + self.retry_delay >= deadline \
+                    or self._stop_event.is_set():
+                job.result = FAILED
+                break
+            print(f"Retrying {job.attempts} : EMark Printer Not Connected or Error!")
+            self._stop_event.wait(self.retry_delay)
+        job.finished = time.monotonic()
+        with self.staged_lock:
+            if self.staged is job:
+                self._free_spare()
+        return job
+
+    def run(self):
+        while not self._stop_event.is_set():
+            priority, _, job = self.jobs.get()
+            if priority == STAGE:
+                try:
+                    self._stage(job)
+                except Exception as e:
+                    print(f"Print staging error: {e}")
+                continue
+            if job is None:
+                break
+            try:
+                self.execute(job)
+            except Exception as e:
+                print(f"Print job error: {e}")
+                job.result = FAILED
+                job.finished = time.monotonic()
+            print(job)
+            for listener in self.listeners:
+                try:
+                    listener(job)
+                except Exception as e:
+                    print(f"Print listener error: {e}")
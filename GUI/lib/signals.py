@@ -0,0 +1,73 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class PLCSignals(QObject):
+    """
+    Qt bridge for PLCAcquisition.
+    Emitted from the acquisition thread, delivered queued on the GUI thread.
+    """
+    tag_changed = pyqtSignal(str, object, float)  # name, value, monotonic timestamp
+    station_event = pyqtSignal(object)            # edges.StationEvent
+
+    def attach(self, acquisition):
+        acquisition.add_listener(self.tag_changed.emit)
+        acquisition.add_event_listener(self.station_event.emit)
+        return self
+
+
+class DeviceSignals(QObject):
+    """Qt bridge for DeviceSupervisor health transitions"""
+    state_changed = pyqtSignal(str, str, str)  # device name, state, message
+
+    def attach(self, supervisor):
+        supervisor.add_listener(self.state_changed.emit)
+        return self
+
+
+class PrintSignals(QObject):
+    """Qt bridge for PrintQueue job completion"""
+    job_done = pyqtSignal(object)  # printqueue.PrintJob
+
+    def attach(self, print_queue):
+        print_queue.add_listener(self.job_done.emit)
+        return self
+
+
+class EngineSignals(QObject):
+    """Qt bridge for LineEngine: the GUI as an observer of the headless line"""
+    pipe_event = pyqtSignal(str, str, object)  # station, state, pipeline.Pipe or None
+
+    def attach(self, engine):
+        engine.add_listener(self.pipe_event.emit)
+        return self
+
+
+class LogReaderSignals(QObject):
+    """Qt bridge for CsvLogReader results"""
+    counted = pyqtSignal(object, int)             # path, rows
+    page_loaded = pyqtSignal(object, int, object)  # path, page number, list of rows
+
+    def attach(self, reader):
+        reader.add_count_listener(self.counted.emit)
+        reader.add_page_listener(self.page_loaded.emit)
+        return self
+
+
+class LogWriterSignals(QObject):
+    """Qt bridge for CsvLogWriter flushes"""
+    flushed = pyqtSignal(str)  # path of the daily file
+
+    def attach(self, writer):
+        writer.add_listener(self.flushed.emit)
+        return self
+
+
+class ExportSignals(QObject):
+    """Qt bridge for ExcelExport progress and completion"""
+    progress = pyqtSignal(object, object)  # bytes done, bytes total (may exceed 2 GB)
+    done = pyqtSignal(object)              # export.ExportResult
+
+    def attach(self, export):
+        export.add_progress_listener(self.progress.emit)
+        export.add_done_listener(self.done.emit)
+        return self
@@ -0,0 +1,170 @@
+import argparse
+import ctypes
+import heapq
+import json
+import random
+import threading
+import time
+import snap7
+from snap7.types import srvAreaDB, srvAreaMK, srvAreaPA, srvAreaPE
+from snap7.util import set_byte, set_dint, set_dword, set_int, set_real, set_word
+from lib.PLC import DEFAULT_TAGS, TAG_DECODERS, TAG_SIZES, parse_tags
+from lib.edges import DEFAULT_STATIONS
+
+SERVER_AREAS = {"PE": srvAreaPE, "PA": srvAreaPA, "MK": srvAreaMK, "DB": srvAreaDB}
+TAG_ENCODERS = {
+    "byte": set_byte,
+    "int": set_int,
+    "word": set_word,
+    "dint": set_dint,
+    "dword": set_dword,
+    "real": set_real,
+}
+
+
+class PLCSimulator:
+    """
+    Local S7 PLC built on snap7.server, exposing the same tags PLCReader reads.
+    Tests drive it with set_tag()/pulse() or run_pipes() and connect with
+    PLCReader.connect(ip="127.0.0.1", port=simulator.port).
+    """
+    def __init__(self, tags=None, stations=None, port=1102):
+        """
+        :param tags: "plc_tags" mapping (default: the line's sensor map)
+        :param stations: "stations" mapping used by run_pipes
+        :param port: TCP port (102 needs root on Linux)
+        """
+        self.tags = {tag.name: tag for tag in parse_tags(tags or DEFAULT_TAGS)}
+        self.stations = stations or DEFAULT_STATIONS
+        self.port = port
+        self.server = None
+        self.buffers = {}  # (area, db) -> ctypes byte array
+        for tag in self.tags.values():
+            key = (tag.area, tag.db)
+            size = max(len(self.buffers.get(key, ())), tag.byte + TAG_SIZES[tag.type])
+            self.buffers[key] = (ctypes.c_uint8 * size)()
+        self._stop_event = threading.Event()
+
+    def start(self):
+        self.server = snap7.server.Server(log=False)
+        for (area, db), buffer in self.buffers.items():
+            self.server.register_area(SERVER_AREAS[area], db, buffer)
+        self.server.start(tcpport=self.port)
+        print(f"PLC simulator listening on port {self.port}")
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self.server:
+            self.server.stop()
+            self.server.destroy()
+            self.server = None
+
+    def set_tag(self, name, value):
+        tag = self.tags[name]
+        buffer = self.buffers[(tag.area, tag.db)]
+        locked = self.server is not None
+        if locked:
+            self.server.lock_area(SERVER_AREAS[tag.area], tag.db)
+        try:
+            if tag.type == "bool":
+                if value:
+                    buffer[tag.byte] |= 1 << tag.bit
+                else:
+                    buffer[tag.byte] &= ~(1 << tag.bit) & 0xFF
+            else:
+                data = bytearray(TAG_SIZES[tag.type])
+                TAG_ENCODERS[tag.type](data, 0, value)
+                for i, b in enumerate(data):
+                    buffer[tag.byte + i] = b
+        finally:
+            if locked:
+                self.server.unlock_area(SERVER_AREAS[tag.area], tag.db)
+
+    def get_tag(self, name):
+        tag = self.tags[name]
+        data = bytearray(self.buffers[(tag.area, tag.db)])
+        if tag.type == "bool":
+            return bool(data[tag.byte] >> tag.bit & 1)
+        return TAG_DECODERS[tag.type](data, tag.byte)
+
+    def set_station(self, station, on):
+        for name in self.stations[station]["tags"]:
+            self.set_tag(name, on)
+
+    def pulse(self, station, duration):
+        """Hold a station's sensor bits on for duration seconds (blocking)"""
+        self.set_station(station, True)
+        time.sleep(duration)
+        self.set_station(station, False)
+
+    def run_pipes(self, count, rate=1.0, length=12000.0, on_time=1.0, travel=1.0, jitter=0.0, on_event=None):
+        """
+        Drive pipes through every station in order (blocking)
+        :param count: Number of pipes
+        :param rate: Pipes per second entering the first station
+        :param length: Value written to the "length" tag for each pipe (mm),
+                       or a callable(pipe_index) returning it
+        :param on_time: Seconds each sensor stays on per pipe
+        :param travel: Seconds between a pipe reaching one station and the next
+        :param jitter: Random extra delay (0..jitter seconds) added to each pipe's arrival
+        :param on_event: Optional callable(pipe_index, station, edge, timestamp)
+        :return: List of (pipe_index, station, edge, monotonic timestamp) actually applied
+        """
+        timeline = []
+        start = time.monotonic() + 0.1
+        for i in range(count):
+            t = start + i / rate + random.uniform(0, jitter)
+            heapq.heappush(timeline, (t - 0.05, i, "length", "value"))
+            for n, station in enumerate(self.stations):
+                heapq.heappush(timeline, (t + n * travel, i, station, "rising"))
+                heapq.heappush(timeline, (t + n * travel + on_time, i, station, "falling"))
+
+        applied = []
+        while timeline and not self._stop_event.is_set():
+            due, i, station, edge = heapq.heappop(timeline)
+            delay = due - time.monotonic()
+            if delay > 0:
+                self._stop_event.wait(delay)
+            if edge == "value":
+                if "length" in self.tags:
+                    self.set_tag("length", length(i) if callable(length) else length)
+                continue
+            self.set_station(station, edge == "rising")
+            timestamp = time.monotonic()
+            applied.append((i, station, edge, timestamp))
+            if on_event:
+                on_event(i, station, edge, timestamp)
+        return applied
+
+
+# Example usage: python -m lib.simulator --count 10 --rate 0.5
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local S7 PLC simulator for the printing line")
+    parser.add_argument("--config", default="lib/config.json")
+    parser.add_argument("--port", type=int, default=1102)
+    parser.add_argument("--count", type=int, default=0, help="Pipes to drive (0 = just serve)")
+    parser.add_argument("--rate", type=float, default=0.5, help="Pipes per second")
+    parser.add_argument("--length", type=float, default=12000.0, help="DB length value in mm")
+    parser.add_argument("--on-time", type=float, default=1.0)
+    parser.add_argument("--travel", type=float, default=1.0)
+    args = parser.parse_args()
+
+    try:
+        with open(args.config) as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        config = {}
+
+    sim = PLCSimulator(config.get("plc_tags"), config.get("stations"), port=args.port).start()
+    try:
+        if args.count:
+            sim.run_pipes(args.count, args.rate, args.length, args.on_time, args.travel,
+                          on_event=lambda i, station, edge, t: print(f"pipe {i} {station} {edge}"))
+        else:
+            while True:
+                time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sim.stop()
@@ -0,0 +1,206 @@
+"""
+Running production statistics per shift, work order and heat number.
+
+Every history entry updates its three groups in O(1): counts, reject reasons,
+mean/σ/min/max of length and weight (Welford) and fixed-bin histograms, each
+group held in a few flat arrays. Reading a group never touches the logs.
+From the GUI folder:
+
+    python -m lib.stats --days 7 --by work_order
+"""
+import argparse
+import bisect
+import math
+import threading
+import time
+from array import array
+from collections import namedtuple
+from lib.history import HistoryStore, HISTORY_DB, LENGTH_FACTORS, WEIGHT_FACTORS
+
+# Shift name -> start time; a shift runs until the next one starts
+DEFAULT_SHIFTS = {"A": "06:00", "B": "14:00", "C": "22:00"}
+
+GROUPS = ("shift", "work_order", "heat_number")
+
+# Histogram bins in device units (mm, kg); the end bins also count values out of range
+Bins = namedtuple("Bins", ["low", "width", "count"])
+LENGTH_BINS = Bins(0, 250, 64)   # 0 - 16 m
+WEIGHT_BINS = Bins(0, 50, 64)    # 0 - 3200 kg
+
+# Layout of GroupStats.values
+COUNT, FIRST, LAST, REJECTS, UNDERLENGTH, UNDERWEIGHT, OVERWEIGHT = range(7)
+LENGTH, WEIGHT = 7, 12           # Each: n, mean, m2, min, max
+N, MEAN, M2, MIN, MAX = range(5)
+EMPTY = array("d", [0, math.inf, -math.inf, 0, 0, 0, 0] + [0, 0, 0, math.inf, -math.inf] * 2)
+
+
+def _bin(value, bins):
+    return min(max(int((value - bins.low) // bins.width), 0), bins.count - 1)
+
+
+def _moments(values, start, factor):
+    """mean/std/min/max of the block at start, scaled to display units; None if empty"""
+    n = values[start + N]
+    if not n:
+        return None
+    std = math.sqrt(values[start + M2] / (n - 1)) if n > 1 else 0.0
+    return {"mean": values[start + MEAN] * factor, "std": std * factor,
+            "min": values[start + MIN] * factor, "max": values[start + MAX] * factor}
+
+
+class GroupStats:
+    """Statistics of one shift, work order or heat number. Lengths in mm, weights in kg."""
+    __slots__ = ("values", "length_bins", "weight_bins")
+
+    def __init__(self, length_bins=LENGTH_BINS, weight_bins=WEIGHT_BINS):
+        self.values = array("d", EMPTY)
+        self.length_bins = array("L", [0]) * length_bins.count
+        self.weight_bins = array("L", [0]) * weight_bins.count
+
+    def _measure(self, start, value):
+        """Welford update of the block at start"""
+        values = self.values
+        values[start + N] += 1
+        delta = value - values[start + MEAN]
+        values[start + MEAN] += delta / values[start + N]
+        values[start + M2] += delta * (value - values[start + MEAN])
+        values[start + MIN] = min(values[start + MIN], value)
+        values[start + MAX] = max(values[start + MAX], value)
+
+    def add(self, entry, length_bins=LENGTH_BINS, weight_bins=WEIGHT_BINS):
+        values = self.values
+        values[COUNT] += 1
+        values[FIRST] = min(values[FIRST], entry.timestamp)
+        values[LAST] = max(values[LAST], entry.timestamp)
+        values[REJECTS] += entry.status == "REJECT"
+        values[UNDERLENGTH] += entry.length_status == "UNDERLENGTH"
+        values[UNDERWEIGHT] += entry.weight_status == "UNDERWEIGHT"
+        values[OVERWEIGHT] += entry.weight_status == "OVERWEIGHT"
+        # Imported entries whose unit could not be read back are counted but not measured
+        if entry.length is not None and entry.length_unit in LENGTH_FACTORS:
+            length = entry.length / LENGTH_FACTORS[entry.length_unit]
+            self._measure(LENGTH, length)
+            self.length_bins[_bin(length, length_bins)] += 1
+        if entry.weight is not None and entry.weight_unit in WEIGHT_FACTORS:
+            weight = entry.weight / WEIGHT_FACTORS[entry.weight_unit]
+            self._measure(WEIGHT, weight)
+            self.weight_bins[_bin(weight, weight_bins)] += 1
+
+    def summary(self, length_unit="mm", weight_unit="kg", length_bins=LENGTH_BINS, weight_bins=WEIGHT_BINS):
+        """
+        The statistics as a dict, lengths and weights in the given display units.
+        Histograms are [(bin start, count)].
+        """
+        values = self.values
+        count = values[COUNT]
+        span = values[LAST] - values[FIRST]
+        length_factor = LENGTH_FACTORS.get(length_unit, 1)
+        weight_factor = WEIGHT_FACTORS.get(weight_unit, 1)
+        return {
+            "count": int(count),
+            "first": values[FIRST] if count else None,
+            "last": values[LAST] if count else None,
+            "pipes_per_hour": (count - 1) * 3600 / span if span > 0 else None,
+            "rejects": int(values[REJECTS]),
+            "reject_rate": values[REJECTS] / count if count else 0.0,
+            "underlength_rate": values[UNDERLENGTH] / count if count else 0.0,
+            "underweight_rate": values[UNDERWEIGHT] / count if count else 0.0,
+            "overweight_rate": values[OVERWEIGHT] / count if count else 0.0,
+            "length": _moments(values, LENGTH, length_factor),
+            "weight": _moments(values, WEIGHT, weight_factor),
+            "length_histogram": [((length_bins.low + i * length_bins.width) * length_factor, n)
+                                 for i, n in enumerate(self.length_bins)],
+            "weight_histogram": [((weight_bins.low + i * weight_bins.width) * weight_factor, n)
+                                 for i, n in enumerate(self.weight_bins)],
+        }
+
+
+class ProductionStats:
+    """
+    GroupStats of every shift ("2025-08-10 A"), work order and heat number seen.
+    add() is a history listener (called from the engine's threads); get() and
+    snapshot() can be called from any thread.
+    """
+    def __init__(self, shifts=None, length_bins=LENGTH_BINS, weight_bins=WEIGHT_BINS):
+        """
+        :param shifts: {name: "HH:MM" start}, DEFAULT_SHIFTS if None
+        """
+        starts = sorted((int(start[:2]) * 60 + int(start[3:5]), name) for name, start in (shifts or DEFAULT_SHIFTS).items())
+        self.shift_starts = [minute for minute, _ in starts]
+        self.shift_names = [name for _, name in starts]
+        self.length_bins = length_bins
+        self.weight_bins = weight_bins
+        self.groups = {group: {} for group in GROUPS}
+        self.lock = threading.Lock()
+
+    def shift_of(self, timestamp):
+        """ "YYYY-MM-DD name" of the shift running at timestamp, dated by the day it started"""
+        local = time.localtime(timestamp)
+        index = bisect.bisect_right(self.shift_starts, local.tm_hour * 60 + local.tm_min) - 1
+        if index < 0:
+            # Before the first start of the day: the last shift of the day before
+            local = time.localtime(timestamp - 86400)
+        return f"{time.strftime('%Y-%m-%d', local)} {self.shift_names[index]}"
+
+    def add(self, entry):
+        keys = (("shift", self.shift_of(entry.timestamp)), ("work_order", entry.work_order),
+                ("heat_number", entry.heat_number))
+        with self.lock:
+            for group, key in keys:
+                if not key:
+                    continue
+                stats = self.groups[group].get(key)
+                if stats is None:
+                    stats = self.groups[group][key] = GroupStats(self.length_bins, self.weight_bins)
+                stats.add(entry, self.length_bins, self.weight_bins)
+
+    def add_many(self, entries):
+        for entry in entries:
+            self.add(entry)
+
+    def keys(self, group):
+        """Keys of a group, in the order they were first seen"""
+        with self.lock:
+            return list(self.groups[group])
+
+    def get(self, group, key, length_unit="mm", weight_unit="kg"):
+        """Summary of one shift / work order / heat number, None if it has no entries"""
+        with self.lock:
+            stats = self.groups[group].get(key)
+            return stats.summary(length_unit, weight_unit, self.length_bins, self.weight_bins) if stats else None
+
+    def snapshot(self, group, length_unit="mm", weight_unit="kg"):
+        """{key: summary} of every entry of a group"""
+        with self.lock:
+            return {key: stats.summary(length_unit, weight_unit, self.length_bins, self.weight_bins)
+                    for key, stats in self.groups[group].items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Production statistics from the history database")
+    parser.add_argument("--db", default=HISTORY_DB)
+    parser.add_argument("--days", type=float, default=7, help="Entries of the last DAYS days")
+    parser.add_argument("--by", choices=GROUPS, default="shift")
+    parser.add_argument("--length-unit", default="ft")
+    parser.add_argument("--weight-unit", default="lbs")
+    args = parser.parse_args()
+
+    stats = ProductionStats()
+    start = time.perf_counter()
+    stats.add_many(HistoryStore(args.db).query(since=time.time() - args.days * 86400))
+    print(f"Built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    print(f"{args.by:<16} {'pipes':>6} {'per h':>6} {'reject':>7} {'u-len':>6} {'u-wt':>6} {'o-wt':>6}"
+          f" {'length':>16} {'weight':>18}")
+    for key, summary in stats.snapshot(args.by, args.length_unit, args.weight_unit).items():
+        length, weight = summary["length"], summary["weight"]
+        length = f"{length['mean']:.2f} ± {length['std']:.2f}" if length else "-"
+        weight = f"{weight['mean']:.1f} ± {weight['std']:.1f}" if weight else "-"
+        print(f"{key:<16} {summary['count']:>6} {summary['pipes_per_hour'] or 0:>6.1f}"
+              f" {summary['reject_rate']:>7.1%} {summary['underlength_rate']:>6.1%}"
+              f" {summary['underweight_rate']:>6.1%} {summary['overweight_rate']:>6.1%}"
+              f" {length:>16} {weight:>18}")
+
+
+if __name__ == "__main__":
+    main()
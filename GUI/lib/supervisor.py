@@ -0,0 +1,133 @@
+import random
+import threading
+
+ONLINE = "ONLINE"
+CONNECTING = "CONNECTING"
+OFFLINE = "OFFLINE"
+STOPPED = "STOPPED"
+
+
+class DeviceWatch(threading.Thread):
+    """Keep one device connected; all connect/close calls happen on this thread"""
+    def __init__(self, supervisor, name, device, params, on_connect=None):
+        super().__init__(name=f"DeviceWatch-{name}", daemon=True)
+        self.supervisor = supervisor
+        self.device_name = name
+        self.device = device
+        self.params = params
+        self.on_connect = on_connect
+        self.state = STOPPED
+        self.attempts = 0
+        self.close_on_exit = False
+        self._stop_event = threading.Event()
+
+    def stop(self, close):
+        self.close_on_exit = close
+        self._stop_event.set()
+
+    def _set_state(self, state, message=""):
+        if state != self.state:
+            self.state = state
+            self.supervisor.notify(self.device_name, state, message)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            if self.device.connected:
+                self._set_state(ONLINE)
+                self._stop_event.wait(self.supervisor.check_interval)
+                continue
+
+            if self.state == ONLINE:
+                self._set_state(OFFLINE, "Connection lost")
+
+            self._set_state(CONNECTING)
+            msg = self.device.connect(**self.params)
+            if self.device.connected:
+                self.attempts = 0
+                if self.on_connect:
+                    try:
+                        self.on_connect()
+                    except Exception as e:
+                        print(f"{self.name} on_connect error: {e}")
+                self._set_state(ONLINE)
+            else:
+                delay = self.supervisor.backoff(self.attempts)
+                self.attempts += 1
+                self._set_state(OFFLINE, msg or "Connection failed")
+                self._stop_event.wait(delay)
+
+        if self.close_on_exit:
+            try:
+                self.device.close()
+            except Exception as e:
+                print(f"{self.name} close error: {e}")
+            self._set_state(STOPPED)
+
+
+class DeviceSupervisor:
+    """
+    Own the connection lifecycle of the line devices off the GUI thread.
+    Each watched device gets its own thread, so a dead PLC never delays the scale
+    or printer. Dropped links are retried with exponential backoff and jitter.
+    Listeners are called as listener(name, state, message) on every transition.
+    """
+    def __init__(self, base_delay=0.5, max_delay=30.0, jitter=0.2, check_interval=0.25):
+        """
+        :param base_delay: First retry delay in seconds
+        :param max_delay: Upper bound of the retry delay
+        :param jitter: Random spread applied to each delay (0.2 = +/-20%)
+        :param check_interval: How often an online device is checked for a drop
+        """
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.check_interval = check_interval
+        self.watches = {}
+        self.listeners = []
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def notify(self, name, state, message):
+        for listener in self.listeners:
+            try:
+                listener(name, state, message)
+            except Exception as e:
+                print(f"Supervisor listener error: {e}")
+
+    def backoff(self, attempts):
+        delay = min(self.max_delay, self.base_delay * 2 ** attempts)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def watch(self, name, device, on_connect=None, **params):
+        """
+        Start keeping a device connected
+        :param name: Device name reported to listeners ("plc", "weight", "printer")
+        :param device: Object with connect(**params), close() and a connected flag
+        :param on_connect: Optional callable run on the watch thread after each connect
+        :param params: Arguments passed to device.connect
+        """
+        old = self.watches.get(name)
+        if old:
+            old.stop(close=False)  # The new watch takes over the open device
+        watch = DeviceWatch(self, name, device, params, on_connect)
+        self.watches[name] = watch
+        watch.start()
+        return watch
+
+    def release(self, name):
+        """Stop reconnecting a device and close it on its watch thread"""
+        watch = self.watches.pop(name, None)
+        if watch:
+            watch.stop(close=True)
+
+    def is_watched(self, name):
+        return name in self.watches
+
+    def state(self, name):
+        watch = self.watches.get(name)
+        return watch.state if watch else STOPPED
+
+    def stop(self):
+        for name in list(self.watches):
+            self.release(name)
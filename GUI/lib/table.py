@@ -1,11 +1,10 @@
 from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import QApplication, QTableWidget, QTableWidgetItem, QFileDialog
+from PyQt5.QtWidgets import QApplication, QTableView, QFileDialog
 import datetime
-import openpyxl
-import csv
-from openpyxl.styles import Font, PatternFill
 import os
-from PyQt5.QtWidgets import QMessageBox
+from PyQt5.QtWidgets import QMessageBox, QProgressDialog
+from lib.export import ExcelExport
+from lib.signals import ExportSignals
 
 def setup_table_functionality(self, table):
     def copy():
@@ -16,15 +15,16 @@ def setup_table_functionality(self, table):
         selected.sort()
         rows = selected[-1].row() - selected[0].row() + 1
         cols = selected[-1].column() - selected[0].column() + 1
+        model = table.model()
         
         text = ""
         for i in range(rows):
             for j in range(cols):
                 if j > 0:
                     text += "\t"
-                item = table.item(selected[0].row() + i, selected[0].column() + j)
-                if item is not None:
-                    text += item.text()
+                value = model.index(selected[0].row() + i, selected[0].column() + j).data()
+                if value is not None:
+                    text += value
             text += "\n"
         
         QApplication.clipboard().setText(text)
@@ -34,53 +34,29 @@ def setup_table_functionality(self, table):
         if not selected:
             return
 
-        row = selected[0].row()
-        col = selected[0].column()
+        row = min(index.row() for index in selected)
+        col = min(index.column() for index in selected)
 
         clipboard = QApplication.clipboard()
         text = clipboard.text()
         rows = text.split('\n')
 
-        for i, r in enumerate(rows):
-            if not r.strip():
-                continue
-            cells = r.split('\t')
-            for j, c in enumerate(cells):
-                if row + i >= table.rowCount() or col + j >= table.columnCount():
-                    continue
-
-                item = table.item(row + i, col + j)
-                if item is not None:
-                    item.setText(c)
-                    item.setTextAlignment(Qt.AlignCenter)
-                else:
-                    new_item = QTableWidgetItem(c)
-                    new_item.setTextAlignment(Qt.AlignCenter)
-                    table.setItem(row + i, col + j, new_item)
+        # One model update for the whole block; rows past the end are appended
+        block = [r.rstrip('\r').split('\t') for r in rows if r.strip()]
+        table.model().set_block(row, col, block)
 
     def delete():
-        # Block signals to prevent unwanted updates
-        self.tableWidget_input.blockSignals(True)
-        self.tableWidget_home.blockSignals(True)
-        
         selected = self.tableWidget_input.selectedIndexes()
         if not selected:
             return
 
-        # Get unique rows to delete (sorted from bottom to top)
+        # Get unique rows to delete
         rows_to_delete = sorted(set(index.row() for index in selected), reverse=True)
 
-        # Delete rows in both tables
-        for row in rows_to_delete:
-            self.tableWidget_input.removeRow(row)
-            if row < self.tableWidget_home.rowCount():
-                self.tableWidget_home.removeRow(row)
-        
-        # Qt will automatically update the default row numbers in both tables
-        
-        # Unblock signals
-        self.tableWidget_input.blockSignals(False)
-        self.tableWidget_home.blockSignals(False)
+        # Delete rows in both tables (the home table is the PipeTracker's view)
+        self.input_model.remove_rows(rows_to_delete)
+        with self.engine.lock:
+            self.home_model.remove_rows(rows_to_delete)
 
     def keyPressEvent(event):
         if event.key() == Qt.Key_C and event.modifiers() == Qt.ControlModifier:
@@ -90,90 +66,23 @@ def setup_table_functionality(self, table):
         elif event.key() == Qt.Key_Delete:
             delete()
         else:
-            QTableWidget.keyPressEvent(table, event)
+            QTableView.keyPressEvent(table, event)
 
     table.copy = copy
     table.paste = paste
     table.delete = delete
     table.keyPressEvent = keyPressEvent
 
-def add_to_history(self, no, length_text, weight_text, output_text, status):
-    current_time = datetime.datetime.now()
-    date_str = current_time.strftime("%Y-%m-%d")
-    time_str = current_time.strftime("%H:%M:%S")
-    
-    row_position = self.tableWidget.rowCount()
-    self.tableWidget.insertRow(row_position)
-    
-    for col, value in enumerate([
-        no,
-        date_str,
-        time_str,
-        length_text,
-        weight_text,
-        output_text,
-        status
-    ]):
-        item = QTableWidgetItem(value)
-        item.setTextAlignment(Qt.AlignCenter)
-        self.tableWidget.setItem(row_position, col, item)
-        
-    # Save to CSV
-    save_to_csv(no, date_str, time_str, length_text, weight_text, output_text, status)
-
-def save_to_csv(no, date, time, length_text, weight_text, output_text, status):
+def load_last_csv(self):
+    """Show today's log and keep following the daily log (see on_log_flushed)"""
     current_time = datetime.datetime.now()
     date_str = current_time.strftime("%Y-%m-%d")
     csv_file = f"logs/{date_str}.csv"
-    
-    file_exists = os.path.isfile(csv_file)
-    
-    try:
-        with open(csv_file, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            
-            if not file_exists:
-                writer.writerow([
-                    "No", "Date", "Time", "Length", "Weight", "Printed Text", "Status"
-                    ])
-            
-            writer.writerow([
-                no,
-                date,
-                time,
-                length_text,
-                weight_text,
-                output_text,
-                status
-            ])
-    except Exception as e:
-        print(f"Error saving to CSV: {e}")
-
-def load_last_csv(self):
-    try:
-        current_time = datetime.datetime.now()
-        date_str = current_time.strftime("%Y-%m-%d")
-        csv_file = f"logs/{date_str}.csv"
-        if not csv_file:
-            return
 
-        self.lineEdit_path.setText(csv_file)
-
-        with open(csv_file, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            headers = next(reader)  # Skip header row
-
-            self.tableWidget.setRowCount(0)
-
-            for row_data in reader:
-                row_position = self.tableWidget.rowCount()
-                self.tableWidget.insertRow(row_position)
-                for col, value in enumerate(row_data):
-                    item = QTableWidgetItem(value)
-                    item.setTextAlignment(Qt.AlignCenter)
-                    self.tableWidget.setItem(row_position, col, item)
-    except Exception as e:
-        print(f"Failed to load last CSV: {e}")
+    self.lineEdit_path.setText(csv_file)
+    self.follow_log = True
+    # Indexed and paged in on the log reader thread
+    self.history_model.load(csv_file)
 
 def open_file(self):
     file_path, _ = QFileDialog.getOpenFileName(
@@ -184,68 +93,64 @@ def open_file(self):
     )
     if file_path:
         self.lineEdit_path.setText(file_path)
-        try:
-            with open(file_path, 'r', newline='', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                headers = next(reader)
-
-                self.tableWidget.setRowCount(0)
-
-                for row_data in reader:
-                    row_position = self.tableWidget.rowCount()
-                    self.tableWidget.insertRow(row_position)
-                    for col, value in enumerate(row_data):
-                        item = QTableWidgetItem(value)
-                        item.setTextAlignment(Qt.AlignCenter)
-                        self.tableWidget.setItem(row_position, col, item)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to open file: {str(e)}")
+        if not os.path.isfile(file_path):
+            QMessageBox.critical(self, "Error", f"Failed to open file: {file_path} not found")
+            return
+        self.follow_log = False
+        self.lineEdit_search.clear()
+        self.history_model.load(file_path)
+
+def search_history(self):
+    """Search box of the History tab: matching pipes of every day, or the open log again when empty"""
+    text = self.lineEdit_search.text().strip()
+    if not text:
+        self.tableWidget.setModel(self.history_model)
+        return
+    try:
+        entries = self.engine.store.search(text)
+    except Exception as e:
+        QMessageBox.critical(self, "Error", f"Search failed: {e}")
+        return
+    self.search_model.set_entries(entries)
+    self.tableWidget.setModel(self.search_model)
 
 def save_data(self):
     QMessageBox.information(self, "Data Saved", "Data has been saved successfully")
 
 def export_to_excel(self):
-    if self.tableWidget.rowCount() == 0:
+    if not self.history_model.path or not os.path.isfile(self.history_model.path):
         QMessageBox.warning(self, "No Data", "There is no data to export")
         return
-        
+    if getattr(self, "excel_export", None) and self.excel_export.is_alive():
+        QMessageBox.warning(self, "Export Running", "An export is already running")
+        return
+
     file_path, _ = QFileDialog.getSaveFileName(self, "Export to Excel", "", "Excel Files (*.xlsx);;All Files (*)")
     if file_path:
         if not file_path.endswith('.xlsx'):
             file_path += '.xlsx'
-            
-        try:
-            workbook = openpyxl.Workbook()
-            sheet = workbook.active
-            sheet.title = "Printing History"
-            
-            # Write headers
-            headers = []
-            for col in range(self.tableWidget.columnCount()):
-                headers.append(self.tableWidget.horizontalHeaderItem(col).text())
-            sheet.append(headers)
-            
-            # Make headers bold
-            for cell in sheet[1]:
-                cell.font = Font(bold=True)
-            
-            # Write data with color coding
-            for row in range(self.tableWidget.rowCount()):
-                row_data = []
-                for col in range(self.tableWidget.columnCount()):
-                    item = self.tableWidget.item(row, col)
-                    row_data.append(item.text() if item else "")
-                sheet.append(row_data)
-                
-                # Apply color to entire row based on status
-                status_item = self.tableWidget.item(row, 10)  # Status column is now index 10
-                if status_item and status_item.text() != "OK":
-                    fill_color = "FFFF00" if "WEIGHT" in status_item.text() else "FFA500"
-                    for cell in sheet[row+2]:  # +2 because headers are row 1 and Excel is 1-based
-                        cell.fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type="solid")
-            
-            workbook.save(file_path)
-            QMessageBox.information(self, "Export Successful", f"Data exported to {file_path}")
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Export Failed", f"Error exporting data: {str(e)}")
+
+        # Streamed from the log file on a worker thread; the dialog shows progress and can cancel
+        self.excel_export = ExcelExport([self.history_model.path], file_path)
+        progress = QProgressDialog("Exporting to Excel...", "Cancel", 0, 1000, self)
+        progress.setWindowTitle("Export to Excel")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(300)
+        progress.canceled.connect(self.excel_export.cancel)
+
+        def on_progress(done, total):
+            progress.setValue(min(999, done * 1000 // max(total, 1)))
+
+        def on_done(result):
+            progress.reset()
+            if result.cancelled:
+                return
+            if result.error:
+                QMessageBox.critical(self, "Export Failed", f"Error exporting data: {result.error}")
+            else:
+                QMessageBox.information(self, "Export Successful", f"Data exported to {result.path}")
+
+        self.export_signals = ExportSignals().attach(self.excel_export)
+        self.export_signals.progress.connect(on_progress)
+        self.export_signals.done.connect(on_done)
+        self.excel_export.start()
@@ -0,0 +1,124 @@
+import statistics
+import threading
+import time
+from collections import namedtuple
+
+# weight is the filtered value, spread the max-min of the window it came from,
+# dwell the seconds from arm() to the capture, armed_at the arm() it answers
+CaptureResult = namedtuple("CaptureResult", ["weight", "stable", "spread", "count", "dwell", "timestamp", "armed_at"])
+
+FILTERS = {"median": statistics.median, "mean": statistics.fmean}
+
+
+class StabilityCapture:
+    """
+    Record a pipe's weight the moment the streamed samples settle.
+    Works over a ring buffer of WeightSample (e.g. WeightReader.samples): after arm(),
+    every new sample re-checks the trailing window and the capture completes once the
+    window is full and its spread is inside the tolerance band.
+    Listeners are called as listener(CaptureResult) from the thread that feeds samples
+    (or calls expire()), outside the capture's lock.
+    """
+    def __init__(self, samples, window=0.3, tolerance=0.5, min_samples=3, method="median",
+                 require_stable=False, timeout=3.0):
+        """
+        :param samples: Ring buffer (deque) of WeightSample, newest last
+        :param window: Seconds of samples that must agree
+        :param tolerance: Maximum max-min spread inside the window (scale units)
+        :param min_samples: Minimum samples in the window
+        :param method: "median" or "mean" filter applied to the window
+        :param require_stable: Also require the terminal's own stable flag ("S S")
+        :param timeout: Seconds after arm() before giving up with an unstable capture
+        """
+        if method not in FILTERS:
+            raise ValueError(f"Unknown filter {method}")
+        self.samples = samples
+        self.window = window
+        self.tolerance = tolerance
+        self.min_samples = min_samples
+        self.filter = FILTERS[method]
+        self.require_stable = require_stable
+        self.timeout = timeout
+        self.armed_at = None
+        self.listeners = []
+        self._lock = threading.Lock()  # feed() and expire() run on different threads
+
+    @property
+    def armed(self):
+        return self.armed_at is not None
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def arm(self, since=None):
+        """Start looking for a stable weight in samples newer than since (time.monotonic())"""
+        self.armed_at = time.monotonic() if since is None else since
+
+    def cancel(self):
+        self.armed_at = None
+
+    def _window(self, now):
+        window = []
+        # Copy first: expire() runs on another thread than the one appending samples
+        for sample in reversed(list(self.samples)):
+            if sample.timestamp > now:  # expire(now) of an earlier moment
+                continue
+            if sample.timestamp < self.armed_at or sample.timestamp < now - self.window:
+                break
+            window.append(sample)
+        return window
+
+    def feed(self, sample):
+        """Call for every new sample (WeightReader listener); returns CaptureResult or None"""
+        with self._lock:
+            result = self._check(sample)
+        return self._notify(result)
+
+    def _check(self, sample):
+        armed_at = self.armed_at
+        if armed_at is None or sample.timestamp < armed_at:
+            return None
+        now = sample.timestamp
+        window = self._window(now)
+        if len(window) >= self.min_samples and now - armed_at >= self.window:
+            values = [s.weight for s in window]
+            spread = max(values) - min(values)
+            if spread <= self.tolerance and (not self.require_stable or all(s.stable for s in window)):
+                return self._finish(values, True, spread, now)
+        if now - armed_at >= self.timeout:
+            return self._expire(now)
+        return None
+
+    def expire(self, now=None):
+        """
+        Give up waiting: capture the filtered trailing window as unstable (None if empty)
+        :param now: End of the window (time.monotonic()); later samples are left out
+        """
+        with self._lock:
+            result = self._expire(time.monotonic() if now is None else now)
+        return self._notify(result)
+
+    def _expire(self, now):
+        if self.armed_at is None:
+            return None
+        window = self._window(now) or [s for s in list(self.samples) if self.armed_at <= s.timestamp <= now][-1:]
+        if not window:
+            self.armed_at = None
+            return None
+        values = [s.weight for s in window]
+        return self._finish(values, False, max(values) - min(values), now)
+
+    def _finish(self, values, stable, spread, now):
+        result = CaptureResult(self.filter(values), stable, spread, len(values), now - self.armed_at, now, self.armed_at)
+        self.armed_at = None
+        return result
+
+    def _notify(self, result):
+        if result is None:
+            return None
+        for listener in self.listeners:
+            try:
+                listener(result)
+            except Exception as e:
+                print(f"Capture listener error: {e}")
+        return result